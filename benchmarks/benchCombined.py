@@ -0,0 +1,55 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Benchmark: several invoices per pdflatex run
+(benchmarks/benchCombined.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Measures the time to render a set of invoices with one pdflatex run per
+invoice, and with several invoices compiled in each run and the PDF split
+afterwards. Both modes use the precompiled preamble and run one job at a time.
+
+Usage: python3 benchmarks/benchCombined.py --invoices 40 --combine 10
+'''
+
+# Import modules
+import os, sys, time, tempfile, shutil
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import *
+from invoiceRenderer import renderInvoice, renderInvoices, LaTeXFormat
+from benchFixtures import benchConfig, benchInvoice
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compare one pdflatex run per invoice with several invoices per run.")
+    parser.add_argument('--invoices', type=int, default=40, help="number of invoices to render")
+    parser.add_argument('--combine', type=int, nargs='+', default=[5, 10, 20], help="numbers of invoices per pdflatex run to try")
+    parser.add_argument('--pdflatex', default='pdflatex', help="pdflatex command to run")
+    args = parser.parse_args()
+
+    workDir = tempfile.mkdtemp(prefix='benchCombined-')
+    try:
+        latexFormat = LaTeXFormat(formatDir=workDir,pdflatex=args.pdflatex)
+        latexFormat.ensure()
+        invoices = [benchInvoice() for index in range(args.invoices)]
+        outputPaths = [os.path.join(workDir,'invoice{}.pdf'.format(index)) for index in range(args.invoices)]
+
+        start = time.perf_counter()
+        for invoice, outputPath in zip(invoices, outputPaths):
+            renderInvoice(invoice,benchConfig,outputPath=outputPath,latexFormat=latexFormat)
+        elapsed = time.perf_counter() - start
+        print( "{:<24} {:8.1f} ms total   {:8.1f} ms per invoice".format("One invoice per run", elapsed*1000, elapsed*1000/args.invoices) )
+
+        for combine in args.combine:
+            start = time.perf_counter()
+            for first in range(0, args.invoices, combine):
+                renderInvoices(invoices[first:first+combine],benchConfig,outputPaths[first:first+combine],latexFormat=latexFormat)
+            elapsed = time.perf_counter() - start
+            print( "{:<24} {:8.1f} ms total   {:8.1f} ms per invoice".format("{} invoices per run".format(combine), elapsed*1000, elapsed*1000/args.invoices) )
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
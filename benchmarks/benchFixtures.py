@@ -0,0 +1,46 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Fixtures for the benchmarks
+(benchmarks/benchFixtures.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+The config, customer account and invoices that every benchmark renders, so
+the scripts measure the same documents.
+'''
+
+# Import modules
+import os, sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import *
+
+benchConfig = {'userName':'Bench Mark', 'userAddress':r'1 Street\\ Town', 'userPhoneNumber':'01234 567890', 'userEmail':'bench@example.com', 'accountNumber':'12345678', 'sortCode':'123456', 'sortCodeFormatted':'12--34--56'}
+
+def benchAccounts():
+    '''
+    Returns a dictionary with one customer account for benchmarking
+    '''
+
+    return {'bench':CustomerAccount('BENCH','Bench Customer',r'2 Road\\ City',0)}
+
+def benchColumns(numOfEntries):
+    '''
+    Returns entry columns for benchmarking: ids, descriptions, rates and qtys (tuple of lists)
+    '''
+
+    return (['E{}'.format(index % 100) for index in range(numOfEntries)],
+            ['Usage & fees for item #{}'.format(index) for index in range(numOfEntries)],
+            [1.25 + (index % 7) for index in range(numOfEntries)],
+            [float(1 + index % 3) for index in range(numOfEntries)])
+
+def benchInvoice(numOfEntries=5):
+    '''
+    Returns an invoice for benchmarking with numOfEntries entries (Invoice object)
+    '''
+
+    invoice = Invoice(benchAccounts(),'bench',quiet=True)
+    invoice.addEntries(*benchColumns(numOfEntries))
+    return invoice
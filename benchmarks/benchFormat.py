@@ -0,0 +1,58 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Benchmark: precompiled preamble format
+(benchmarks/benchFormat.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Measures the time to render a one-page invoice by compiling the full template,
+and by loading the precompiled preamble format.
+
+Usage: python3 benchmarks/benchFormat.py --runs 20
+'''
+
+# Import modules
+import os, sys, time, tempfile, shutil
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import *
+from invoiceRenderer import renderInvoice, LaTeXFormat
+from benchFixtures import benchConfig, benchInvoice
+
+def timeRenders(runs,**renderOptions):
+    '''
+    Renders the benchmark invoice `runs` times. Returns the time of each render in seconds (list of float)
+    '''
+
+    invoice = benchInvoice()
+    times = []
+    for run in range(runs):
+        start = time.perf_counter()
+        renderInvoice(invoice,benchConfig,**renderOptions)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Compare per-invoice render time with and without the precompiled preamble.")
+    parser.add_argument('--runs', type=int, default=10, help="number of renders for each mode")
+    parser.add_argument('--pdflatex', default='pdflatex', help="pdflatex command to run")
+    args = parser.parse_args()
+
+    formatDir = tempfile.mkdtemp(prefix='benchFormat-')
+    try:
+        latexFormat = LaTeXFormat(formatDir=formatDir,pdflatex=args.pdflatex)
+        start = time.perf_counter()
+        latexFormat.ensure()
+        print( "Format built in {:.1f} ms".format((time.perf_counter() - start)*1000) )
+
+        for label, options in (('Full template', {'pdflatex':args.pdflatex}), ('Precompiled format', {'latexFormat':latexFormat})):
+            times = timeRenders(args.runs,**options)
+            print( "{:<20} mean {:8.1f} ms   median {:8.1f} ms   min {:8.1f} ms".format(label, statistics.mean(times)*1000, statistics.median(times)*1000, min(times)*1000) )
+    finally:
+        shutil.rmtree(formatDir, ignore_errors=True)
@@ -0,0 +1,269 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Benchmark suite for Invoice Generator
+(benchmarks/benchSuite.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Times each stage of the invoice pipeline, at several invoice sizes:
+
+entry.construct   - creating InvoiceEntry objects
+invoice.addEntry  - adding entries one at a time (as the invoice menu does) and reading the sub total
+invoice.addEntries - adding entries as columns (as the CSV import does)
+import.csv        - importing a CSV file with importEntries (invoice menu option 2)
+import.usage      - grouping the same CSV file into one line per ID and rate with importUsage (invoice menu option 7)
+fragments         - building and writing the TEMP*.tex files for a render
+render.stub       - a whole render, with a stub in place of pdflatex (benchmarks/stubLatex.py)
+render.pdflatex   - a whole render with pdflatex (skipped if pdflatex is not installed)
+render.native     - a whole render with the native PDF engine
+
+The results can be saved as JSON, with the commit they were measured at, and
+compared with an earlier run to spot regressions.
+
+Usage: python3 benchmarks/benchSuite.py --output results.json
+       python3 benchmarks/benchSuite.py --sizes 10 1000 --compare results.json
+'''
+
+# Import modules
+import os, sys, time, tempfile, shutil
+import json
+import csv
+import platform
+import subprocess
+import argparse
+import statistics
+
+benchDir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(benchDir, '..'))
+from invoiceObjects import *
+from invoiceImport import importEntries, importUsage
+from invoiceRenderer import buildFragments, writeFragments, renderInvoice, FragmentCache
+from benchFixtures import benchConfig, benchAccounts, benchColumns, benchInvoice
+
+stubLatex = os.path.join(benchDir, 'stubLatex.py')
+
+
+##### Define the benchmarks #####
+def setupConstruct(numOfEntries,workDir):
+    '''
+    Returns a function that creates numOfEntries InvoiceEntry objects
+    '''
+
+    ids, descriptions, rates, qtys = benchColumns(numOfEntries)
+    def run():
+        for index in range(numOfEntries):
+            InvoiceEntry(id=ids[index],description=descriptions[index],rate=rates[index],qty=qtys[index])
+    return run
+
+def setupAddEntry(numOfEntries,workDir):
+    '''
+    Returns a function that adds numOfEntries entries to a new invoice one at a time, then reads the sub total
+    '''
+
+    ids, descriptions, rates, qtys = benchColumns(numOfEntries)
+    entries = [InvoiceEntry(id=ids[index],description=descriptions[index],rate=rates[index],qty=qtys[index]) for index in range(numOfEntries)]
+    def run():
+        invoice = Invoice(benchAccounts(),'bench',quiet=True)
+        for entry in entries:
+            invoice.addEntry(entry,quiet=True)
+        invoice.getSubTotal()
+    return run
+
+def setupAddEntries(numOfEntries,workDir):
+    '''
+    Returns a function that adds numOfEntries entries to a new invoice as columns, then reads the sub total
+    '''
+
+    columns = benchColumns(numOfEntries)
+    def run():
+        invoice = Invoice(benchAccounts(),'bench',quiet=True)
+        invoice.addEntries(*columns)
+        invoice.getSubTotal()
+    return run
+
+def setupImport(numOfEntries,workDir):
+    '''
+    Writes a CSV file of numOfEntries rows in workDir. Returns a function that imports it into a new invoice
+    '''
+
+    path = os.path.join(workDir,'entries.csv')
+    with open(path,'w',newline='') as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(['ID','Description','Rate','Qty'])
+        writer.writerows(zip(*benchColumns(numOfEntries)))
+    def run():
+        importEntries(path,Invoice(benchAccounts(),'bench',quiet=True))
+    return run
+
+def setupImportUsage(numOfEntries,workDir):
+    '''
+    Writes a CSV file of numOfEntries rows in workDir. Returns a function that groups it into a new invoice
+    '''
+
+    path = os.path.join(workDir,'usage.csv')
+    with open(path,'w',newline='') as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(['ID','Description','Rate','Qty'])
+        ids, descriptions, rates, qtys = benchColumns(numOfEntries)
+        writer.writerows(zip(ids, ['Usage of {}'.format(id) for id in ids], rates, qtys)) # 100 distinct IDs
+    def run():
+        importUsage(path,Invoice(benchAccounts(),'bench',quiet=True),sortBy='amount')
+    return run
+
+def setupFragments(numOfEntries,workDir):
+    '''
+    Returns a function that builds and writes the TEMP*.tex files for an invoice of numOfEntries entries, with an empty fragment cache
+    '''
+
+    invoice = benchInvoice(numOfEntries)
+    def run():
+        fragmentDir = tempfile.mkdtemp(dir=workDir)
+        writeFragments(buildFragments(invoice,benchConfig,FragmentCache()),fragmentDir,invoice)
+        shutil.rmtree(fragmentDir)
+    return run
+
+def setupRender(**renderOptions):
+    '''
+    Returns a setup function for timing renderInvoice with renderOptions
+    '''
+
+    def setup(numOfEntries,workDir):
+        invoice = benchInvoice(numOfEntries)
+        return lambda: renderInvoice(invoice,benchConfig,**renderOptions)
+    return setup
+
+# name, setup function, whether it runs at every size (otherwise only at sizes up to renderLimit), requirement
+benchmarks = [
+    ('entry.construct', setupConstruct, True, None),
+    ('invoice.addEntry', setupAddEntry, True, None),
+    ('invoice.addEntries', setupAddEntries, True, None),
+    ('import.csv', setupImport, True, None),
+    ('import.usage', setupImportUsage, True, None),
+    ('fragments', setupFragments, True, None),
+    ('render.stub', setupRender(pdflatex=stubLatex), False, None),
+    ('render.pdflatex', setupRender(), False, 'pdflatex'),
+    ('render.native', setupRender(engine='native'), False, None),
+    ]
+
+
+##### Define methods for running and comparing #####
+def timeBenchmark(run,repeat):
+    '''
+    Calls run() once to warm up, then `repeat` times. Returns the time of each call in seconds (list of float)
+    '''
+
+    run()
+    times = []
+    for index in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return times
+
+def gitCommit():
+    '''
+    Returns the commit of the working tree, or None if it is not a git checkout (string)
+    '''
+
+    try:
+        result = subprocess.run(['git','rev-parse','HEAD'],cwd=benchDir,stdout=subprocess.PIPE,stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    return result.stdout.decode().strip() or None
+
+def runSuite(sizes,repeat,renderLimit=1000,only=None):
+    '''
+    Runs the benchmarks. Returns the results (dict), ready to be saved as JSON.
+
+    sizes: the numbers of entries to benchmark at (list of int)
+    repeat: the number of timed runs of each benchmark (int)
+    renderLimit: the largest size to run the render benchmarks at (int)
+    only: names of the benchmarks to run, or None for all (list of strings)
+    '''
+
+    results = {
+        'commit': gitCommit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'repeat': repeat,
+        'results': {},
+        }
+
+    workDir = tempfile.mkdtemp(prefix='benchSuite-')
+    try:
+        for name, setup, allSizes, requirement in benchmarks:
+            if only and name not in only:
+                continue
+            if requirement is not None and shutil.which(requirement) is None:
+                print( "{:<32} skipped ({} is not installed)".format(name, requirement) )
+                continue
+            for size in sizes:
+                if not allSizes and size > renderLimit:
+                    continue
+                times = timeBenchmark(setup(size,workDir),repeat)
+                key = '{}[{}]'.format(name, size)
+                results['results'][key] = {
+                    'name': name,
+                    'entries': size,
+                    'min': min(times),
+                    'median': statistics.median(times),
+                    'mean': statistics.mean(times),
+                    'perEntryMicroseconds': statistics.median(times) / size * 1e6,
+                    }
+                print( "{:<32} median {:10.3f} ms   min {:10.3f} ms   {:8.3f} µs/entry".format(key, statistics.median(times)*1000, min(times)*1000, statistics.median(times)/size*1e6) )
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True)
+
+    return results
+
+def compareResults(baseline,current,threshold=0.1):
+    '''
+    Prints the change in median time of each benchmark since the baseline.
+    Returns the names of the benchmarks that are more than `threshold` (a fraction) slower (list of strings)
+    '''
+
+    print( "\nCompared with {} ({}):".format(baseline.get('commit') or 'baseline', baseline.get('time')) )
+    regressions = []
+    for key in current['results']:
+        if key not in baseline['results']:
+            continue
+        before = baseline['results'][key]['median']
+        after = current['results'][key]['median']
+        change = after / before - 1 if before else 0.
+        flag = ''
+        if change > threshold:
+            flag = '  SLOWER'
+            regressions.append(key)
+        elif change < -threshold:
+            flag = '  faster'
+        print( "{:<32} {:10.3f} ms -> {:10.3f} ms   {:+7.1%}{}".format(key, before*1000, after*1000, change, flag) )
+    return regressions
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Time each stage of the invoice pipeline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000], help="numbers of entries to benchmark at (default: 10 1000 100000)")
+    parser.add_argument('--repeat', type=int, default=5, help="number of timed runs of each benchmark (default: 5)")
+    parser.add_argument('--render-limit', type=int, default=1000, help="largest number of entries to time whole renders at (default: 1000)")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="run only these benchmarks")
+    parser.add_argument('--output', help="save the results to this JSON file")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare with the results in this JSON file; exits with status 1 if anything is slower")
+    parser.add_argument('--threshold', type=float, default=0.1, help="fraction by which a benchmark must be slower to count as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    results = runSuite(args.sizes,args.repeat,args.render_limit,args.only)
+
+    if args.output:
+        with open(args.output,'w') as outputFile:
+            json.dump(results, outputFile, indent=2, sort_keys=True)
+        print( "Results saved to {}".format(args.output) )
+
+    if args.compare:
+        with open(args.compare,'r') as baselineFile:
+            baseline = json.load(baselineFile)
+        if compareResults(baseline,results,args.threshold):
+            sys.exit(1)
@@ -0,0 +1,78 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Benchmark: writing the invoice table
+(benchmarks/benchTable.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Measures the time to write TEMPinvoiceInfo.tex for invoices of increasing size,
+using the streaming writer and the old approach of building one string with
+repeated concatenation. With the streaming writer the time per entry should
+stay flat as the number of entries grows.
+
+Usage: python3 benchmarks/benchTable.py --sizes 1000 10000 100000
+'''
+
+# Import modules
+import os, sys, time, tempfile
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import *
+from invoiceRenderer import writeInvoiceInfo
+from benchFixtures import benchInvoice
+
+def writeConcatenated(invoice,path):
+    '''
+    The old way of writing the table: one string built with +=, written in one go.
+    '''
+
+    invoiceInfo = r"\newcommand\subtotal{{{}}}\newcommand\discount{{{}}}\newcommand\shipping{{{}}}\newcommand\grandtotal{{{}}}\newcommand\invoiceInfo{{".format(twoDP(invoice.getSubTotal()),invoice.getDiscountLine(),invoice.getShippingLine(),twoDP(invoice.getTotal()))
+    for entry in invoice.getEntries():
+        invoiceInfo += r"{id} & {description} & {rate} & {qty} & {amount} \\".format(**entry.getAllInfo())
+    invoiceInfo += "}"
+    with open(path,'w') as latexFile:
+        latexFile.write(invoiceInfo)
+
+def writeStreamed(invoice,path):
+    '''
+    The streaming writer, as used by renderInvoice.
+    '''
+
+    with open(path,'w',buffering=1024*1024) as latexFile:
+        writeInvoiceInfo(invoice,latexFile)
+
+def timeWrite(function,invoice,path,repeat=3):
+    '''
+    Returns the best time of `repeat` runs of function(invoice, path) in seconds (float)
+    '''
+
+    best = None
+    for run in range(repeat):
+        start = time.perf_counter()
+        function(invoice,path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Measure how the time to write the invoice table scales with the number of entries.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="numbers of entries to test")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='benchTable-'), 'TEMPinvoiceInfo.tex')
+    try:
+        print( "{:>10} {:>14} {:>14} {:>14} {:>14}".format("entries", "concat (ms)", "per entry (us)", "stream (ms)", "per entry (us)") )
+        for size in args.sizes:
+            invoice = benchInvoice(size)
+            concatenated = timeWrite(writeConcatenated,invoice,path)
+            streamed = timeWrite(writeStreamed,invoice,path)
+            print( "{:>10} {:>14.1f} {:>14.2f} {:>14.1f} {:>14.2f}".format(size, concatenated*1000, concatenated/size*1e6, streamed*1000, streamed/size*1e6) )
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rmdir(os.path.dirname(path))
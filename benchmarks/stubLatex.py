@@ -0,0 +1,32 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Stub compiler for the benchmarks
+(benchmarks/stubLatex.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Stands in for pdflatex: takes the same command line, reads the job's .tex file
+and writes a fixed one-page PDF, so the rest of the render pipeline can be
+timed without a TeX installation or the cost of typesetting.
+
+Usage: pass the path of this file as the pdflatex command.
+'''
+
+# Import modules
+import sys
+
+stubPDF = (b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n'
+           b'2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n'
+           b'3 0 obj\n<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] >>\nendobj\n'
+           b'trailer\n<< /Root 1 0 R >>\n%%EOF\n')
+
+
+if __name__ == "__main__":
+
+    jobName = [argument for argument in sys.argv[1:] if not argument.startswith('-')][-1]
+    with open(jobName+'.tex','rb') as texFile:
+        texFile.read()
+    with open(jobName+'.pdf','wb') as pdfFile:
+        pdfFile.write(stubPDF)
@@ -0,0 +1,402 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Customer stores for Invoice Generator
+(customerStore.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Places to keep the customer accounts. Both stores have the same methods, so
+either can be used by the menus and the batch mode:
+
+JSONCustomerStore   - the original customers.json file, rewritten in full on every save.
+SQLiteCustomerStore - an SQLite database, indexed by account code. Each change
+                      to an account is written straight away, as one row, in
+                      its own transaction.
+
+Invoice numbers are handed out by an InvoiceNumberAllocator, which takes them
+from the store atomically (under a file lock for JSON, in an immediate
+transaction for SQLite), so two processes never issue the same number. Batch
+workers can reserve a block of numbers at once. Numbers that are given out but
+not used are recorded as void, never handed out again.
+
+Usage: python3 customerStore.py customers.json customers.db   (copy the accounts from JSON to SQLite)
+'''
+
+# Import modules
+import json
+import os, tempfile
+import time
+import fcntl
+import sqlite3
+import argparse
+import contextlib
+from invoiceObjects import CustomerAccount
+
+
+class JSONCustomerStore(object):
+    '''
+    Customer accounts kept in a JSON file.
+    '''
+
+    def __init__(self,path):
+        '''
+        path: path to the customers JSON file (string)
+        '''
+
+        self.path = path
+        self.accounts = {}
+
+    def load(self):
+        '''
+        Returns a dictionary of CustomerAccount objects. NB: keys are lowercase!
+        '''
+
+        self.accounts = {}
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return self.accounts
+
+        with open(self.path,'r') as jsonFile:
+            customerData = json.load(jsonFile)
+        for account in customerData: # build dictionary of CustomerAccount objects
+            self.accounts[customerData[account]['accountName'].lower()] = CustomerAccount(customerData[account]['accountName'],customerData[account]['name'],customerData[account]['address'],customerData[account]['number'])
+
+        return self.accounts
+
+    def get(self,accountName):
+        '''
+        Returns the CustomerAccount with the account code accountName, or None (CustomerAccount object)
+        '''
+
+        return self.accounts.get(accountName.lower())
+
+    def saveAccount(self,account):
+        '''
+        Saves one account. A JSON file cannot be updated in place, so the whole file is rewritten,
+        but only this account is changed in it.
+        '''
+
+        self.accounts[account.getAccountName().lower()] = account
+        with self._locked():
+            self._write(self._merge(self._read(),[account]))
+
+    @contextlib.contextmanager
+    def _locked(self):
+        '''
+        Holds an exclusive lock on the customers file (through a '.lock' file next to it) for the duration of a with block.
+        '''
+
+        with open(self.path+'.lock','a') as lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+    def _read(self):
+        '''
+        Returns the data in the customers file (dict)
+        '''
+
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return {}
+        with open(self.path,'r') as jsonFile:
+            return json.load(jsonFile)
+
+    def _write(self,dataToSave):
+        '''
+        Writes the customers file, replacing the old file in one step so a crash cannot leave half a file.
+        '''
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as jsonFile:
+            jsonFile.write(json.dumps(dataToSave, indent=2, sort_keys=True))
+        os.replace(jsonFile.name, self.path)
+
+    def _merge(self,savedData,accounts):
+        '''
+        Returns the data in the customers file with accounts (list of CustomerAccount objects) written into it (dict).
+        Accounts in the file that are not in the list, e.g. added by another process, are kept.
+        Invoice numbers are never moved backwards, in case another process has issued numbers since.
+        '''
+
+        dataToSave = {savedData[account]['accountName'].lower(): savedData[account] for account in savedData}
+        for account in accounts:
+            accountData = account.JSONdump()
+            savedAccount = dataToSave.get(account.getAccountName().lower())
+            if savedAccount is not None:
+                accountData['number'] = max(accountData['number'], savedAccount['number'])
+            dataToSave[account.getAccountName().lower()] = accountData
+        return {accountData['accountName']: accountData for accountData in dataToSave.values()}
+
+    def saveAll(self,customerAccounts):
+        '''
+        Saves every account in the dictionary of CustomerAccount objects.
+        '''
+
+        self.accounts = customerAccounts
+
+        with self._locked():
+            self._write(self._merge(self._read(),customerAccounts.values()))
+
+    def allocateNumbers(self,accountName,count=1):
+        '''
+        Takes the next `count` invoice numbers for an account, under the file lock.
+        Returns the numbers (range). Raises KeyError for an unknown account.
+        '''
+
+        with self._locked():
+            savedData = self._read()
+            for account in savedData:
+                if account.lower() == accountName.lower():
+                    first = savedData[account]['number'] + 1
+                    savedData[account]['number'] += count
+                    self._write(savedData)
+                    return range(first, first + count)
+        raise KeyError("There is no account by the name '{}'".format(accountName))
+
+    def voidNumber(self,accountName,number,reason=""):
+        '''
+        Records that an invoice number will not be used, in a '.voided' file next to the customers file.
+        '''
+
+        with self._locked():
+            with open(self.path+'.voided','a') as voidedFile:
+                voidedFile.write(json.dumps({'accountName':accountName, 'number':number, 'reason':reason, 'time':time.time()}) + '\n')
+
+    def getVoided(self,accountName):
+        '''
+        Returns the voided invoice numbers for an account (list of int)
+        '''
+
+        if not os.path.exists(self.path+'.voided'):
+            return []
+        with open(self.path+'.voided','r') as voidedFile:
+            records = [json.loads(line) for line in voidedFile if line.strip()]
+        return [record['number'] for record in records if record['accountName'].lower() == accountName.lower()]
+
+    def close(self):
+        '''
+        Nothing to close for a JSON file.
+        '''
+
+        pass
+
+
+class SQLiteCustomerStore(object):
+    '''
+    Customer accounts kept in an SQLite database.
+    '''
+
+    def __init__(self,path):
+        '''
+        path: path to the database file; it is created if it does not exist (string)
+        '''
+
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30.) # wait up to 30s for another process's transaction
+        with self.connection:
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS customers (
+                accountKey TEXT PRIMARY KEY, -- lowercase account code
+                accountName TEXT NOT NULL,
+                name TEXT NOT NULL,
+                address TEXT NOT NULL,
+                number INTEGER NOT NULL DEFAULT 0)''')
+            self.connection.execute('''CREATE TABLE IF NOT EXISTS voided (
+                accountKey TEXT NOT NULL,
+                number INTEGER NOT NULL,
+                reason TEXT NOT NULL DEFAULT '',
+                voidedAt REAL NOT NULL,
+                PRIMARY KEY (accountKey, number))''')
+
+    def _account(self,row):
+        '''
+        Returns a CustomerAccount for a row of the customers table.
+        '''
+
+        return CustomerAccount(row[0],row[1],row[2],row[3])
+
+    def load(self):
+        '''
+        Returns a dictionary of CustomerAccount objects. NB: keys are lowercase!
+        '''
+
+        rows = self.connection.execute('SELECT accountName, name, address, number FROM customers')
+        return {row[0].lower(): self._account(row) for row in rows}
+
+    def get(self,accountName):
+        '''
+        Returns the CustomerAccount with the account code accountName, or None (CustomerAccount object)
+        '''
+
+        row = self.connection.execute('SELECT accountName, name, address, number FROM customers WHERE accountKey = ?', (accountName.lower(),)).fetchone()
+        return self._account(row) if row else None
+
+    def saveAccount(self,account):
+        '''
+        Saves one account, in its own transaction.
+        '''
+
+        with self.connection:
+            self.connection.execute(*self._upsert(account))
+
+    def saveAll(self,customerAccounts):
+        '''
+        Saves every account in the dictionary of CustomerAccount objects, in one transaction.
+        '''
+
+        with self.connection:
+            for account in customerAccounts.values():
+                self.connection.execute(*self._upsert(account))
+
+    def _upsert(self,account):
+        '''
+        Returns the SQL statement and parameters to insert or update an account (tuple)
+        The invoice number is never moved backwards, in case another process has issued numbers since.
+        '''
+
+        return ('''INSERT INTO customers (accountKey, accountName, name, address, number) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(accountKey) DO UPDATE SET accountName = excluded.accountName, name = excluded.name,
+                   address = excluded.address, number = MAX(number, excluded.number)''',
+                (account.getAccountName().lower(), account.getAccountName(), account.getName(), account.getAddress(), account.getNumber()))
+
+    def allocateNumbers(self,accountName,count=1):
+        '''
+        Takes the next `count` invoice numbers for an account, in an immediate (write-locked) transaction.
+        Returns the numbers (range). Raises KeyError for an unknown account.
+        '''
+
+        accountKey = accountName.lower()
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.connection.execute('SELECT number FROM customers WHERE accountKey = ?', (accountKey,)).fetchone()
+            if row is None:
+                raise KeyError("There is no account by the name '{}'".format(accountName))
+            self.connection.execute('UPDATE customers SET number = number + ? WHERE accountKey = ?', (count, accountKey))
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+        return range(row[0] + 1, row[0] + count + 1)
+
+    def voidNumber(self,accountName,number,reason=""):
+        '''
+        Records that an invoice number will not be used.
+        '''
+
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO voided (accountKey, number, reason, voidedAt) VALUES (?, ?, ?, ?)', (accountName.lower(), number, reason, time.time()))
+
+    def getVoided(self,accountName):
+        '''
+        Returns the voided invoice numbers for an account (list of int)
+        '''
+
+        rows = self.connection.execute('SELECT number FROM voided WHERE accountKey = ? ORDER BY number', (accountName.lower(),))
+        return [row[0] for row in rows]
+
+    def migrateFromJSON(self,jsonPath):
+        '''
+        Copies the accounts from a customers JSON file into the database.
+        Returns the number of accounts copied (int)
+        '''
+
+        customerAccounts = JSONCustomerStore(jsonPath).load()
+        self.saveAll(customerAccounts)
+        return len(customerAccounts)
+
+    def close(self):
+        '''
+        Closes the database.
+        '''
+
+        self.connection.close()
+
+
+class InvoiceNumberAllocator(object):
+    '''
+    Hands out invoice numbers from a customer store, so they are unique across processes.
+
+    Numbers are taken from the store a block at a time: with a blockSize above 1,
+    or after reserve(), later numbers for the account come from memory without
+    touching the store. Numbers that are taken but not used must be voided;
+    close() voids whatever is left of the reserved blocks.
+    '''
+
+    def __init__(self,store,blockSize=1):
+        '''
+        store: the customer store to take numbers from (JSONCustomerStore or SQLiteCustomerStore object)
+        blockSize: the number of numbers to take from the store at a time (int)
+        '''
+
+        self.store = store
+        self.blockSize = blockSize
+        self.reserved = {} # unused reserved numbers, keyed by lowercase account code
+
+    def attach(self,customerAccounts):
+        '''
+        Makes every account in the dictionary of CustomerAccount objects take its numbers from this allocator.
+        '''
+
+        for account in customerAccounts.values():
+            account.setAllocator(self)
+
+    def reserve(self,accountName,count):
+        '''
+        Takes a block of `count` numbers for an account from the store, for later calls to next().
+        '''
+
+        self.reserved.setdefault(accountName.lower(), []).extend(self.store.allocateNumbers(accountName,count))
+
+    def next(self,accountName):
+        '''
+        Returns the next invoice number for an account (int)
+        '''
+
+        reserved = self.reserved.get(accountName.lower())
+        if not reserved:
+            self.reserve(accountName,self.blockSize)
+            reserved = self.reserved[accountName.lower()]
+        return reserved.pop(0)
+
+    def void(self,accountName,number,reason=""):
+        '''
+        Records that an invoice number has been given out but will not be used.
+        '''
+
+        self.store.voidNumber(accountName,number,reason)
+
+    def close(self):
+        '''
+        Voids the reserved numbers that were not used.
+        '''
+
+        for accountKey, reserved in self.reserved.items():
+            for number in reserved:
+                self.store.voidNumber(accountKey,number,"unused reservation")
+        self.reserved = {}
+
+
+def openCustomerStore(path):
+    '''
+    Returns the store for the customers file at path: SQLite for '.db', '.sqlite' or '.sqlite3' files, otherwise JSON.
+    '''
+
+    if os.path.splitext(path)[1].lower() in ('.db', '.sqlite', '.sqlite3'):
+        return SQLiteCustomerStore(path)
+    return JSONCustomerStore(path)
+
+
+##### Main Thread #####
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Copy customer accounts from a customers.json file into an SQLite database.")
+    parser.add_argument('json', help="the customers.json file")
+    parser.add_argument('database', help="the SQLite database to copy the accounts into")
+    args = parser.parse_args()
+
+    store = SQLiteCustomerStore(args.database)
+    print( "Copied {} customer accounts.".format(store.migrateFromJSON(args.json)) )
+    store.close()
@@ -0,0 +1,217 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+asyncio rendering for Invoice Generator
+(invoiceAsync.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+An asyncio counterpart to invoiceRenderer.renderInvoice, for embedding invoice
+generation in an asyncio service. pdflatex is run with
+asyncio.create_subprocess_exec, so a compile does not hold a thread, and the
+file writing is done on the event loop's default executor. A semaphore limits
+the number of compiles running at once; further renders wait their turn.
+
+A render can be cancelled or given a timeout: either way the pdflatex process
+is killed and its scratch directory removed, once any file writing already
+started on the executor has finished.
+
+    renderer = AsyncRenderer(configData, maxConcurrent=4, timeout=60)
+    pdfData = await renderer.render(invoice)
+    paths = await renderer.renderMany(invoices, outputPaths)
+'''
+
+# Import modules
+import os, shutil, tempfile
+import asyncio
+import signal
+import logging
+from invoiceObjects import NoInputError
+from invoiceRenderer import prepareRender, finishRender, renderNative, deliverPDF, LaTeXError, fragmentCache, latexSupervisor, longtableChunkSize
+import invoiceRenderer
+
+
+class AsyncRenderer(object):
+    '''
+    Renders invoices from coroutines, with at most maxConcurrent compiles at a time.
+    '''
+
+    def __init__(self,configData,maxConcurrent=None,timeout=None,templatePath=invoiceRenderer.templatePath,pdflatex='pdflatex',latexFormat=None,cache=None,engine='latex',fragmentCache=fragmentCache,supervisor=latexSupervisor):
+        '''
+        configData: the config data, as returned by loadConfig (dict)
+        maxConcurrent: the number of renders to run at once, defaults to the number of CPUs (int)
+        timeout: the default time limit for one compile in seconds, or None for no limit (float)
+        templatePath, pdflatex, latexFormat, cache, engine, fragmentCache: as for renderInvoice
+        supervisor: supplies the pass and retry policy and the memory limit, and counts the jobs and passes (LaTeXSupervisor object).
+            The time limit is the renderer's own timeout.
+        '''
+
+        self.configData = configData
+        self.maxConcurrent = maxConcurrent or os.cpu_count()
+        self.timeout = timeout
+        self.templatePath = templatePath
+        self.pdflatex = pdflatex
+        self.latexFormat = latexFormat
+        self.cache = cache
+        self.engine = engine
+        self.fragmentCache = fragmentCache
+        self.supervisor = supervisor
+        self.semaphore = asyncio.Semaphore(self.maxConcurrent)
+        self.inFlight = 0
+        self.rendered = 0
+        self.failed = 0
+        self.timedOut = 0
+        self.cancelled = 0
+        self.latexPasses = 0
+
+    async def render(self,invoice,outputPath=None,timeout=None):
+        '''
+        Renders an invoice to PDF.
+
+        invoice: the invoice to be generated (Invoice object)
+        outputPath: where to save the PDF (string), or a sink to hand it to (OutputSink object). If None, the PDF is returned as bytes.
+        timeout: the time limit for the compile in seconds, overriding the renderer's default (float)
+
+        Returns where the PDF went, or the contents of the PDF (bytes) if no outputPath is given.
+        Raises NoInputError if the invoice has no entries, TimeoutError if the compile takes too long,
+        and LaTeXError if pdflatex fails.
+        The time spent waiting for a free slot does not count towards the timeout.
+        '''
+
+        if len(invoice.getEntries()) == 0:
+            raise NoInputError
+        if self.engine not in ('latex', 'native'):
+            raise ValueError("Unknown engine '{}' (expected 'latex' or 'native')".format(self.engine))
+        if timeout is None:
+            timeout = self.timeout
+
+        async with self.semaphore:
+            self.inFlight += 1
+            try:
+                if self.engine == 'native':
+                    result = await asyncio.to_thread(renderNative,invoice,self.configData,outputPath)
+                else:
+                    result = await asyncio.wait_for(self._compile(invoice,outputPath),timeout)
+            except asyncio.TimeoutError:
+                self.timedOut += 1
+                raise
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+            except Exception:
+                self.failed += 1
+                raise
+            finally:
+                self.inFlight -= 1
+        self.rendered += 1
+        return result
+
+    async def _compile(self,invoice,outputPath):
+        '''
+        Writes the fragments, runs pdflatex and delivers the PDF. The pdflatex process is killed if this is cancelled.
+        '''
+
+        workDir = tempfile.mkdtemp(prefix='invoice-') # private scratch directory for this render
+        try:
+            command, env, cacheKey, cachedPath = await self._inThread(prepareRender,invoice,self.configData,workDir,self.templatePath,self.pdflatex,self.latexFormat,self.cache,self.fragmentCache)
+            if cachedPath is not None:
+                return await self._inThread(deliverPDF,cachedPath,outputPath,invoice.getFilename()+'.pdf')
+
+            logging.debug("Running LaTeX...")
+            passes = await self._runLaTeX(command,workDir,env,len(invoice.getEntries()) <= longtableChunkSize)
+            self.latexPasses += passes # not `+= await`, which would add to the count from before the wait
+
+            return await self._inThread(finishRender,workDir,outputPath,self.cache,cacheKey,name=invoice.getFilename()+'.pdf')
+        finally:
+            shutil.rmtree(workDir, ignore_errors=True) # delete temporary files
+
+    async def _inThread(self,function,*args,**kwargs):
+        '''
+        Runs function on the default executor and returns its result. A thread cannot be stopped, so if this is
+        cancelled (or times out) it waits for the function to finish before passing the cancellation on, and the
+        scratch directory is not removed while the function is still using it.
+        '''
+
+        future = asyncio.ensure_future(asyncio.to_thread(function,*args,**kwargs))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            while not future.done():
+                try:
+                    await asyncio.wait([future])
+                except asyncio.CancelledError: # cancelled again: still wait
+                    pass
+            if not future.cancelled():
+                future.exception() # retrieved, so an error from the abandoned call is not logged as unhandled
+            raise
+
+    async def _runLaTeX(self,command,workDir,env,singleChunk):
+        '''
+        Runs pdflatex until the .aux file settles, following the supervisor's pass and retry policy.
+        Returns the number of passes (int)
+        '''
+
+        policy = self.supervisor.policy(workDir,singleChunk)
+        try:
+            action, value = next(policy)
+            while True:
+                if action == 'sleep':
+                    await asyncio.sleep(value)
+                    action, value = policy.send(None)
+                    continue
+                try:
+                    returnCode = await self._runPass(command,workDir,env)
+                except LaTeXError as error:
+                    action, value = policy.throw(error)
+                else:
+                    action, value = policy.send(returnCode)
+        except StopIteration as finished:
+            return finished.value
+
+    async def _runPass(self,command,workDir,env):
+        '''
+        Runs one pdflatex pass. Returns its return code (int). The process is killed if this is cancelled or times out.
+        '''
+
+        try:
+            process = await asyncio.create_subprocess_exec(*command,cwd=workDir,env=env,stdin=asyncio.subprocess.DEVNULL,stdout=asyncio.subprocess.PIPE,stderr=asyncio.subprocess.STDOUT,start_new_session=True) # own process group, so helpers it starts can be killed with it
+        except OSError as error:
+            self.supervisor.startFailed(error)
+        self.supervisor.limitMemory(process.pid)
+        try:
+            await process.communicate()
+        except BaseException: # cancelled or timed out: do not leave pdflatex running
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await asyncio.shield(process.wait())
+            raise
+        return process.returncode
+
+    async def renderMany(self,invoices,outputPaths=None,timeout=None):
+        '''
+        Renders several invoices concurrently (within the renderer's limit).
+
+        Returns a list with, for each invoice, its output path or PDF, or the exception that stopped it.
+        '''
+
+        if outputPaths is None:
+            outputPaths = [None] * len(invoices)
+        return await asyncio.gather(*(self.render(invoice,outputPath,timeout) for invoice, outputPath in zip(invoices, outputPaths)), return_exceptions=True)
+
+    def stats(self):
+        '''
+        Returns the render counters (dict)
+        '''
+
+        return {
+            'inFlight': self.inFlight,
+            'rendered': self.rendered,
+            'failed': self.failed,
+            'timedOut': self.timedOut,
+            'cancelled': self.cancelled,
+            'latexPasses': self.latexPasses,
+            'maxConcurrent': self.maxConcurrent,
+            }
@@ -0,0 +1,385 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Batch mode for Invoice Generator
+(invoiceBatch.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Generates many invoices without any interactive input. The invoices are read
+from a manifest file (JSON or CSV) and the pdflatex jobs are run in parallel on
+a pool of worker processes.
+
+JSON manifest: a list of invoices (or {"invoices": [...]}), e.g.
+    [{"account": "acme", "shipping": 5, "discount": 0,
+      "entries": [{"id": "A1", "description": "Widgets", "rate": 2.5, "qty": 4}]}]
+
+CSV manifest: one entry per row, with a header row. Rows with the same
+'account' and 'invoice' values are added to the same invoice, e.g.
+    account,invoice,id,description,rate,qty,shipping,discount
+    acme,1,A1,Widgets,2.5,4,5,
+
+Usage: python3 invoiceBatch.py manifest.json --workers 8
+       python3 invoiceBatch.py manifest.json --archive invoices.zip
+       python3 invoiceBatch.py --by-customer billing.csv --rejects rejects.csv
+
+--by-customer reads a billing export covering many customers (columns: account
+code, ID, description, rate, quantity, with a header row) in one pass, making
+one invoice per customer. Rows for unknown accounts, and rows that cannot be
+imported, go to the --rejects file.
+'''
+
+# Import modules
+import json, csv # for opening manifest files
+import os
+import sys, time
+import argparse
+import collections
+import concurrent.futures
+import logging
+from invoiceObjects import *
+from invoiceRenderer import loadConfig, renderInvoice, renderInvoices, LaTeXFormat
+from invoiceCache import RenderCache
+from customerStore import openCustomerStore, InvoiceNumberAllocator
+from invoiceMetrics import Metrics, RenderTimer, nullTimer, JSONLinesSink, PrometheusSink
+from invoiceOutput import ArchiveSink
+from invoiceImport import importByCustomer
+import invoiceRenderer
+import invoiceSettings
+
+
+##### Define methods for building invoices #####
+def loadManifest(path):
+    '''
+    Reads a manifest file and returns a list of invoice specifications (list of dict).
+    Files ending in '.csv' are read as CSV, anything else as JSON.
+    '''
+
+    if path.lower().endswith('.csv'):
+        return loadCSVManifest(path)
+
+    with open(path) as jsonFile:
+        manifest = json.load(jsonFile)
+    if isinstance(manifest, dict):
+        manifest = manifest['invoices']
+    return manifest
+
+def loadCSVManifest(path):
+    '''
+    Reads a CSV manifest, grouping the rows into invoices by their 'account' and 'invoice' columns.
+    Returns a list of invoice specifications (list of dict) in the order they first appear.
+    '''
+
+    invoices = {}
+    with open(path) as csvFile:
+        for row in csv.DictReader(csvFile):
+            key = (row['account'], row.get('invoice', ''))
+            if key not in invoices:
+                invoices[key] = {'account':row['account'], 'entries':[], 'shipping':0., 'discount':0.}
+            spec = invoices[key]
+            if row.get('shipping'):
+                spec['shipping'] = row['shipping']
+            if row.get('discount'):
+                spec['discount'] = row['discount']
+            spec['entries'].append({'id':row['id'], 'description':row['description'], 'rate':row['rate'], 'qty':row['qty']})
+
+    return list(invoices.values())
+
+def buildInvoice(customerAccounts,spec):
+    '''
+    Builds an Invoice object from an invoice specification without asking for any input.
+
+    customerAccounts: dictionary of CustomerAccount objects
+    spec: invoice specification with 'account', 'entries' and optional 'shipping' and 'discount' (dict)
+
+    The entries, shipping and discount are checked before the invoice is created,
+    so a bad specification does not use up an invoice number. Raises KeyError for
+    an unknown account and ValueError for a bad entry or amount.
+    '''
+
+    accountName = str(spec['account']).lower()
+    if accountName not in customerAccounts:
+        raise KeyError("There is no account by the name '{}'".format(spec['account']))
+
+    entries = []
+    for entryData in spec.get('entries', []):
+        if not entryData.get('id') or not entryData.get('description'):
+            raise ValueError("Entry is missing an ID or description: {}".format(entryData))
+        entries.append(InvoiceEntry(id=str(entryData['id']),description=str(entryData['description']),rate=float(entryData['rate']),qty=float(entryData['qty'])))
+    if len(entries) == 0:
+        raise NoInputError("There are no entries for account '{}'".format(spec['account']))
+    shipping = float(spec.get('shipping') or 0.)
+    discount = float(spec.get('discount') or 0.)
+    toPence(shipping), toPence(discount) # raises ValueError for an amount out of range
+
+    invoice = Invoice(customerAccounts,accountName,quiet=True)
+    for entry in entries:
+        invoice.addEntry(entry,quiet=True)
+    if shipping:
+        invoice.addShipping(shipping)
+    if discount:
+        invoice.addDiscount(discount)
+
+    return invoice
+
+
+##### Define methods for running the batch #####
+class BatchReport(object):
+    '''
+    Summary of a batch run: counts, failures and throughput.
+    '''
+
+    def __init__(self,total):
+        '''
+        total: the number of invoices in the manifest (int)
+        '''
+
+        self.total = total
+        self.rendered = []
+        self.failures = [] # list of (label, error message) tuples
+        self.startTime = time.perf_counter()
+        self.elapsed = 0.
+
+    def addFailure(self,label,error):
+        '''
+        Records a failed invoice.
+        '''
+
+        self.failures.append((label, "{}: {}".format(type(error).__name__, error)))
+        logging.error("{} failed: {}".format(label, error))
+
+    def finish(self):
+        '''
+        Stops the clock for the batch.
+        '''
+
+        self.elapsed = time.perf_counter() - self.startTime
+
+    def getThroughput(self):
+        '''
+        Returns the number of invoices rendered per second (float)
+        '''
+
+        if self.elapsed == 0:
+            return 0.
+        return len(self.rendered) / self.elapsed
+
+    def summary(self):
+        '''
+        Returns a human-readable summary of the batch (string)
+        '''
+
+        lines = ["Rendered {} of {} invoices in {:.2f}s ({:.2f} invoices/s)".format(len(self.rendered), self.total, self.elapsed, self.getThroughput())]
+        if self.failures:
+            lines.append("{} failed:".format(len(self.failures)))
+            for label, error in self.failures:
+                lines.append("  {}: {}".format(label, error))
+        return '\n'.join(lines)
+
+def _renderJob(invoice,configData,timed=False,**renderOptions):
+    '''
+    Renders an invoice in a worker process, timing its stages if timed is True.
+    Returns the result of renderInvoice, the metrics record (dict, or None) and the render cache counters for this render (dict, or None) (tuple).
+    If the render fails, the record and counters are attached to the exception as metricsRecord and cacheCounters.
+    '''
+
+    timer = RenderTimer(None,invoice.getFilename(),len(invoice.getEntries())) if timed else nullTimer
+    cache = renderOptions.get('cache')
+    before = cache.counters() if cache is not None else None # the copy sent to this worker starts with the parent's counts
+    def cacheCounters():
+        if cache is None:
+            return None
+        return {name: count - before[name] for name, count in cache.counters().items()}
+
+    try:
+        result = renderInvoice(invoice,configData,timer=timer,**renderOptions)
+    except Exception as error:
+        error.metricsRecord = timer.finish(error)
+        error.cacheCounters = cacheCounters()
+        raise
+    return result, timer.finish(), cacheCounters()
+
+def runBatch(specs,customerAccounts,configPath,savePath,templatePath=invoiceRenderer.templatePath,workers=None,precompile=True,cache=None,engine='latex',allocator=None,combine=1,metrics=None,output=None):
+    '''
+    Builds and renders a list of invoices on a pool of worker processes.
+
+    specs: invoice specifications, as returned by loadManifest (list of dict)
+    customerAccounts: dictionary of CustomerAccount objects (invoice numbers are allocated from these)
+    configPath: path to config.json (string)
+    savePath: directory to save the PDFs in (string)
+    templatePath: path to invoiceTemplate.tex (string)
+    workers: number of worker processes, defaults to the number of CPUs (int)
+    precompile: if True, the template preamble is precompiled into a LaTeX format once and shared by every job (bool)
+    cache: cache of rendered PDFs, so unchanged invoices are not compiled again (RenderCache object)
+    engine: 'latex' to compile with pdflatex, or 'native' to draw the PDFs directly (string)
+    allocator: if given, each account's invoice numbers are reserved from the customer store in one block (InvoiceNumberAllocator object)
+    combine: the number of invoices to compile in each pdflatex run (int). Above 1, the invoices are
+        compiled together and the PDF is split afterwards; the render cache is not used.
+    metrics: if given, the stages of each render are timed and recorded here (Metrics object).
+        Combined renders are not timed.
+    output: if given, the PDFs are sent back from the workers and handed to this sink (e.g. an ArchiveSink)
+        instead of being saved in savePath (OutputSink object). The sink is not closed.
+
+    A failing invoice is recorded in the report and does not stop the rest of the batch.
+    Returns a BatchReport.
+    '''
+
+    report = BatchReport(len(specs))
+
+    # Reserve a block of numbers per account, so other processes can carry on numbering invoices meanwhile
+    if allocator is not None:
+        allocator.attach(customerAccounts)
+        counts = collections.Counter(str(spec.get('account')).lower() for spec in specs)
+        for account in counts:
+            if account in customerAccounts:
+                allocator.reserve(customerAccounts[account].getAccountName(), counts[account])
+
+    # Build invoices in this process, so the invoice numbers are allocated in order
+    invoices = []
+    try:
+        for index, spec in enumerate(specs):
+            label = "Invoice {} ({})".format(index + 1, spec.get('account'))
+            try:
+                invoices.append((label, buildInvoice(customerAccounts, spec)))
+            except Exception as error:
+                report.addFailure(label, error)
+    finally:
+        if allocator is not None:
+            allocator.close() # void the numbers of invoices that could not be built
+
+    return renderBatch(invoices,configPath,savePath,templatePath,workers,precompile,cache,engine,combine,metrics,output,report)
+
+def renderBatch(invoices,configPath,savePath,templatePath=invoiceRenderer.templatePath,workers=None,precompile=True,cache=None,engine='latex',combine=1,metrics=None,output=None,report=None):
+    '''
+    Renders invoices that have already been built on a pool of worker processes.
+
+    invoices: the invoices, each with a label for the report (list of (string, Invoice object) tuples)
+    report: the report to add the results to (BatchReport object). By default a new one is made.
+    The other arguments are as for runBatch.
+
+    Returns a BatchReport.
+    '''
+
+    if report is None:
+        report = BatchReport(len(invoices))
+
+    configData = loadConfig(configPath)
+
+    latexFormat = None
+    if precompile and engine == 'latex':
+        latexFormat = LaTeXFormat(templatePath=templatePath)
+        try:
+            latexFormat.ensure() # build once here, rather than in every worker
+        except (OSError, ValueError, RuntimeError) as error:
+            logging.warning("Could not build the precompiled preamble ({}). Compiling the full template instead.".format(error))
+            latexFormat = None
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = {}
+        if combine > 1 and engine == 'latex':
+            for start in range(0, len(invoices), combine):
+                group = invoices[start:start+combine]
+                outputPaths = [None if output is not None else os.path.join(savePath, invoice.getFilename()+'.pdf') for label, invoice in group]
+                jobs[pool.submit(renderInvoices, [invoice for label, invoice in group], configData, outputPaths, templatePath=templatePath, latexFormat=latexFormat)] = group
+        else:
+            for label, invoice in invoices:
+                outputPath = None if output is not None else os.path.join(savePath, invoice.getFilename()+'.pdf')
+                jobs[pool.submit(_renderJob, invoice, configData, metrics is not None, outputPath=outputPath, templatePath=templatePath, latexFormat=latexFormat, cache=cache, engine=engine)] = [(label, invoice)]
+        for job in concurrent.futures.as_completed(jobs):
+            try:
+                result = job.result()
+            except Exception as error:
+                for label, invoice in jobs[job]:
+                    report.addFailure(label, error)
+                if metrics is not None and getattr(error, 'metricsRecord', None) is not None:
+                    metrics.record(error.metricsRecord)
+                if cache is not None and getattr(error, 'cacheCounters', None) is not None:
+                    cache.addCounters(error.cacheCounters)
+                continue
+            if isinstance(result, tuple):
+                result, record, counters = result
+                if metrics is not None:
+                    metrics.record(record)
+                if cache is not None:
+                    cache.addCounters(counters)
+            results = result if isinstance(result, list) else [result]
+            if output is not None: # the workers sent the PDFs back
+                results = [output.putBytes(invoice.getFilename()+'.pdf', pdfData) for (label, invoice), pdfData in zip(jobs[job], results)]
+            report.rendered.extend(results)
+
+    report.finish()
+    return report
+
+
+##### Main Thread #####
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Generate invoices from a manifest file without any interactive input.")
+    parser.add_argument('manifest', nargs='?', help="JSON or CSV file listing the invoices to generate")
+    parser.add_argument('--by-customer', metavar='CSV', help="instead of a manifest, make one invoice per customer from this CSV file (account code, ID, description, rate, quantity)")
+    parser.add_argument('--rejects', metavar='PATH', help="with --by-customer, write the rows for unknown account codes, and rows that cannot be imported, to this CSV file")
+    parser.add_argument('--group', action='store_true', help="with --by-customer, group each customer's rows by ID, description and rate")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="number of pdflatex jobs to run at once (default: number of CPUs)")
+    parser.add_argument('--config', default=invoiceSettings.pathToConfig, help="path to config.json")
+    parser.add_argument('--customers', default=invoiceSettings.pathToCustomers, help="path to the customer data (customers.db or customers.json)")
+    parser.add_argument('--save', default=invoiceSettings.pathToSave, help="directory to save the invoices in")
+    parser.add_argument('--archive', metavar='PATH', help="write the invoices to this .zip, .tar or .tar.gz archive instead of the save directory ('-' streams a ZIP to stdout)")
+    parser.add_argument('--template', default=invoiceRenderer.templatePath, help="path to the LaTeX template")
+    parser.add_argument('--engine', choices=['latex', 'native'], default='latex', help="'latex' compiles the template with pdflatex; 'native' draws the PDFs directly, which is much faster")
+    parser.add_argument('--no-format', dest='precompile', action='store_false', help="compile the full template for every invoice instead of using a precompiled preamble")
+    parser.add_argument('--no-cache', dest='useCache', action='store_false', help="always run pdflatex, even for invoices that have been rendered before")
+    parser.add_argument('--combine', type=int, default=1, metavar='N', help="compile N invoices in each pdflatex run and split the PDF afterwards (default: 1)")
+    parser.add_argument('--metrics-jsonl', metavar='PATH', help="append the stage times of each invoice to this JSON-lines file")
+    parser.add_argument('--metrics-prom', metavar='PATH', help="write histograms of the stage times to this Prometheus text file")
+    parser.add_argument('--cache-size', type=int, default=256, help="maximum size of the render cache in MB (default: 256)")
+    args = parser.parse_args()
+
+    if (args.manifest is None) == (args.by_customer is None):
+        parser.error("give either a manifest or --by-customer")
+
+    customerStore = openCustomerStore(args.customers)
+    customerAccounts = customerStore.load()
+    specs = loadManifest(args.manifest) if args.manifest else None
+
+    cache = RenderCache(maxBytes=args.cache_size*1024*1024) if args.useCache else None
+    allocator = InvoiceNumberAllocator(customerStore)
+    metrics = None
+    if args.metrics_jsonl or args.metrics_prom:
+        sinks = []
+        if args.metrics_jsonl:
+            sinks.append(JSONLinesSink(args.metrics_jsonl))
+        if args.metrics_prom:
+            sinks.append(PrometheusSink(args.metrics_prom))
+        metrics = Metrics(sinks)
+    output = None
+    if args.archive == '-':
+        output = ArchiveSink(sys.stdout.buffer)
+    elif args.archive:
+        output = ArchiveSink(args.archive)
+    try:
+        if specs is not None:
+            report = runBatch(specs, customerAccounts, args.config, args.save, templatePath=args.template, workers=args.workers, precompile=args.precompile, cache=cache, engine=args.engine, allocator=allocator, combine=args.combine, metrics=metrics, output=output)
+        else:
+            allocator.attach(customerAccounts) # each invoice is numbered when its customer's first good row is read
+            try:
+                invoices, importReport = importByCustomer(args.by_customer, customerAccounts, rejectPath=args.rejects, group=args.group)
+            finally:
+                allocator.close()
+            print(importReport.summary(), file=sys.stderr if args.archive == '-' else sys.stdout)
+            report = renderBatch([("Invoice {}".format(invoice.getInvoiceCode(latex=False)), invoice) for invoice in invoices], args.config, args.save, templatePath=args.template, workers=args.workers, precompile=args.precompile, cache=cache, engine=args.engine, combine=args.combine, metrics=metrics, output=output)
+    finally:
+        if output is not None:
+            output.close()
+
+    customerStore.close() # the allocator has already taken the invoice numbers from the store
+    summaryFile = sys.stderr if args.archive == '-' else sys.stdout # keep stdout for the archive
+    print(report.summary(), file=summaryFile)
+    if cache is not None and args.engine == 'latex' and args.combine <= 1:
+        print("Render cache: {hits} hits, {misses} misses, {evictions} evicted".format(**cache.counters()), file=summaryFile)
+    if metrics is not None:
+        metrics.close()
+        print(metrics.summary(), file=summaryFile)
+
+    sys.exit(1 if report.failures else 0)
@@ -0,0 +1,231 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Render cache for Invoice Generator
+(invoiceCache.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+A content-addressed cache of rendered PDFs. The key is a hash of everything
+that goes into the LaTeX run (the TeX fragments for the invoice table, customer
+address, invoice code and config, and the template itself), so an invoice whose
+inputs are byte-identical to an earlier render is returned without running
+pdflatex. N.B. a cached PDF keeps the date it was first rendered on.
+
+The cache is a directory of <key>.pdf files, bounded in size. Reading an entry
+updates its modification time, and the least recently used entries are removed
+when the cache grows past its size limit. Each process keeps a running total of
+the size, and only scans the directory again when the total goes over the limit.
+
+The hit and miss counters count the lookups made through one RenderCache
+object. A copy of it used in a worker process counts separately, so workers
+send counters() back with their results and the parent adds them up with
+addCounters.
+
+Usage: python3 invoiceCache.py --stats
+       python3 invoiceCache.py --clear
+'''
+
+# Import modules
+import os, tempfile
+import hashlib
+import argparse
+import threading
+import logging
+
+cacheDir = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'invoiceGenerator', 'renders') # default cache location
+
+_cacheSizes = {} # running total of the bytes in each cache directory, kept per process so copies of a RenderCache sent to workers share it
+_cacheSizesLock = threading.Lock()
+
+
+class RenderCache(object):
+    '''
+    Size-bounded, least-recently-used cache of rendered PDFs on disk.
+    '''
+
+    def __init__(self,directory=cacheDir,maxBytes=256*1024*1024):
+        '''
+        directory: directory to keep the cached PDFs in (string)
+        maxBytes: maximum total size of the cached PDFs (int)
+        '''
+
+        self.directory = directory
+        self.maxBytes = maxBytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def makeKey(self,fragments,templateData):
+        '''
+        Returns the cache key for a render (string)
+
+        fragments: the TeX fragments (or a digest of a large fragment), keyed by filename (dict of strings)
+        templateData: the contents of the LaTeX template (bytes)
+        '''
+
+        key = hashlib.sha256()
+        for filename in sorted(fragments):
+            key.update(filename.encode('utf-8') + b'\0')
+            key.update(fragments[filename].encode('utf-8') + b'\0')
+        key.update(templateData)
+        return key.hexdigest()
+
+    def getPath(self,key):
+        '''
+        Returns the path of the cached PDF for a key (string)
+        '''
+
+        return os.path.join(self.directory, key+'.pdf')
+
+    def get(self,key):
+        '''
+        Returns the path of the cached PDF for a key, or None if it is not cached (string)
+        '''
+
+        path = self.getPath(key)
+        try:
+            os.utime(path) # mark as recently used
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logging.debug("Render cache hit: "+key)
+        return path
+
+    def put(self,key,pdfPath):
+        '''
+        Stores a copy of the PDF at pdfPath under key, then evicts old entries if the cache is too big.
+        '''
+
+        os.makedirs(self.directory, exist_ok=True)
+        tempFile = tempfile.NamedTemporaryFile(dir=self.directory, suffix='.tmp', delete=False)
+        try:
+            with tempFile, open(pdfPath,'rb') as pdfFile:
+                for block in iter(lambda: pdfFile.read(1024*1024), b''):
+                    tempFile.write(block)
+            size = os.path.getsize(tempFile.name)
+            try:
+                size -= os.path.getsize(self.getPath(key)) # replacing an existing entry
+            except OSError:
+                pass
+            os.replace(tempFile.name, self.getPath(key)) # atomic, so readers never see a partial PDF
+        except BaseException:
+            os.remove(tempFile.name)
+            raise
+        self.stores += 1
+
+        directory = os.path.abspath(self.directory)
+        with _cacheSizesLock:
+            totalBytes = _cacheSizes.get(directory)
+            if totalBytes is not None:
+                totalBytes = _cacheSizes[directory] = totalBytes + size
+        if totalBytes is None or totalBytes > self.maxBytes: # unknown, or over the limit: scan the directory
+            self.evict()
+
+    def entries(self):
+        '''
+        Returns the cached PDFs as (modification time, size, path) tuples, oldest first (list)
+        '''
+
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.pdf'):
+                        try:
+                            entryStat = entry.stat()
+                        except OSError: # removed by another process
+                            continue
+                        entries.append((entryStat.st_mtime, entryStat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        entries.sort()
+        return entries
+
+    def evict(self):
+        '''
+        Removes the least recently used PDFs until the cache is within maxBytes.
+        '''
+
+        entries = self.entries()
+        totalBytes = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if totalBytes <= self.maxBytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+            totalBytes -= size
+        with _cacheSizesLock:
+            _cacheSizes[os.path.abspath(self.directory)] = totalBytes
+
+    def invalidate(self,key=None):
+        '''
+        Removes the cached PDF for key, or every cached PDF if no key is given.
+        '''
+
+        if key is not None:
+            paths = [self.getPath(key)]
+        else:
+            paths = [path for mtime, size, path in self.entries()]
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with _cacheSizesLock:
+            _cacheSizes.pop(os.path.abspath(self.directory), None) # rescanned at the next put
+
+    def counters(self):
+        '''
+        Returns the hit, miss, store and eviction counters (dict)
+        '''
+
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores, 'evictions': self.evictions}
+
+    def addCounters(self,counters):
+        '''
+        Adds counters from a copy of the cache, e.g. one used in a worker process (dict, as returned by counters).
+        '''
+
+        self.hits += counters['hits']
+        self.misses += counters['misses']
+        self.stores += counters['stores']
+        self.evictions += counters['evictions']
+
+    def stats(self):
+        '''
+        Returns the hit/miss counters and the size of the cache (dict)
+        '''
+
+        entries = self.entries()
+        return dict(self.counters(), **{
+            'entries': len(entries),
+            'bytes': sum(size for mtime, size, path in entries),
+            'maxBytes': self.maxBytes,
+            })
+
+
+##### Main Thread #####
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the render cache.")
+    parser.add_argument('--dir', default=cacheDir, help="cache directory")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument('--stats', action='store_true', help="print the number and size of cached PDFs")
+    action.add_argument('--clear', action='store_true', help="remove every cached PDF")
+    args = parser.parse_args()
+
+    cache = RenderCache(directory=args.dir)
+    if args.clear:
+        cache.invalidate()
+        print( "Render cache cleared." )
+    else:
+        cacheStats = cache.stats()
+        print( "{entries} cached PDFs, {bytes} bytes".format(**cacheStats) )
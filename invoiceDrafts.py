@@ -0,0 +1,275 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Invoice drafts for Invoice Generator
+(invoiceDrafts.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Keeps invoices after the program exits, so they can be reopened and edited.
+Every change to a tracked invoice is appended to a journal file as one line of
+JSON holding just that change (the entries added, an amount of shipping...),
+so an edit never rewrites the file. Loading the journal replays the lines.
+
+When an invoice is generated the journal records a hash of its content and
+of the inputs the PDF was made from (the config and template), so invoices
+that have not changed since their last PDF are not rendered again.
+
+    drafts = DraftJournal('drafts.jsonl')
+    drafts.track(invoice)           # from now on, changes to invoice are journaled
+    invoice = drafts.restore('ACME_001', customerAccounts)
+    drafts.compact()                # rewrite the journal with one snapshot per invoice
+
+Usage: python3 invoiceDrafts.py drafts.jsonl   (list the drafts)
+       python3 invoiceDrafts.py drafts.jsonl --compact
+'''
+
+# Import modules
+import json
+import os, tempfile
+import time
+import hashlib
+import fcntl
+import argparse
+import contextlib
+from invoiceObjects import Invoice
+
+
+##### Define methods for invoice content #####
+def contentHash(invoice,renderInputs=''):
+    '''
+    Returns a hash of everything that appears on an invoice's PDF: customer, code, entries, shipping and discount,
+    and renderInputs, a digest of the other files the PDF is made from (string)
+    '''
+
+    customer = invoice.getCustomer()
+    entries = invoice.getEntries()
+    content = [customer.getAccountName(), customer.getName(), customer.getAddress(), invoice.getNumber(),
+               entries.ids, entries.descriptions, list(entries.rates), list(entries.qtys),
+               invoice.shippingPence, invoice.showShipping, invoice.discountPence, invoice.showDiscount, renderInputs]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+def newDraft(record):
+    '''
+    Returns the state of a draft opened by an 'open' journal record (dict)
+    '''
+
+    return {'code': record['draft'], 'account': record['account'], 'number': record['number'],
+            'ids': [], 'descriptions': [], 'rates': [], 'qtys': [],
+            'shippingPence': 0, 'showShipping': False, 'discountPence': 0, 'showDiscount': False,
+            'renderedHash': None, 'outputPath': None, 'updated': record['time']}
+
+def applyRecord(drafts,record):
+    '''
+    Applies one journal record to drafts (dict of draft states, by code).
+    '''
+
+    op = record['op']
+    if op == 'open':
+        drafts[record['draft']] = newDraft(record)
+        return
+    draft = drafts.get(record['draft'])
+    if draft is None: # a change to a discarded draft
+        return
+    if op == 'entries':
+        for column in ('ids', 'descriptions', 'rates', 'qtys'):
+            draft[column].extend(record[column])
+    elif op == 'remove':
+        for column in ('ids', 'descriptions', 'rates', 'qtys'):
+            del draft[column][record['index']]
+    elif op == 'shipping':
+        draft['shippingPence'] += record['pence']
+        draft['showShipping'] = True
+    elif op == 'discount':
+        draft['discountPence'] += record['pence']
+        draft['showDiscount'] = True
+    elif op == 'snapshot': # the whole content, written by track and compact
+        draft.update({key: record[key] for key in ('ids', 'descriptions', 'rates', 'qtys', 'shippingPence', 'showShipping', 'discountPence', 'showDiscount', 'renderedHash', 'outputPath')})
+    elif op == 'rendered':
+        draft['renderedHash'] = record['hash']
+        draft['outputPath'] = record['outputPath']
+    elif op == 'discard':
+        del drafts[record['draft']]
+        return
+    draft['updated'] = record['time']
+
+
+##### Define the journal #####
+class DraftJournal(object):
+    '''
+    Append-only journal of invoice drafts.
+    '''
+
+    def __init__(self,path):
+        '''
+        path: the journal file (string). It is created when the first change is recorded.
+        '''
+
+        self.path = path
+        self.drafts = self.load()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        '''
+        Holds an exclusive lock on the journal (through a '.lock' file next to it) for the duration of a with block.
+        '''
+
+        with open(self.path+'.lock','a') as lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+    def load(self):
+        '''
+        Replays the journal. Returns the drafts, by invoice code (dict of dict)
+        '''
+
+        drafts = {}
+        if not os.path.exists(self.path):
+            return drafts
+        with open(self.path,'r') as journalFile:
+            for line in journalFile:
+                if line.strip():
+                    applyRecord(drafts,json.loads(line))
+        return drafts
+
+    def _append(self,records):
+        '''
+        Appends records to the journal and applies them to the drafts.
+        '''
+
+        with self._locked():
+            with open(self.path,'a') as journalFile:
+                journalFile.write(''.join(json.dumps(record) + '\n' for record in records))
+        for record in records:
+            applyRecord(self.drafts,record)
+
+    def record(self,invoice,op,**data):
+        '''
+        Records a change to a tracked invoice (called by the Invoice object).
+        '''
+
+        self._append([dict(data, draft=invoice.getInvoiceCode(latex=False), op=op, time=time.time())])
+
+    def track(self,invoice):
+        '''
+        Starts journaling an invoice. A new invoice is added to the journal with whatever it holds already.
+        '''
+
+        code = invoice.getInvoiceCode(latex=False)
+        if code not in self.drafts:
+            records = [{'draft': code, 'op': 'open', 'account': invoice.getCustomer().getAccountName(), 'number': invoice.getNumber(), 'time': time.time()}]
+            records.extend(self._snapshot(invoice, code))
+            self._append(records)
+        invoice.setJournal(self)
+
+    def _snapshot(self,invoice,code,renderedHash=None,outputPath=None):
+        '''
+        Returns a journal record holding the whole content of an invoice, or nothing if it is empty (list of dict)
+        '''
+
+        entries = invoice.getEntries()
+        if len(entries) == 0 and not invoice.showShipping and not invoice.showDiscount and renderedHash is None:
+            return []
+        return [{'draft': code, 'op': 'snapshot', 'time': time.time(),
+                 'ids': list(entries.ids), 'descriptions': list(entries.descriptions), 'rates': list(entries.rates), 'qtys': list(entries.qtys),
+                 'shippingPence': invoice.shippingPence, 'showShipping': invoice.showShipping,
+                 'discountPence': invoice.discountPence, 'showDiscount': invoice.showDiscount,
+                 'renderedHash': renderedHash, 'outputPath': outputPath}]
+
+    def getDrafts(self):
+        '''
+        Returns the drafts, oldest change first (list of dict)
+        '''
+
+        return sorted(self.drafts.values(), key=lambda draft: draft['updated'])
+
+    def isRendered(self,invoice):
+        '''
+        Returns True if a PDF has been made of the invoice at some point (bool)
+        '''
+
+        draft = self.drafts.get(invoice.getInvoiceCode(latex=False))
+        return draft is not None and draft['renderedHash'] is not None
+
+    def needsRender(self,invoice,outputPath=None,renderInputs=''):
+        '''
+        Returns True if the invoice or renderInputs (as for contentHash) have changed since its last PDF,
+        or it has never been rendered, or its PDF is not at outputPath (defaults to where it was last saved) (bool)
+        '''
+
+        draft = self.drafts.get(invoice.getInvoiceCode(latex=False))
+        if draft is None or draft['renderedHash'] != contentHash(invoice,renderInputs):
+            return True
+        outputPath = outputPath or draft['outputPath']
+        return outputPath is None or not os.path.exists(outputPath)
+
+    def markRendered(self,invoice,outputPath,renderInputs=''):
+        '''
+        Records that a PDF of the invoice as it is now, made from renderInputs (as for contentHash), was saved at outputPath.
+        '''
+
+        self.record(invoice,'rendered',hash=contentHash(invoice,renderInputs),outputPath=outputPath)
+
+    def discard(self,invoice):
+        '''
+        Removes an invoice from the journal and stops tracking it.
+        '''
+
+        code = invoice.getInvoiceCode(latex=False)
+        if code in self.drafts:
+            self.record(invoice,'discard')
+        invoice.setJournal(None)
+
+    def restore(self,code,customerAccounts):
+        '''
+        Rebuilds a draft as an Invoice object, tracked by this journal.
+        Returns the invoice (Invoice object). Raises KeyError if there is no such draft or its customer is missing.
+        '''
+
+        draft = self.drafts[code]
+        if draft['account'].lower() not in customerAccounts:
+            raise KeyError("There is no account by the name '{}'".format(draft['account']))
+        invoice = Invoice(customerAccounts,draft['account'],quiet=True,number=draft['number'])
+        invoice.addEntries(draft['ids'],draft['descriptions'],draft['rates'],draft['qtys'])
+        invoice.shippingPence, invoice.showShipping = draft['shippingPence'], draft['showShipping']
+        invoice.discountPence, invoice.showDiscount = draft['discountPence'], draft['showDiscount']
+        invoice.setJournal(self)
+        return invoice
+
+    def compact(self):
+        '''
+        Rewrites the journal with one snapshot per draft, dropping the history of changes and discarded drafts.
+        '''
+
+        with self._locked():
+            self.drafts = self.load() # include changes from other processes
+            lines = []
+            for draft in self.getDrafts():
+                lines.append({'draft': draft['code'], 'op': 'open', 'account': draft['account'], 'number': draft['number'], 'time': draft['updated']})
+                lines.append(dict({key: draft[key] for key in ('ids', 'descriptions', 'rates', 'qtys', 'shippingPence', 'showShipping', 'discountPence', 'showDiscount', 'renderedHash', 'outputPath')}, draft=draft['code'], op='snapshot', time=draft['updated']))
+            directory = os.path.dirname(os.path.abspath(self.path))
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as journalFile:
+                journalFile.write(''.join(json.dumps(line) + '\n' for line in lines))
+            os.replace(journalFile.name, self.path)
+
+
+##### Main Thread #####
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="List the invoice drafts in a journal.")
+    parser.add_argument('journal', help="the drafts journal (drafts.jsonl)")
+    parser.add_argument('--compact', action='store_true', help="rewrite the journal with one snapshot per draft")
+    args = parser.parse_args()
+
+    journal = DraftJournal(args.journal)
+    if args.compact:
+        before = os.path.getsize(args.journal) if os.path.exists(args.journal) else 0
+        journal.compact()
+        print( "Compacted {} ({} -> {} bytes)".format(args.journal, before, os.path.getsize(args.journal)) )
+    for draft in journal.getDrafts():
+        print( "{:<20} {:>5} entries  {}".format(draft['code'], len(draft['ids']), 'rendered' if draft['renderedHash'] else 'draft') )
@@ -10,15 +10,26 @@ Date created: 2016-02-22
 Last updated: 2017-01-22
 
 N.B.    This program requires pdflatex.
+
+Usage: python3 invoiceGenerator.py
+       python3 invoiceGenerator.py --script entries.txt   (replay the answers in entries.txt, one per line)
 '''
 
 # Import modules
-import json, csv # for opening/saving files and data
-import sys, subprocess # for running system operations
-import os, shutil # for manipulating files
+import json # for opening/saving files and data
+import sys # for running system operations
+import os # for manipulating files
 import logging
 import re
+import argparse
+import hashlib
 from invoiceObjects import *
+from invoiceRenderer import renderInvoice, LaTeXFormat, LaTeXError, fragmentCache, templatePath
+from invoiceImport import importEntries, importUsage, importByCustomer
+from customerStore import openCustomerStore, InvoiceNumberAllocator
+from invoiceMetrics import Metrics, JSONLinesSink, nullTimer
+from invoiceDrafts import DraftJournal
+from invoiceSettings import * # paths of the files used (pathToSave, pathToCustomers...)
 
 # Logging options
 logging.basicConfig(level=logging.DEBUG, format='- %(levelname)s - %(message)s') # config logging messages
@@ -31,10 +42,9 @@ titleSplash = '''
                 Invoice Generator
 %------------------------------------------------%
 '''
-pathToSave = os.path.expanduser('~/Dropbox/Invoices/')# set destination directory of generated invoices
-pathToCSV = os.path.expanduser('~/Desktop/invoiceData.csv')
-pathToCustomers = os.path.expanduser('~/Dropbox/Invoices/customers.json')
-pathToConfig = os.path.expanduser('~/Dropbox/Invoices/config.json')
+latexFormat = LaTeXFormat() # precompiled template preamble (set to None to compile the full template every time)
+metrics = None # Metrics object, set up in the main thread if pathToMetrics is set
+drafts = None # DraftJournal object, set up in the main thread
 
 # Check we're using Python3
 try:
@@ -43,9 +53,19 @@ except:
     print("This program will only run using Python 3.")
 
 ##### Define method for generating invoice #####
+def renderInputs():
+    '''
+    Returns a digest of the files every PDF is made from besides its invoice: the config and the template (string)
+    '''
+
+    configData = fragmentCache.loadConfig(pathToConfig)
+    templateData = fragmentCache.templateData(latexFormat.templatePath if latexFormat is not None else templatePath)
+    return hashlib.sha256(json.dumps(configData,sort_keys=True).encode() + templateData).hexdigest()
+
 def generateInvoice(invoice):
     '''
     Process an invoice and generate the PDF using LaTeX.
+    If the invoice, config and template are unchanged since its last PDF (according to the drafts journal), nothing is rendered.
 
     invoice: the invoice to be generated (Invoice object)
     '''
@@ -55,165 +75,160 @@ def generateInvoice(invoice):
     if len(invoice.getEntries()) == 0:
         raise NoInputError
 
-    numOfEntries = 0
-    invoiceInfo = r"\newcommand\subtotal{{{}}}\newcommand\discount{{{}}}\newcommand\shipping{{{}}}\newcommand\grandtotal{{{}}}\newcommand\invoiceInfo{{".format(twoDP(invoice.getSubTotal()),invoice.getDiscountLine(),invoice.getShippingLine(),twoDP(invoice.getTotal()))
-    for entry in invoice.getEntries(): # for each invoice entry
-        invoiceInfo += r"{id} & {description} & {rate} & {qty} & {amount} \\".format(**entry.getAllInfo())
-        numOfEntries += 1
-    while numOfEntries < 8: # add padding: make sure there are at least 8 entries, so the invoice table isn't too short (because that looks weird)
-        invoiceInfo += r"&~\n~&&&\\"
-        numOfEntries += 1
-    invoiceInfo += "}"
-    logging.debug("invoiceInfo: "+invoiceInfo[100:])
-
-    # Create directory for temporary files
+    outputPath = os.path.join(pathToSave,invoice.getFilename()+'.pdf')
+    inputs = renderInputs() if drafts is not None else ''
+    if drafts is not None and not drafts.needsRender(invoice,outputPath,inputs):
+        print( "Invoice unchanged since {}.pdf was made. It was not generated again.".format(invoice.getFilename()) )
+        return
+
+    timer = metrics.start(invoice) if metrics is not None else nullTimer
     try:
-        os.makedirs(os.path.join('TEMPfiles'))
-    except OSError:
-        logging.critical("The TEMPfiles directory already exists. This needs to be deleted before an invoice can be generated.")
-        raise OSError("[Errno 17] Directory exists: 'TEMPfiles'")
-
-    # Write TEMPinvoiceNumber.tex
-    latexFile = open(os.path.join('TEMPfiles',"TEMPinvoiceNumber.tex"),'w')
-    latexFile.write(invoice.getInvoiceCode(latex=True))
-    latexFile.close()
-    logging.debug("TEMPinvoiceNumber written")
-
-    # Write TEMPcustomerAddress.tex
-    latexFile = open(os.path.join('TEMPfiles',"TEMPcustomerAddress.tex"),'w')
-    latexFile.write(invoice.getCustomer().getName() + r"\\" + invoice.getCustomer().getAddress())
-    latexFile.close()
-    logging.debug("TEMPcustomerAddress written")
-
-    # Write TEMPinvoiceInfo.tex
-    latexFile = open(os.path.join('TEMPfiles',"TEMPinvoiceInfo.tex"),'w')
-    latexFile.write(invoiceInfo)
-    latexFile.close()
-    logging.debug("TEMPinvoiceInfo written")
-
-    # Write TEMPconfig.tex
-    logging.debug("Opening config")
-    configFile = open(pathToConfig,'r')
-    configData = json.load(configFile)
-    userInfo = (configData['userName'],configData['userAddress'],configData['userPhoneNumber'],configData['userEmail'],configData['accountNumber'],configData['sortCodeFormatted'])
-    configInfo = r"\newcommand\myName{{{userName}}}\newcommand\myAddress{{{userAddress}}}\newcommand\myPhoneNumber{{{userPhoneNumber}}}\newcommand\myEmail{{{userEmail}}}\newcommand\accountNumber{{{accountNumber}}}\newcommand\sortCode{{{sortCodeFormatted}}}".format(**configData)
-    logging.debug("configInfo collected")
-    configFile.close()
-    logging.debug("config file closed")
-
-    latexFile = open(os.path.join('TEMPfiles',"TEMPconfig.tex"),'w')
-    latexFile.write(configInfo)
-    latexFile.close()
-    logging.debug("TEMPconfig written")
-
-    ## Create PDF
-    # Create temporary LaTeX file for invoice
-    shutil.copyfile('invoiceTemplate.tex',os.path.join('TEMPfiles',"TEMPinvoice.tex"))
-    logging.debug("TEMPinvoice created")
-
-    # Run pdflatex on temporary LaTeX file
-    os.chdir("./TEMPfiles")
-    logging.debug("cd to ./TEMPfiles")
-    logging.debug("Running LaTeX...")
-    runLaTeX = subprocess.Popen(['pdflatex','TEMPinvoice'],stdout=subprocess.PIPE)
-    runLaTeX.wait()
-    logging.debug("LaTeX ran.")
-    os.chdir("../")
-
-    ## Clean up files
-    # Set filename as invoice_<customer>_<number> and copy to Dropbox
-    logging.debug("Cleaning up")
-    shutil.copyfile('TEMPfiles/TEMPinvoice.pdf',os.path.join(pathToSave,invoice.getFilename()+'.pdf'))
-    logging.debug('PDF moved to '+os.path.join(pathToSave,invoice.getFilename()+'.pdf'))
-
-    # Delete temporary files
-    shutil.rmtree('TEMPfiles')
-
-    print( "Invoice generated successfully! ({}.pdf for £{})".format(invoice.getFilename(), twoDP(invoice.getTotal())) )
+        logging.debug("Opening config")
+        with timer.stage('config'):
+            configData = fragmentCache.loadConfig(pathToConfig) # only parsed again if the file has changed
+
+        useFormat = latexFormat
+        if useFormat is not None:
+            try:
+                with timer.stage('format'):
+                    useFormat.ensure() # build the precompiled preamble if it is missing or out of date
+            except (OSError, ValueError, RuntimeError) as error:
+                logging.warning("Could not build the precompiled preamble ({}). Compiling the full template instead.".format(error))
+                useFormat = None
+
+        renderInvoice(invoice,configData,outputPath=outputPath,latexFormat=useFormat,timer=timer)
+    except Exception as error:
+        timer.finish(error)
+        raise
+    timer.finish()
+    if drafts is not None:
+        drafts.markRendered(invoice,outputPath,inputs)
+
+    print( "Invoice generated successfully! ({}.pdf for £{})".format(invoice.getFilename(), formatPence(invoice.getTotalPence())) )
 
 
 ##### MENUS #####
+# Each menu handles one choice and returns the name of the next menu to show,
+# and runMenus loops over them. No menu calls another, so the call stack stays
+# the same depth however long the session is.
+
+def runMenus():
+    '''
+    Shows the menus until the user exits (or the command stream runs out), then closes the customer data.
+    Each account is saved when it changes, so nothing is written on exit.
+    '''
+
+    state, invoice = 'main', None
+    while state != 'exit':
+        try:
+            if state == 'main':
+                state, invoice = mainMenu()
+            elif state == 'invoice':
+                state = newInvoiceMenu(invoice)
+                if state == 'main': # the invoice is finished or discarded
+                    customerStore.saveAccount(invoice.getCustomer()) # save the invoice number
+                    invoice = None
+        except EOFError: # end of the script or input: save and exit
+            print()
+            if invoice is not None:
+                customerStore.saveAccount(invoice.getCustomer())
+                print( "Invoice saved as a draft." ) # every change is already in the journal
+            state = 'exit'
+
+    print( "\nSaving data..." )
+
+    customerStore.close()
+    if metrics is not None:
+        metrics.close()
+
+    print( "Data saved!" )
+    print( "Goodbye!\n" )
 
 def mainMenu():
-    ## Main menu
+    '''
+    Main menu. Returns the next menu ('main', 'invoice' or 'exit') and the new invoice, if there is one (tuple)
+    '''
+
+    printUnderline("Main Menu",char="=",width=15)
+    print("""1: New invoice
+    \r2: New customer
+    \r3: Edit existing invoice
+    \r4: Run config util
+    \r5: Regenerate changed invoices
+    \r6: Invoices for every customer in a CSV file
+    \rexit: Save and exit""")
 
     while True:
-        printUnderline("Main Menu",char="=",width=15)
-        print("""1: New invoice
-        \r2: New customer
-        \r3: Edit existing invoice
-        \r4: Run config util
-        \rexit: Save and exit""")
+        menuChoice = readInput(">> ")
+        if menuChoice == '1': ## New invoice
+
+            if customerAccounts == {}:
+                print( "There are no customers registered. Please register a customer before trying to generate an invoice")
+                return 'main', None
 
-        while True:
-            menuChoice = input(">> ")
-            if menuChoice == '1': ## New invoice
+            invoice = Invoice(customerAccounts,customerIndex=customerIndex)
+            drafts.track(invoice)
+            return 'invoice', invoice
 
-                if customerAccounts == {}:
-                    print( "There are no customers registered. Please register a customer before trying to generate an invoice")
-                    break
+        elif menuChoice == '2': ## New customer
+            printUnderline( "\nNew customer" )
+            try:
+                # Ask for customer name
+                inputName = tryInput("What is the new customer's name? ")
 
-                newInvoice = Invoice(customerAccounts)
-                newInvoiceMenu(newInvoice)
+                # Ask for customer address
+                inputAddress = addressInput()
 
-                mainMenu()
+                # Ask for account code
+                inputAccountCode = tryInput("Please enter an account code for this customer: ")
 
-            elif menuChoice == '2': ## New customer
-                printUnderline( "\nNew customer" )
-                try:
-                    # Ask for customer name
-                    inputName = tryInput("What is the new customer's name? ")
+                # Create new customer account
+                customerAccounts[inputAccountCode.lower()] = CustomerAccount(inputAccountCode,inputName,inputAddress,0)
+                customerStore.saveAccount(customerAccounts[inputAccountCode.lower()])
+                customerAccounts[inputAccountCode.lower()].setAllocator(allocator)
+                customerIndex.add(customerAccounts[inputAccountCode.lower()])
+                print( "Successfully created new customer account: {}".format(inputAccountCode) )
+            except NoInputError:
+                pass
 
-                    # Ask for customer address
-                    inputAddress = addressInput()
+            return 'main', None
 
-                    # Ask for account code
-                    inputAccountCode = tryInput("Please enter an account code for this customer: ")
+        elif menuChoice == '3': ## Edit existing invoice
 
-                    # Create new customer account
-                    customerAccounts[inputAccountCode] = CustomerAccount(inputAccountCode,inputName,inputAddress,0)
-                    print( "Successfully created new customer account: {}".format(inputAccountCode) )
-                except NoInputError:
-                    break
+            invoice = openDraft()
+            if invoice is None:
+                return 'main', None
 
-                mainMenu()
+            return 'invoice', invoice
 
-            elif menuChoice == '3': ## Edit existing invoice
+        elif menuChoice == '4': ## Run config util
 
-                inDevelopment('Edit existing invoice',error=True)
+            configUtil()
 
-                mainMenu()
+            return 'main', None
 
-            elif menuChoice == '4': ## Run config util
+        elif menuChoice == '5': ## Regenerate changed invoices
 
-                configUtil()
+            regenerateInvoices()
 
-                mainMenu()
+            return 'main', None
 
-            elif menuChoice == '0' or menuChoice.lower() == 'exit': ## Save and exit
-                print( "\nSaving data..." )
+        elif menuChoice == '6': ## Invoices for every customer in a CSV file
 
-                # Create dictionary for JSON file
-                dataToSave = {}
-                for account in customerAccounts:
-                    dataToSave[customerAccounts[account].getAccountName()] = customerAccounts[account].JSONdump()
+            invoicesFromBilling()
 
-                # Save data to JSON file
-                jsonFile = open(pathToCustomers, 'w+')
-                jsonFile.write(json.dumps(dataToSave, indent=2, sort_keys=True))
-                jsonFile.close()
+            return 'main', None
 
-                print( "Data saved!" )
-                print( "Goodbye!\n" )
-                exit() # exit program
+        elif menuChoice == '0' or menuChoice.lower() == 'exit': ## Save and exit
+            return 'exit', None
 
-            else:
-                    print( "That is not a valid choice. Please try again:" )
+        else:
+                print( "That is not a valid choice. Please try again:" )
 
 
 def newInvoiceMenu(invoice):
     '''
-    Menu for processing a new invoice.
+    Menu for processing a new invoice. Returns the next menu: 'invoice' to come back to this menu, or 'main' (string)
 
     invoice: Invoice object
     '''
@@ -223,11 +238,13 @@ def newInvoiceMenu(invoice):
     \r3: Add shipping costs
     \r4: Add a discount
     \r5: Generate the invoice
+    \r6: Remove an entry
+    \r7: Add usage from a CSV file (grouped by ID and rate)
+    \rexit: Save and return to main menu
     \rdel: Return to main menu (without creating an invoice)""")
-#    \rexit: Save and return to main menu""") # save and return not in this version
 
     while True:
-        menuChoice = input(">> ")
+        menuChoice = readInput(">> ")
 
         if menuChoice == '1': # new entry
 
@@ -236,23 +253,21 @@ def newInvoiceMenu(invoice):
                 invoice.addEntry(newEntry)
             except NoInputError:
                 print( "No input given. Please try again." )
+            except ValueError as error:
+                print( "The entry was not added: {}. Please try again.".format(error) )
 
-            break # return to invoice menu
+            return 'invoice'
 
         elif menuChoice == '2': # add entries from csv
 
             print( "Importing data from csv file..." )
 
-            with open(pathToCSV) as csvFile:
-                entryData = csv.reader(csvFile)
-                next(entryData, None) #skip header
-                for row in entryData:
-                    newEntry = InvoiceEntry(id=row[0],description=row[1],rate=float(row[2]),qty=float(row[3]))
-                    invoice.addEntry(newEntry)
+            importReport = importEntries(pathToCSV,invoice)
 
-            print( "Entries successfully added!" )
+            print( importReport.summary() )
+            print( "Entries successfully added! (sub total: £{})".format(formatPence(invoice.getSubTotalPence())) )
 
-            break # return to invoice menu
+            return 'invoice'
 
         elif menuChoice == '3': # add shipping
 
@@ -261,8 +276,10 @@ def newInvoiceMenu(invoice):
               invoice.addShipping(newShipping)
           except NoInputError:
               print( "No input given. Please try again." )
+          except ValueError as error:
+              print( "The shipping was not added: {}. Please try again.".format(error) )
 
-          break # return to invoice menu
+          return 'invoice'
 
         elif menuChoice == '4': # add discount
 
@@ -271,32 +288,146 @@ def newInvoiceMenu(invoice):
               invoice.addDiscount(newDiscount)
           except NoInputError:
               print( "No input given. Please try again." )
+          except ValueError as error:
+              print( "The discount was not added: {}. Please try again.".format(error) )
 
-          break # return to invoice menu
+          return 'invoice'
 
         elif menuChoice == '5': # generate invoice
             try:
                 generateInvoice(invoice)
             except NoInputError:
                 logging.error("There are no entries in this invoice. The invoice was not generated.")
-                break # return to invoice menu
+                return 'invoice'
+            except LaTeXError as error:
+                logging.error("The invoice was not generated. " + error.summary())
+                return 'invoice'
+
+            return 'main'
+
+        elif menuChoice == '6': # remove an entry
+
+            removeEntry(invoice)
 
-            return # to main menu
+            return 'invoice'
+
+        elif menuChoice == '7': # add grouped usage from csv
+
+            print( "Grouping usage data from csv file..." )
+
+            importReport = importUsage(pathToUsageCSV,invoice,usageSort,usageTopN)
+
+            print( importReport.summary() )
+            print( "Entries successfully added! (sub total: £{})".format(formatPence(invoice.getSubTotalPence())) )
+
+            return 'invoice'
 
         elif menuChoice == '0' or menuChoice.lower() == 'exit': # save and return to main menu
-            inDevelopment('Save and return',error=True)
-            print( "Invoice discarded." )
-            return # to main menu
+            print( "Invoice saved as a draft. Choose 'Edit existing invoice' to reopen it." ) # every change is already in the journal
+            return 'main'
 
         elif menuChoice.lower() == 'del': # return to main menu
-            invoice.getCustomer().resetNumber()
+            if not drafts.isRendered(invoice): # an invoice that was issued keeps its number
+                invoice.getCustomer().resetNumber(invoice.getNumber()) # a reopened draft may not hold the customer's latest number
+            drafts.discard(invoice)
             print( "Invoice discarded." )
-            return # to main menu
+            return 'main'
 
         else:
             print( "That is not a valid choice. Please try again:" )
 
-    return newInvoiceMenu(invoice)
+def openDraft():
+    '''
+    Lists the saved invoices and asks which one to reopen. Returns the invoice (Invoice object), or None if none was chosen.
+    '''
+
+    printUnderline("\nSaved invoices")
+    savedDrafts = drafts.getDrafts()
+    if savedDrafts == []:
+        print( "There are no saved invoices." )
+        return None
+    for draft in savedDrafts:
+        print( "{:<20} {:>5} entries  {}".format(draft['code'], len(draft['ids']), 'generated' if draft['renderedHash'] else 'draft') )
+
+    codes = {draft['code'].lower(): draft['code'] for draft in savedDrafts}
+    while True:
+        try:
+            code = tryInput("Invoice to edit (e.g. {}): ".format(savedDrafts[-1]['code']))
+        except NoInputError:
+            return None
+        if code.lower() in codes:
+            break
+        print( "There is no saved invoice '{}'. Please try again:".format(code) )
+
+    try:
+        return drafts.restore(codes[code.lower()],customerAccounts)
+    except KeyError as error:
+        logging.error("The invoice could not be opened: {}".format(error))
+        return None
+
+def regenerateInvoices():
+    '''
+    Generates the PDF of every saved invoice that has changed since its last PDF, or whose config or template has.
+    '''
+
+    regenerated = 0
+    inputs = renderInputs()
+    for draft in drafts.getDrafts():
+        if draft['renderedHash'] is None or draft['account'].lower() not in customerAccounts: # never generated: still a draft
+            continue
+        invoice = drafts.restore(draft['code'],customerAccounts)
+        if drafts.needsRender(invoice,os.path.join(pathToSave,invoice.getFilename()+'.pdf'),inputs):
+            try:
+                generateInvoice(invoice)
+            except NoInputError:
+                logging.error("There are no entries in {}. The invoice was not generated.".format(draft['code']))
+                continue
+            except LaTeXError as error:
+                logging.error("{} was not generated. {}".format(draft['code'], error.summary()))
+                continue
+            regenerated += 1
+    print( "{} invoice(s) regenerated.".format(regenerated) )
+
+def invoicesFromBilling():
+    '''
+    Makes and generates one invoice per customer from the rows in pathToBillingCSV, reading the file once.
+    '''
+
+    print( "Importing billing data from csv file..." )
+
+    invoices, importReport = importByCustomer(pathToBillingCSV,customerAccounts,rejectPath=pathToRejects)
+
+    print( importReport.summary() )
+    if importReport.rowsRejected or importReport.errorCount:
+        print( "The rejected rows were written to {}".format(pathToRejects) )
+
+    for invoice in invoices:
+        drafts.track(invoice)
+        customerStore.saveAccount(invoice.getCustomer()) # save the invoice number
+        try:
+            generateInvoice(invoice)
+        except NoInputError:
+            logging.error("There are no entries in {}. The invoice was saved as a draft.".format(invoice.getInvoiceCode(latex=False)))
+        except LaTeXError as error:
+            logging.error("{} was not generated and was saved as a draft. {}".format(invoice.getInvoiceCode(latex=False), error.summary()))
+
+def removeEntry(invoice):
+    '''
+    Lists the entries on an invoice and asks which one to remove.
+    '''
+
+    for index, entry in enumerate(invoice.getEntries()):
+        print( "{:>4}: {} {} (£{})".format(index+1, entry.getID(), entry.getDescription(), formatPence(entry.getAmountPence())) )
+    try:
+        index = int(numInput("Entry to remove: ")) - 1
+    except NoInputError:
+        print( "No input given." )
+        return
+    if not 0 <= index < len(invoice.getEntries()):
+        print( "There is no entry {}.".format(index+1) )
+        return
+    invoice.removeEntry(index)
+    print( "Entry removed. (sub total: £{})".format(formatPence(invoice.getSubTotalPence())) )
 
 def configUtil():
     '''
@@ -346,12 +477,18 @@ def configUtil():
 
 if __name__ == "__main__":
 
-    os.chdir(os.path.dirname(__file__)) # cd to the location of this python file (and associated data files)
-    os.system('clear')
+    parser = argparse.ArgumentParser(description="Generate invoices interactively.")
+    parser.add_argument('--script', metavar='FILE', help="read the answers to the prompts from FILE, one per line, instead of the keyboard")
+    args = parser.parse_args()
 
-    print(titleSplash)
+    if args.script:
+        scriptFile = open(args.script,'r')
+        setCommandStream(CommandStream(scriptFile))
+    else:
+        os.system('clear')
+    os.chdir(os.path.dirname(os.path.abspath(__file__))) # cd to the location of this python file (and associated data files)
 
-    assert(not os.path.exists('TEMPfiles/')) # make sure there are no left over TEMPfiles
+    print(titleSplash)
 
     ## Congifuration
     if not os.path.exists(pathToConfig):
@@ -366,19 +503,24 @@ if __name__ == "__main__":
 
     ## Import customer data
     print( "\nLoading cutomer data..." )
-    customerAccounts = {} # dictionary of customer accounts
-
-    if not os.path.exists(pathToCustomers): # if no customer data, create a file
+    newStore = not os.path.exists(pathToCustomers)
+    customerStore = openCustomerStore(pathToCustomers)
+    if newStore and pathToCustomersJSON != pathToCustomers and os.path.exists(pathToCustomersJSON): # move data from older versions
+        print( "Moving customer data from {} to {}...".format(pathToCustomersJSON, pathToCustomers) )
+        customerStore.migrateFromJSON(pathToCustomersJSON)
+
+    customerAccounts = customerStore.load() # dictionary of customer accounts. NB: keys are lowercase!
+    allocator = InvoiceNumberAllocator(customerStore) # take invoice numbers from the store, so other processes cannot reuse them
+    allocator.attach(customerAccounts)
+    customerIndex = CustomerIndex(customerAccounts) # for searching by account code or name
+
+    if pathToMetrics:
+        metrics = Metrics([JSONLinesSink(pathToMetrics)])
+    drafts = DraftJournal(pathToDrafts) # saved invoices, for reopening and editing
+
+    if customerAccounts == {}:
         print( "There is no customer data. A new file will be created." )
-        newFile = open(pathToCustomers,'w')
-        newFile.close()
     else:
-        jsonFile = open(pathToCustomers,'r')
-        customerData = json.load(jsonFile)
-        jsonFile.close()
-        for account in customerData: # build dictionary of CustomerAccount objects. NB: keys are lowercase!
-            customerAccounts[customerData[account]['accountName'].lower()] = CustomerAccount(customerData[account]['accountName'],customerData[account]['name'],customerData[account]['address'],customerData[account]['number'])
-
         print( "Customer data loaded successfully!" )
 
-    mainMenu()
+    runMenus()
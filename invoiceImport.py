@@ -0,0 +1,493 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+CSV import for Invoice Generator
+(invoiceImport.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Streams invoice entries from a CSV file (columns: ID, description, rate,
+quantity, with a header row). The file is read lazily in chunks, so memory use
+does not depend on the size of the file. Bad rows are recorded in an
+ImportReport instead of stopping the import.
+
+For raw usage files, where many rows share the same ID, description and rate,
+importUsage groups the rows on those three columns and sums the quantities,
+so the invoice gets one line per group. The groups can be sorted, and all but
+the largest N collapsed into a single "other" line. Large files can be split
+into byte ranges and grouped on several processes, and the partial results
+merged; if a quoted value turns out to hold a line break, so the file cannot
+be split at line breaks, it is grouped on one process instead.
+
+importByCustomer reads a file that covers many customers (with the account
+code in the first column) and splits the rows between one invoice per
+customer in a single pass. Rows for unknown account codes are written to a
+reject file.
+
+Usage: python3 invoiceImport.py usage.csv --top 20 --sort amount --workers 4   (print the grouped lines)
+'''
+
+# Import modules
+import csv
+import os
+import math
+import locale
+import itertools
+import collections
+import argparse
+import concurrent.futures
+from invoiceObjects import *
+
+
+class ImportReport(object):
+    '''
+    Summary of a CSV import: row counts and row-level errors.
+    '''
+
+    def __init__(self,maxErrors=100):
+        '''
+        maxErrors: the number of errors to keep details of; later errors are only counted (int)
+        '''
+
+        self.rowsRead = 0
+        self.rowsImported = 0
+        self.errorCount = 0
+        self.errors = [] # list of (row number, error message) tuples
+        self.maxErrors = maxErrors
+        self.linesAdded = None # number of invoice lines the rows were grouped into, for importUsage
+        self.rowsRejected = 0 # rows for unknown accounts, for importByCustomer
+        self.unknownAccounts = collections.Counter() # account code -> number of rows rejected
+
+    def addError(self,rowNumber,message):
+        '''
+        Records a bad row.
+        '''
+
+        self.errorCount += 1
+        if len(self.errors) < self.maxErrors:
+            self.errors.append((rowNumber, message))
+
+    def summary(self):
+        '''
+        Returns a human-readable summary of the import (string)
+        '''
+
+        lines = ["Imported {} of {} rows.".format(self.rowsImported, self.rowsRead)]
+        if self.linesAdded is not None:
+            lines[0] = "Imported {} of {} rows as {} lines.".format(self.rowsImported, self.rowsRead, self.linesAdded)
+        if self.rowsRejected:
+            lines.append("{} rows for unknown accounts were rejected: {}".format(self.rowsRejected, ", ".join("'{}' ({})".format(account, count) for account, count in self.unknownAccounts.most_common(10))))
+        if self.errorCount:
+            lines.append("{} rows could not be imported:".format(self.errorCount))
+            for rowNumber, message in self.errors:
+                lines.append("  row {}: {}".format(rowNumber, message))
+            if self.errorCount > len(self.errors):
+                lines.append("  ... and {} more".format(self.errorCount - len(self.errors)))
+        return '\n'.join(lines)
+
+
+maxValue = 1e12 # largest rate, quantity or line amount accepted; anything bigger is taken to be a mistake in the file
+
+
+##### Define methods for reading CSV files #####
+def readChunks(path,chunkSize=5000,skipHeader=True):
+    '''
+    Reads a CSV file lazily. Yields lists of up to chunkSize (row number, row) tuples.
+    Row numbers count from 1 at the first line of the file.
+    '''
+
+    with open(path, newline='') as csvFile:
+        rows = csv.reader(csvFile)
+        if skipHeader:
+            next(rows, None)
+        numberedRows = zip(itertools.count(2 if skipHeader else 1), rows)
+        while True:
+            chunk = list(itertools.islice(numberedRows, chunkSize))
+            if not chunk:
+                return
+            yield chunk
+
+def _inRange(value):
+    '''
+    Returns True if value is a finite number no bigger than maxValue (bool)
+    '''
+
+    return math.isfinite(value) and abs(value) <= maxValue
+
+def _convertRow(row):
+    '''
+    Checks and converts one row. Returns (id, description, rate, qty); raises ValueError for a bad row.
+    '''
+
+    if len(row) < 4:
+        raise ValueError("expected 4 columns, found {}".format(len(row)))
+    if not row[0] or not row[1]:
+        raise ValueError("missing ID or description")
+    try:
+        rate = float(row[2])
+    except ValueError:
+        raise ValueError("rate '{}' is not a number".format(row[2]))
+    if not _inRange(rate):
+        raise ValueError("rate '{}' is {}".format(row[2], 'out of range' if math.isfinite(rate) else 'not a finite number'))
+    try:
+        qty = float(row[3])
+    except ValueError:
+        raise ValueError("quantity '{}' is not a number".format(row[3]))
+    if not _inRange(qty):
+        raise ValueError("quantity '{}' is {}".format(row[3], 'out of range' if math.isfinite(qty) else 'not a finite number'))
+    if abs(rate * qty) > maxValue: # well within the range of the money functions, so adding the entries cannot fail
+        raise ValueError("amount {} x {} is out of range".format(row[2], row[3]))
+    return row[0], row[1], rate, qty
+
+def convertChunk(chunk,report,badRows=None):
+    '''
+    Checks and converts a chunk of rows from readChunks.
+    Returns the good rows as columns: ids, descriptions, rates and qtys (tuple of lists).
+    Bad rows are recorded in report, and their row numbers appended to badRows if it is given (list of int).
+
+    The whole chunk is converted in one go; only if that fails is it converted
+    row by row to find the bad rows.
+    '''
+
+    try:
+        if any(len(row) < 4 or not row[0] or not row[1] for rowNumber, row in chunk):
+            raise ValueError
+        ids = [row[0] for rowNumber, row in chunk]
+        descriptions = [row[1] for rowNumber, row in chunk]
+        rates = list(map(float, [row[2] for rowNumber, row in chunk]))
+        qtys = list(map(float, [row[3] for rowNumber, row in chunk]))
+        if not all(map(_inRange, rates)) or not all(map(_inRange, qtys)) or not all(abs(rate * qty) <= maxValue for rate, qty in zip(rates, qtys)):
+            raise ValueError
+        return ids, descriptions, rates, qtys
+    except ValueError:
+        pass
+
+    ids, descriptions, rates, qtys = [], [], [], []
+    for rowNumber, row in chunk:
+        try:
+            id, description, rate, qty = _convertRow(row)
+        except ValueError as error:
+            report.addError(rowNumber, str(error))
+            if badRows is not None:
+                badRows.append(rowNumber)
+            continue
+        ids.append(id)
+        descriptions.append(description)
+        rates.append(rate)
+        qtys.append(qty)
+    return ids, descriptions, rates, qtys
+
+
+##### Define method for importing entries #####
+def importEntries(path,invoice,chunkSize=5000,maxErrors=100):
+    '''
+    Adds the entries in a CSV file to an invoice, without printing each entry.
+
+    path: path to the CSV file (string)
+    invoice: the invoice to add the entries to (Invoice object)
+    chunkSize: the number of rows to read and convert at a time (int)
+    maxErrors: the number of bad rows to keep details of (int)
+
+    Returns an ImportReport.
+    '''
+
+    report = ImportReport(maxErrors)
+    for chunk in readChunks(path,chunkSize):
+        report.rowsRead += len(chunk)
+        ids, descriptions, rates, qtys = convertChunk(chunk,report)
+        invoice.addEntries(ids, descriptions, rates, qtys)
+        report.rowsImported += len(ids)
+    return report
+
+
+##### Define methods for grouping usage rows #####
+class UsageAggregate(object):
+    '''
+    Usage rows grouped by (ID, description, rate), with the quantities of each group summed.
+    Groups keep the order in which they were first seen.
+    '''
+
+    def __init__(self):
+        '''
+        Initialization function, creates an empty aggregate.
+        '''
+
+        self.groups = {} # (id, description, rate) -> total quantity
+
+    def __len__(self):
+        return len(self.groups)
+
+    def add(self,ids,descriptions,rates,qtys):
+        '''
+        Adds rows, given as columns (sequences of equal length).
+        '''
+
+        groups = self.groups
+        for key, qty in zip(zip(ids, descriptions, rates), qtys):
+            groups[key] = groups.get(key, 0.) + qty
+
+    def merge(self,other):
+        '''
+        Adds the groups of another aggregate (UsageAggregate object, or its groups dict) to this one.
+        '''
+
+        groups = self.groups
+        for key, qty in getattr(other, 'groups', other).items():
+            groups[key] = groups.get(key, 0.) + qty
+
+    def columns(self,sortBy=None,topN=None,otherID='OTHER',otherDescription='Other usage'):
+        '''
+        Returns one line per group as columns: ids, descriptions, rates and qtys (tuple of lists).
+        Each line's amount is its rate times its total quantity, rounded to the penny once.
+
+        sortBy: None to keep the order the groups were first seen, 'id', or 'amount' or 'qty' (largest first) (string)
+        topN: if given, only the N lines with the largest amounts are kept, and the rest are added
+            together into one last line, otherID/otherDescription, with a quantity of 1 (int)
+        '''
+
+        lines = [(id, description, rate, round(qty, 9)) for (id, description, rate), qty in self.groups.items()] # rounding hides differences in the order the quantities were added
+
+        other = []
+        if topN is not None and len(lines) > topN:
+            lines.sort(key=lambda line: linePence(line[2], line[3]), reverse=True)
+            lines, other = lines[:topN], lines[topN:]
+
+        if sortBy == 'id':
+            lines.sort(key=lambda line: (line[0], line[1], line[2]))
+        elif sortBy == 'amount':
+            lines.sort(key=lambda line: linePence(line[2], line[3]), reverse=True)
+        elif sortBy == 'qty':
+            lines.sort(key=lambda line: line[3], reverse=True)
+        elif sortBy is not None:
+            raise ValueError("Unknown sort order '{}' (expected 'id', 'amount' or 'qty')".format(sortBy))
+
+        if other:
+            otherPence = sum(linePence(rate, qty) for id, description, rate, qty in other)
+            lines.append((otherID, "{} ({} lines)".format(otherDescription, len(other)), otherPence / 100, 1.))
+
+        ids, descriptions, rates, qtys = (list(column) for column in zip(*lines)) if lines else ([], [], [], [])
+        return ids, descriptions, rates, qtys
+
+def fileRanges(path,parts):
+    '''
+    Splits a file into up to `parts` byte ranges that start and end at line breaks.
+    Returns (start, end) tuples (list). A range can start inside a quoted value that holds a line break;
+    aggregateRange notices this.
+    '''
+
+    size = os.path.getsize(path)
+    starts = [0]
+    with open(path,'rb') as csvFile:
+        for part in range(1, parts):
+            csvFile.seek(max(size * part // parts, starts[-1]))
+            csvFile.readline() # move on to the start of the next line
+            if csvFile.tell() >= size:
+                break
+            if csvFile.tell() > starts[-1]:
+                starts.append(csvFile.tell())
+    return list(zip(starts, starts[1:] + [size]))
+
+def _rangeLines(csvFile,start,end):
+    '''
+    Yields the lines of a binary file from start (where the file is positioned) up to end, decoded as open() would.
+    '''
+
+    encoding = locale.getpreferredencoding(False)
+    position = start
+    for line in csvFile:
+        if position >= end:
+            return
+        position += len(line)
+        yield line.decode(encoding)
+
+def aggregateRange(path,start,end,chunkSize=5000,maxErrors=100):
+    '''
+    Groups the usage rows between byte offsets start and end of a CSV file (the header row is skipped if start is 0).
+    Returns the groups (dict), the ImportReport and the number of lines in the range (tuple).
+    Row numbers in the report count from 1 at the first line of the range.
+
+    If a row in the range holds a line break, the file cannot be split at line breaks (the range may have
+    started or ended inside a quoted value), and the number of lines is None.
+    '''
+
+    aggregate = UsageAggregate()
+    report = ImportReport(maxErrors)
+    with open(path,'rb') as csvFile:
+        csvFile.seek(start)
+        rows = csv.reader(_rangeLines(csvFile,start,end))
+        firstRow = 1
+        if start == 0:
+            next(rows, None)
+            firstRow = 2
+        numberedRows = zip(itertools.count(firstRow), rows)
+        lastRow = []
+        while True:
+            chunk = list(itertools.islice(numberedRows, chunkSize))
+            if not chunk:
+                break
+            report.rowsRead += len(chunk)
+            ids, descriptions, rates, qtys = convertChunk(chunk,report)
+            aggregate.add(ids, descriptions, rates, qtys)
+            report.rowsImported += len(ids)
+            lastRow = chunk[-1][1]
+    # A row that took more than one line shows up in the line count. A quoted value still open at the end
+    # of the range took only the last line, but keeps the line break
+    if rows.line_num != report.rowsRead + firstRow - 1 or any('\n' in value for value in lastRow):
+        return aggregate.groups, report, None
+    return aggregate.groups, report, rows.line_num
+
+def aggregateUsage(path,workers=1,chunkSize=5000,maxErrors=100):
+    '''
+    Groups the usage rows in a CSV file (columns: ID, description, rate, quantity, with a header row).
+
+    workers: the number of processes to group the file on (int). With more than one, the file is
+        split into byte ranges, each range is grouped separately and the results are merged.
+        If a quoted value holds a line break, the file is grouped again on one process.
+    chunkSize, maxErrors: as for importEntries
+
+    Returns the groups (UsageAggregate object) and an ImportReport (tuple).
+    '''
+
+    aggregate = UsageAggregate()
+    report = ImportReport(maxErrors)
+    if workers > 1:
+        ranges = fileRanges(path,workers)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(aggregateRange, [path]*len(ranges), [start for start, end in ranges], [end for start, end in ranges], [chunkSize]*len(ranges), [maxErrors]*len(ranges)))
+        if any(lineCount is None for groups, rangeReport, lineCount in results):
+            workers = 1 # quoted line breaks: the ranges may not have been split between rows
+    if workers <= 1:
+        for chunk in readChunks(path,chunkSize):
+            report.rowsRead += len(chunk)
+            ids, descriptions, rates, qtys = convertChunk(chunk,report)
+            aggregate.add(ids, descriptions, rates, qtys)
+            report.rowsImported += len(ids)
+        return aggregate, report
+
+    lineOffset = 0
+    for groups, rangeReport, lineCount in results: # in file order, so the groups keep the order they were first seen
+        aggregate.merge(groups)
+        report.rowsRead += rangeReport.rowsRead
+        report.rowsImported += rangeReport.rowsImported
+        for rowNumber, message in rangeReport.errors:
+            report.addError(rowNumber + lineOffset, message)
+        report.errorCount += rangeReport.errorCount - len(rangeReport.errors) # errors counted but not kept
+        lineOffset += lineCount
+    return aggregate, report
+
+def importUsage(path,invoice,sortBy=None,topN=None,workers=1,chunkSize=5000,maxErrors=100):
+    '''
+    Groups the usage rows in a CSV file by (ID, description, rate) and adds one entry per group to an invoice.
+
+    path: path to the CSV file (string)
+    invoice: the invoice to add the entries to (Invoice object)
+    sortBy, topN: the order of the lines, and how many to keep before collapsing the rest into one (see UsageAggregate.columns)
+    workers: the number of processes to group the file on (int)
+    chunkSize, maxErrors: as for importEntries
+
+    Returns an ImportReport.
+    '''
+
+    aggregate, report = aggregateUsage(path,workers,chunkSize,maxErrors)
+    ids, descriptions, rates, qtys = aggregate.columns(sortBy,topN)
+    invoice.addEntries(ids, descriptions, rates, qtys)
+    report.linesAdded = len(ids)
+    return report
+
+
+##### Define method for splitting a CSV file between customers #####
+def importByCustomer(path,customerAccounts,rejectPath=None,group=False,sortBy=None,topN=None,chunkSize=5000,maxErrors=100):
+    '''
+    Reads a CSV file with rows for many customers (columns: account code, ID, description, rate, quantity,
+    with a header row) and adds each row to an invoice for its customer, in one pass over the file.
+
+    path: path to the CSV file (string)
+    customerAccounts: dictionary of CustomerAccount objects. Each customer's invoice is numbered through
+        its nextInvoiceCode (so through its allocator, if it has one) when the customer's first good row is read,
+        so a customer whose rows are all bad gets no invoice and uses up no number.
+    rejectPath: if given, rows for unknown account codes and rows that cannot be imported are written to this CSV file,
+        with the header row (string)
+    group: if True, each customer's rows are grouped by ID, description and rate, as importUsage does (bool)
+    sortBy, topN: the order of the grouped lines, and how many to keep (see UsageAggregate.columns)
+    chunkSize, maxErrors: as for importEntries
+
+    Returns the invoices, in the order their customers' first good rows appear in the file (list of Invoice objects), and an ImportReport (tuple).
+    '''
+
+    report = ImportReport(maxErrors)
+    invoices = {} # account key -> Invoice
+    aggregates = {} # account key -> UsageAggregate, if grouping
+    rejectFile = rejectWriter = None
+    def reject(rows):
+        nonlocal rejectFile, rejectWriter
+        if rejectPath is None or not rows:
+            return
+        if rejectWriter is None:
+            with open(path, newline='') as csvFile:
+                header = next(csv.reader(csvFile), [])
+            rejectFile = open(rejectPath, 'w', newline='')
+            rejectWriter = csv.writer(rejectFile)
+            rejectWriter.writerow(header)
+        rejectWriter.writerows(row for rowNumber, row in rows)
+
+    try:
+        for chunk in readChunks(path,chunkSize):
+            report.rowsRead += len(chunk)
+
+            partitions = {} # account key -> rows of this chunk
+            for rowNumber, row in chunk:
+                partitions.setdefault(row[0].strip().lower() if row else '', []).append((rowNumber, row))
+
+            for key, rows in partitions.items():
+                if key not in customerAccounts:
+                    report.rowsRejected += len(rows)
+                    report.unknownAccounts[rows[0][1][0] if rows[0][1] else ''] += len(rows)
+                    reject(rows)
+                    continue
+
+                badRows = []
+                ids, descriptions, rates, qtys = convertChunk([(rowNumber, row[1:]) for rowNumber, row in rows],report,badRows)
+                if badRows:
+                    badRows = set(badRows)
+                    reject([(rowNumber, row) for rowNumber, row in rows if rowNumber in badRows])
+                if not ids:
+                    continue
+                if key not in invoices: # numbered only once the customer has a row that can be imported
+                    invoices[key] = Invoice(customerAccounts,key,quiet=True)
+                    aggregates[key] = UsageAggregate()
+                if group:
+                    aggregates[key].add(ids, descriptions, rates, qtys)
+                else:
+                    invoices[key].addEntries(ids, descriptions, rates, qtys)
+                report.rowsImported += len(ids)
+    finally:
+        if rejectFile is not None:
+            rejectFile.close()
+
+    if group:
+        report.linesAdded = 0
+        for key, invoice in invoices.items():
+            ids, descriptions, rates, qtys = aggregates[key].columns(sortBy,topN)
+            invoice.addEntries(ids, descriptions, rates, qtys)
+            report.linesAdded += len(ids)
+    return list(invoices.values()), report
+
+
+##### Main Thread #####
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Group the rows of a usage CSV file into invoice lines.")
+    parser.add_argument('csv', help="CSV file with columns ID, description, rate, quantity and a header row")
+    parser.add_argument('--sort', choices=['id', 'amount', 'qty'], help="order of the lines (default: the order they first appear)")
+    parser.add_argument('--top', type=int, metavar='N', help="keep the N lines with the largest amounts and add up the rest as one line")
+    parser.add_argument('-w', '--workers', type=int, default=1, help="number of processes to group the file on (default: 1)")
+    args = parser.parse_args()
+
+    aggregate, report = aggregateUsage(args.csv,args.workers)
+    ids, descriptions, rates, qtys = aggregate.columns(args.sort,args.top)
+    for row in zip(ids, descriptions, rates, qtys):
+        print( "{:<12} {:<40} {:>10.2f} x {:<12g} = £{}".format(*row, formatPence(linePence(row[2], row[3]))) )
+    report.linesAdded = len(ids)
+    print( report.summary() )
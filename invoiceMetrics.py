@@ -0,0 +1,313 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Render metrics for Invoice Generator
+(invoiceMetrics.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Times each stage of a render (loading the config, building and writing the
+TeX fragments, the render cache, the LaTeX run and delivering the PDF) and
+passes one record per invoice to a set of sinks:
+
+JSONLinesSink  - appends each record to a file as a line of JSON.
+PrometheusSink - keeps histograms of the stage times and writes them in the
+                 Prometheus text format, for the node_exporter textfile collector.
+
+Each record has the wall and CPU time of every stage, the bytes written, the
+number of entries and the number of pdflatex passes. CPU time is this thread's
+time, plus the time of child processes for the LaTeX stage.
+
+When metrics are off, renderInvoice is given the shared nullTimer, whose
+stages do nothing, so the cost is one method call per stage.
+
+    metrics = Metrics([JSONLinesSink('renders.jsonl'), PrometheusSink('invoices.prom')])
+    renderInvoice(invoice, configData, outputPath, timer=metrics.start(invoice))
+    metrics.close()
+'''
+
+# Import modules
+import os, tempfile
+import time
+import json
+import resource
+import bisect
+import collections
+import contextlib
+
+defaultBuckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10., 30.) # seconds
+
+
+class Histogram(object):
+    '''
+    Counts of observations in fixed buckets, as in a Prometheus histogram.
+    '''
+
+    def __init__(self,buckets=defaultBuckets):
+        '''
+        buckets: upper bounds of the buckets, in increasing order (tuple of float)
+        '''
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.
+        self.max = 0.
+
+    def observe(self,value):
+        '''
+        Adds an observation.
+        '''
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        '''
+        Returns the cumulative count at each bucket bound, as (bound, count) tuples, ending with ('+Inf', total) (list)
+        '''
+
+        running = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+
+class RenderTimer(object):
+    '''
+    Collects the stage times of one render. Made by Metrics.start.
+    '''
+
+    def __init__(self,metrics,invoiceName,entries):
+        '''
+        metrics: the Metrics object the finished record is passed to
+        invoiceName: the name of the invoice, e.g. its filename (string)
+        entries: the number of entries on the invoice (int)
+        '''
+
+        self.metrics = metrics
+        self.record = {'invoice': invoiceName, 'entries': entries, 'bytesWritten': 0, 'stages': {}}
+        self.start = time.perf_counter()
+        self.startCPU = time.thread_time()
+
+    @contextlib.contextmanager
+    def stage(self,name,children=False):
+        '''
+        Times the body of a with block as stage `name`.
+        If children is True, the CPU time of child processes (e.g. pdflatex) that finish in the block is included.
+        '''
+
+        wallStart = time.perf_counter()
+        cpuStart = time.thread_time()
+        if children:
+            childStart = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            yield
+        finally:
+            cpu = time.thread_time() - cpuStart
+            if children:
+                childEnd = resource.getrusage(resource.RUSAGE_CHILDREN)
+                cpu += (childEnd.ru_utime - childStart.ru_utime) + (childEnd.ru_stime - childStart.ru_stime)
+            stage = self.record['stages'].setdefault(name, {'wall': 0., 'cpu': 0.})
+            stage['wall'] += time.perf_counter() - wallStart
+            stage['cpu'] += cpu
+
+    def addBytes(self,count):
+        '''
+        Adds to the number of bytes written for this render.
+        '''
+
+        self.record['bytesWritten'] += count
+
+    def setPasses(self,passes):
+        '''
+        Records the number of pdflatex passes the render took.
+        '''
+
+        self.record['latexPasses'] = passes
+
+    def finish(self,error=None):
+        '''
+        Completes the record and passes it to the metrics. Returns the record (dict)
+        '''
+
+        self.record['wall'] = time.perf_counter() - self.start
+        self.record['cpu'] = time.thread_time() - self.startCPU + sum(stage['cpu'] for name, stage in self.record['stages'].items() if name == 'latex')
+        self.record['time'] = time.time()
+        self.record['error'] = None if error is None else repr(error)
+        if self.metrics is not None:
+            self.metrics.record(self.record)
+        return self.record
+
+
+class _NullTimer(object):
+    '''
+    A RenderTimer that records nothing, for when metrics are off.
+    '''
+
+    _nullStage = contextlib.nullcontext()
+
+    def stage(self,name,children=False):
+        return self._nullStage
+
+    def addBytes(self,count):
+        pass
+
+    def setPasses(self,passes):
+        pass
+
+    def finish(self,error=None):
+        return None
+
+nullTimer = _NullTimer()
+
+
+class Metrics(object):
+    '''
+    Receives the render records, keeps histograms of them across a run, and passes them to the sinks.
+    '''
+
+    def __init__(self,sinks=(),buckets=defaultBuckets):
+        '''
+        sinks: objects with record(record) and close() methods, e.g. JSONLinesSink (list)
+        buckets: upper bounds of the histogram buckets, in seconds (tuple of float)
+        '''
+
+        self.sinks = list(sinks)
+        self.buckets = buckets
+        self.histograms = {} # stage name (or 'total') -> Histogram of wall times
+        self.cpuTotals = {}
+        self.renders = 0
+        self.failures = 0
+        self.entries = 0
+        self.bytesWritten = 0
+        self.latexPasses = collections.Counter() # number of passes -> number of renders that took that many
+
+    def start(self,invoice):
+        '''
+        Returns a RenderTimer for rendering invoice (Invoice object)
+        '''
+
+        return RenderTimer(self,invoice.getFilename(),len(invoice.getEntries()))
+
+    def record(self,record):
+        '''
+        Adds a finished render record (from a RenderTimer, possibly in another process).
+        '''
+
+        self.renders += 1
+        self.failures += record.get('error') is not None
+        self.entries += record['entries']
+        self.bytesWritten += record['bytesWritten']
+        if record.get('latexPasses'):
+            self.latexPasses[record['latexPasses']] += 1
+        for name, stage in list(record['stages'].items()) + [('total', record)]:
+            self.histograms.setdefault(name, Histogram(self.buckets)).observe(stage['wall'])
+            self.cpuTotals[name] = self.cpuTotals.get(name, 0.) + stage['cpu']
+        for sink in self.sinks:
+            sink.record(record,self)
+
+    def summary(self):
+        '''
+        Returns a human-readable summary of the stage times (string)
+        '''
+
+        lines = ["{} renders, {} entries, {} bytes written".format(self.renders, self.entries, self.bytesWritten)]
+        if self.latexPasses:
+            lines.append("  LaTeX passes: " + ", ".join("{} x {}".format(count, passes) for passes, count in sorted(self.latexPasses.items())))
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            lines.append("  {:<10} mean {:8.1f} ms   max {:8.1f} ms   CPU {:8.1f} ms".format(name, histogram.sum/histogram.count*1000, histogram.max*1000, self.cpuTotals[name]/histogram.count*1000))
+        return '\n'.join(lines)
+
+    def close(self):
+        '''
+        Closes the sinks.
+        '''
+
+        for sink in self.sinks:
+            sink.close(self)
+
+
+class JSONLinesSink(object):
+    '''
+    Appends each render record to a file as one line of JSON.
+    '''
+
+    def __init__(self,path):
+        '''
+        path: the file to append to (string)
+        '''
+
+        self.file = open(path,'a')
+
+    def record(self,record,metrics):
+        self.file.write(json.dumps(record, sort_keys=True) + '\n')
+        self.file.flush()
+
+    def close(self,metrics):
+        self.file.close()
+
+
+class PrometheusSink(object):
+    '''
+    Writes the histograms and counters in the Prometheus text format. The file is
+    replaced in one step, at most every `interval` seconds and when the metrics are closed.
+    '''
+
+    def __init__(self,path,interval=10.):
+        '''
+        path: the .prom file to write (string)
+        interval: the minimum time between writes in seconds (float)
+        '''
+
+        self.path = path
+        self.interval = interval
+        self.lastWrite = None # the first record is always written
+
+    def record(self,record,metrics):
+        if self.lastWrite is None or time.monotonic() - self.lastWrite >= self.interval:
+            self.write(metrics)
+
+    def close(self,metrics):
+        self.write(metrics)
+
+    def write(self,metrics):
+        '''
+        Writes the current state of metrics to the file.
+        '''
+
+        lines = [
+            '# HELP invoice_stage_seconds Wall time of each render stage.',
+            '# TYPE invoice_stage_seconds histogram',
+            ]
+        for name in sorted(metrics.histograms):
+            histogram = metrics.histograms[name]
+            for bound, count in histogram.cumulative():
+                lines.append('invoice_stage_seconds_bucket{{stage="{}",le="{}"}} {}'.format(name, bound, count))
+            lines.append('invoice_stage_seconds_sum{{stage="{}"}} {}'.format(name, histogram.sum))
+            lines.append('invoice_stage_seconds_count{{stage="{}"}} {}'.format(name, histogram.count))
+        lines.append('# HELP invoice_stage_cpu_seconds_total CPU time of each render stage.')
+        lines.append('# TYPE invoice_stage_cpu_seconds_total counter')
+        for name in sorted(metrics.cpuTotals):
+            lines.append('invoice_stage_cpu_seconds_total{{stage="{}"}} {}'.format(name, metrics.cpuTotals[name]))
+        lines.append('# HELP invoice_latex_passes_total Renders by the number of pdflatex passes they took.')
+        lines.append('# TYPE invoice_latex_passes_total counter')
+        for passes in sorted(metrics.latexPasses):
+            lines.append('invoice_latex_passes_total{{passes="{}"}} {}'.format(passes, metrics.latexPasses[passes]))
+        for metric, help, value in (('invoice_renders_total', 'Invoices rendered.', metrics.renders),
+                                    ('invoice_render_failures_total', 'Invoices that failed to render.', metrics.failures),
+                                    ('invoice_entries_total', 'Entries on the rendered invoices.', metrics.entries),
+                                    ('invoice_bytes_written_total', 'Bytes of TeX and PDF written.', metrics.bytesWritten)):
+            lines.extend(['# HELP {} {}'.format(metric, help), '# TYPE {} counter'.format(metric), '{} {}'.format(metric, value)])
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as promFile:
+            promFile.write('\n'.join(lines) + '\n')
+        os.replace(promFile.name, self.path) # the collector must never read a partial file
+        self.lastWrite = time.monotonic()
@@ -10,12 +10,21 @@ Date created: 2016-09-09
 This module contains the python objects for the Invoice Generator program:
 Invoice
 InvoiceEntry
+EntryTable
+EntryView
 CustomerAccount
+CustomerIndex
+CommandStream
 NoInputError (Exception)
 
 Last updated: 2016-09-10
 '''
 # Required packages
+from array import array
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import math
+import bisect
+import difflib
 
 class NoInputError(Exception):
     '''
@@ -44,6 +53,20 @@ class CustomerAccount(object):
         self.name = name
         self.address = address
         self.number = number
+        self.allocator = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['allocator'] = None # allocators hold open files and databases, so they stay in this process
+        return state
+
+    def setAllocator(self,allocator):
+        '''
+        Sets the allocator that hands out invoice numbers for this account (InvoiceNumberAllocator object, or None).
+        With an allocator, numbers are unique across processes and discarded numbers are voided rather than reused.
+        '''
+
+        self.allocator = allocator
 
     def getAccountName(self):
         '''
@@ -73,24 +96,41 @@ class CustomerAccount(object):
 
         return self.number
 
-    def resetNumber(self):
+    def resetNumber(self,number=None):
         '''
-        Resets the invoice number if an invoice is cancelled
+        Gives back the number of a cancelled invoice (int), by default the latest number issued.
+        If the account has an allocator, the number is recorded as void, as other invoices may have been numbered since.
+        Otherwise the count is moved back only if the number is the latest one, so it can be issued again.
         '''
 
-        self.number -= 1
+        if number is None:
+            number = self.number
+        if self.allocator is not None:
+            self.allocator.void(self.accountName,number,"invoice discarded")
+        elif number == self.number:
+            self.number -= 1
 
     def nextInvoiceCode(self,LaTeX=True):
         '''
         Increments the number attribute and returns an invoice code formatted for TeX (raw string) formatted for plain text (string), and the filename for the PDF (string).
+        If the account has an allocator, the number comes from the allocator.
         '''
 
-        self.number += 1
-        #invoiceNumber = '{:0=3d}'.format(self.getNumber()) # get the next invoice number as 3 digit long string
+        if self.allocator is not None:
+            self.number = self.allocator.next(self.accountName)
+        else:
+            self.number += 1
+
+        return self.invoiceCode(self.number)
 
-        invoiceCode = r"\textsc{{{accountName}}}--{number:0=3d}".format(**self.JSONdump())
-        plainInvoiceCode = "{accountName}_{number:0=3d}".format(**self.JSONdump())
-        filename = "invoice_{accountName}_{number:0=3d}".format(**self.JSONdump())
+    def invoiceCode(self,number):
+        '''
+        Returns the invoice code for invoice number 'number' formatted for TeX (raw string), formatted for plain text (string), and the filename for the PDF (string).
+        '''
+
+        invoiceCode = r"\textsc{{{}}}--{:0=3d}".format(self.accountName,number)
+        plainInvoiceCode = "{}_{:0=3d}".format(self.accountName,number)
+        filename = "invoice_{}_{:0=3d}".format(self.accountName,number)
 
         return invoiceCode, plainInvoiceCode, filename
 
@@ -102,6 +142,122 @@ class CustomerAccount(object):
         return {'accountName':self.getAccountName(), 'number':self.getNumber(), 'name':self.getName(), 'address':self.getAddress()}
 
 
+class CustomerIndex(object):
+    '''
+    Search index over the account codes and names of a set of customer accounts.
+
+    The index is a sorted list of (search term, kind, account key) tuples, where
+    the terms are the lowercase account code, full name and each word of the
+    name, so prefix searches are a bisect followed by a short scan. Misspelt
+    queries fall back to a fuzzy match over the terms that start with the same
+    letter, examining at most maxFuzzy terms.
+    '''
+
+    CODE, NAME, WORD = 0, 1, 2 # kinds of search term, best first
+
+    def __init__(self,customerAccounts,maxFuzzy=2000):
+        '''
+        customerAccounts: dictionary of CustomerAccount objects (keys are lowercase account codes)
+        maxFuzzy: the maximum number of terms to compare with a query in a fuzzy match (int)
+        '''
+
+        self.customerAccounts = customerAccounts
+        self.maxFuzzy = maxFuzzy
+        self.accountTerms = {key: self._terms(key,customerAccounts[key]) for key in customerAccounts} # the terms indexed for each account, so they can be removed
+        self.terms = [term for terms in self.accountTerms.values() for term in terms]
+        self.terms.sort()
+        self.keys = sorted(customerAccounts)
+
+    def _terms(self,key,account):
+        '''
+        Returns the search terms for an account (list of tuples)
+        '''
+
+        name = account.getName().lower()
+        terms = [(key,self.CODE,key), (name,self.NAME,key)]
+        words = name.split()
+        if len(words) > 1:
+            terms.extend((word,self.WORD,key) for word in set(words))
+        return terms
+
+    def add(self,account):
+        '''
+        Adds an account to the index, or updates it if the account code is already indexed. The account must already be in customerAccounts.
+        '''
+
+        key = account.getAccountName().lower()
+        self.remove(key)
+        self.accountTerms[key] = self._terms(key,account)
+        for term in self.accountTerms[key]:
+            bisect.insort(self.terms,term)
+        bisect.insort(self.keys,key)
+
+    def remove(self,key):
+        '''
+        Removes the account with the lowercase account code key from the index, if it is there.
+        '''
+
+        for term in self.accountTerms.pop(key,[]):
+            index = bisect.bisect_left(self.terms,term)
+            if index < len(self.terms) and self.terms[index] == term:
+                del self.terms[index]
+        index = bisect.bisect_left(self.keys,key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+
+    def rank(self,query):
+        '''
+        Returns the keys of the accounts matching query, best match first (list of strings)
+
+        Exact matches rank above prefix matches, and account codes above names. Fuzzy matches come last.
+        '''
+
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        scores = {}
+        index = bisect.bisect_left(self.terms,(query,))
+        while index < len(self.terms) and self.terms[index][0].startswith(query):
+            term, kind, key = self.terms[index]
+            score = 2*kind + (term != query)
+            if score < scores.get(key,6):
+                scores[key] = score
+            index += 1
+
+        # Fuzzy match over the terms starting with the same letter
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(query)
+        index = bisect.bisect_left(self.terms,(query[0],))
+        end = min(bisect.bisect_left(self.terms,(chr(ord(query[0])+1),)), index+self.maxFuzzy)
+        for term, kind, key in self.terms[index:end]:
+            if key in scores and scores[key] < 6:
+                continue
+            matcher.set_seq1(term[:len(query)+2]) # compare with the start of the term, so long names are not penalised
+            if matcher.real_quick_ratio() >= 0.75 and matcher.quick_ratio() >= 0.75:
+                ratio = matcher.ratio()
+                if ratio >= 0.75 and 7-ratio < scores.get(key,7):
+                    scores[key] = 7-ratio
+
+        return sorted(scores, key=lambda key: (scores[key], key))
+
+    def search(self,query,page=0,pageSize=20):
+        '''
+        Returns one page of the accounts matching query, best match first (list of CustomerAccount objects), and the total number of matches (int)
+        '''
+
+        keys = self.rank(query)
+        return [self.customerAccounts[key] for key in keys[page*pageSize:(page+1)*pageSize]], len(keys)
+
+    def browse(self,page=0,pageSize=20):
+        '''
+        Returns one page of all the accounts in alphabetical order (list of CustomerAccount objects), and the total number of accounts (int)
+        '''
+
+        keys = self.keys[page*pageSize:(page+1)*pageSize]
+        return [self.customerAccounts[key] for key in keys], len(self.keys)
+
+
 class InvoiceEntry(object):
     '''
     Representation of an entry on an invoice. Contains ID, description, rate and quantity information.
@@ -115,7 +271,7 @@ class InvoiceEntry(object):
         rate, qty: float
         '''
 
-        if (not id) | (not description) | (not rate) | (not qty): # if something missing, collect it
+        if (id is None) | (description is None) | (rate is None) | (qty is None): # if something missing, collect it
             print( "\nNew Fee (leave blank to skip)" )
 
         if id == None:
@@ -129,7 +285,8 @@ class InvoiceEntry(object):
 
         assert (type(rate) == float) & (type(qty) == float) # check qty and rate are numbers
 
-        amount = rate * qty
+        self.amountPence = linePence(rate, qty)
+        amount = self.amountPence / 100
 
         self.id, self.description, self.rate, self.qty, self.amount = id, description, rate, qty, amount
 
@@ -168,12 +325,191 @@ class InvoiceEntry(object):
 
         return self.amount
 
+    def getAmountPence(self):
+        '''
+        Returns the amount of the fee in pence (int)
+        '''
+
+        return self.amountPence
+
+    def getAllInfo(self):
+        '''
+        Returns all entry info in a dictionary (dict)
+        '''
+
+        return {'id':self.id,'description':self.description,'rate':twoDP(self.rate),'qty':self.qty,'amount':formatPence(self.amountPence)}
+
+
+class EntryView(object):
+    '''
+    Read-only view of one row of an EntryTable. Has the same methods for reading the entry as InvoiceEntry.
+    '''
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self,table,index):
+        '''
+        table: the table the entry is in (EntryTable object)
+        index: the row of the entry (int)
+        '''
+
+        self.table = table
+        self.index = index
+
+    def getID(self):
+        '''
+        Returns the ID attribute of the fee.
+        '''
+
+        return self.table.ids[self.index]
+
+    def getDescription(self):
+        '''
+        Returns the description attribute of the fee.
+        '''
+
+        return self.table.descriptions[self.index]
+
+    def getRate(self):
+        '''
+        Returns the rate attribute of the fee.
+        '''
+
+        return self.table.rates[self.index]
+
+    def getQty(self):
+        '''
+        Returns the quantity attribute of the fee.
+        '''
+
+        return self.table.qtys[self.index]
+
+    def getAmount(self):
+        '''
+        Returns the amount attribute of the fee.
+        '''
+
+        return self.table.amounts[self.index] / 100
+
+    def getAmountPence(self):
+        '''
+        Returns the amount of the fee in pence (int)
+        '''
+
+        return self.table.amounts[self.index]
+
     def getAllInfo(self):
         '''
         Returns all entry info in a dictionary (dict)
         '''
 
-        return {'id':self.id,'description':self.description,'rate':twoDP(self.rate),'qty':self.qty,'amount':twoDP(self.amount)}
+        return {'id':self.getID(),'description':self.getDescription(),'rate':twoDP(self.getRate()),'qty':self.getQty(),'amount':formatPence(self.getAmountPence())}
+
+
+class EntryTable(object):
+    '''
+    Column store for the entries on an invoice.
+
+    IDs and descriptions are kept in lists, with repeated strings shared, and
+    rates and quantities in contiguous float arrays. Amounts are kept as whole
+    pence in an integer array. Entries are added and formatted a column at a time. Rows are read through EntryView objects,
+    which have the same methods as InvoiceEntry.
+    '''
+
+    def __init__(self):
+        '''
+        Initialization function, creates an empty table.
+        '''
+
+        self.ids = []
+        self.descriptions = []
+        self.rates = array('d')
+        self.qtys = array('d')
+        self.amounts = array('q') # pence
+        self._strings = {} # pool of ID and description strings, so repeated values are stored once
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __getitem__(self,index):
+        if isinstance(index, slice):
+            return [EntryView(self, row) for row in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("entry index out of range")
+        return EntryView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield EntryView(self, index)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_strings'] # not needed once the strings are stored
+        return state
+
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self._strings = {}
+
+    def _shared(self,strings):
+        '''
+        Returns the strings, with repeated values replaced by one shared string (list)
+        '''
+
+        pool = self._strings
+        return [pool.setdefault(string, string) for string in strings]
+
+    def append(self,entry):
+        '''
+        Adds an entry (InvoiceEntry or EntryView object) to the table. Returns its amount in pence (int)
+        '''
+
+        return self.extend([entry.getID()],[entry.getDescription()],[entry.getRate()],[entry.getQty()])
+
+    def extend(self,ids,descriptions,rates,qtys):
+        '''
+        Adds a batch of entries, given as columns (sequences of equal length).
+        The amounts are calculated for the whole batch at once.
+        Returns the total amount of the new entries in pence (int)
+        '''
+
+        rates = array('d', rates)
+        qtys = array('d', qtys)
+        assert len(ids) == len(descriptions) == len(rates) == len(qtys)
+        amounts = array('q', linePenceColumn(rates, qtys))
+
+        self.ids.extend(self._shared(ids))
+        self.descriptions.extend(self._shared(descriptions))
+        self.rates.extend(rates)
+        self.qtys.extend(qtys)
+        self.amounts.extend(amounts)
+
+        return sum(amounts)
+
+    def remove(self,index):
+        '''
+        Removes the entry at index from the table. Returns its amount in pence (int)
+        '''
+
+        amount = self.amounts[index]
+        for column in (self.ids, self.descriptions, self.rates, self.qtys, self.amounts):
+            del column[index]
+        return amount
+
+    def formatRows(self):
+        '''
+        Yields each entry as a row of the TeX table (string). IDs and descriptions are escaped for TeX,
+        and the number columns are formatted a column at a time.
+        '''
+
+        ids = map(escapeTeX, self.ids)
+        descriptions = map(escapeTeX, self.descriptions)
+        rates = map('{:.2f}'.format, self.rates)
+        amounts = formatPenceColumn(self.amounts)
+        for row in zip(ids, descriptions, rates, self.qtys, amounts):
+            yield r"{} & {} & {} & {} & {} \\".format(*row)
 
 
 class Invoice(object):
@@ -181,26 +517,56 @@ class Invoice(object):
     Representation of an invoice
     '''
 
-    def __init__(self,customerAccounts,accountName=None):
+    def __init__(self,customerAccounts,accountName=None,quiet=False,customerIndex=None,number=None):
         """
         Initialization function.
 
         customerAccounts: dictionary of CustomerAccount objects
         accountName: pre-selected customer account name (string)
+        quiet: if True, nothing is printed to the terminal (bool)
+        customerIndex: search index over customerAccounts, for finding the customer (CustomerIndex object)
+        number: the invoice number, for an invoice that was numbered before (e.g. a reopened draft) (int).
+            By default the customer's next number is used.
         """
 
         assert not customerAccounts == {}
 
-        print( "New invoice" )
-        self.customer = selectCustomer(customerAccounts,accountName)
-        self.invoiceCode, self.plainInvoiceCode, self.filename = self.customer.nextInvoiceCode()
-        self.entries = []
-        self.subTotal = 0.
-        self.shipping = 0.
+        if not quiet:
+            print( "New invoice" )
+        self.customer = selectCustomer(customerAccounts,accountName,customerIndex)
+        if number is None:
+            self.invoiceCode, self.plainInvoiceCode, self.filename = self.customer.nextInvoiceCode()
+        else:
+            self.invoiceCode, self.plainInvoiceCode, self.filename = self.customer.invoiceCode(number)
+        self.number = self.customer.getNumber() if number is None else number
+        self.journal = None
+        self.entries = EntryTable()
+        self.subTotalPence = 0 # all amounts are kept in whole pence
+        self.shippingPence = 0
         self.showShipping = False
-        self.discount = 0.
+        self.discountPence = 0
         self.showDiscount = False
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['journal'] = None # the journal holds a file, so it stays in this process
+        return state
+
+    def setJournal(self,journal):
+        '''
+        Sets the journal that records each change to this invoice (DraftJournal object, or None).
+        '''
+
+        self.journal = journal
+
+    def _record(self,op,**data):
+        '''
+        Records a change to the invoice in its journal, if it has one.
+        '''
+
+        if self.journal is not None:
+            self.journal.record(self,op,**data)
+
     def getCustomer(self):
         '''
         Returns the customer attribute of the invoice (CustomerAccount object)
@@ -208,19 +574,33 @@ class Invoice(object):
 
         return self.customer
 
+    def getNumber(self):
+        '''
+        Returns the invoice number (int)
+        '''
+
+        return self.number
+
     def getSubTotal(self):
         '''
         Returns the sub total attribute of the invoice object (float)
         '''
 
-        return self.subTotal
+        return self.subTotalPence / 100
+
+    def getSubTotalPence(self):
+        '''
+        Returns the sub total of the invoice object in pence (int)
+        '''
+
+        return self.subTotalPence
 
     def getShipping(self):
         '''
         Returns the shipping attribute of the invoice object (float)
         '''
 
-        return float(self.shipping)
+        return self.shippingPence / 100
 
     def getShippingLine(self):
         '''
@@ -228,7 +608,7 @@ class Invoice(object):
         '''
 
         if self.showShipping:
-            return r"Shipping: & \pounds{{{}}}\\".format(twoDP(self.shipping))
+            return r"Shipping: & \pounds{{{}}}\\".format(formatPence(self.shippingPence))
         else:
             return ""
 
@@ -237,7 +617,7 @@ class Invoice(object):
         Returns the discount attribute of the invoice object (float)
         '''
 
-        return self.discount
+        return self.discountPence / 100
 
     def getDiscountLine(self):
         '''
@@ -245,7 +625,7 @@ class Invoice(object):
         '''
 
         if self.showDiscount:
-            return r"Discount: & \pounds{{{}}}\\".format(twoDP(self.discount))
+            return r"Discount: & \pounds{{{}}}\\".format(formatPence(self.discountPence))
         else:
             return ""
 
@@ -254,48 +634,78 @@ class Invoice(object):
         Returns the total amount to pay for the invoice object (float)
         '''
 
-        total = self.subTotal + self.shipping - self.discount
-        return total
+        return self.getTotalPence() / 100
+
+    def getTotalPence(self):
+        '''
+        Returns the total amount to pay for the invoice object in pence (int)
+        '''
+
+        return self.subTotalPence + self.shippingPence - self.discountPence
 
     def getEntries(self):
         '''
-        Returns the entries attribute of the invoice (list of InvoiceEntry objects)
+        Returns the entries attribute of the invoice (EntryTable object, which can be used as a list of entries)
         '''
 
         return self.entries
 
     def getEntry(self,index):
         '''
-        Returns the entry 'index' from the entries attribute of the invoice (InvoiceEntry object)
+        Returns the entry 'index' from the entries attribute of the invoice (EntryView object)
         '''
 
         return self.entries[index]
 
-    def addEntry(self,entry):
+    def addEntry(self,entry,quiet=False):
         '''
         Adds an entry (InvoiceObject object) to the entries attribute and updates the sub total.
+        If quiet == True, the new entry is not printed to the terminal.
         '''
 
-        self.entries.append(entry)
-        self.subTotal += entry.getAmount()
+        self.subTotalPence += self.entries.append(entry)
+        self._record('entries',ids=[entry.getID()],descriptions=[entry.getDescription()],rates=[entry.getRate()],qtys=[entry.getQty()])
 
-        print( "(new entry: £{})".format(twoDP(entry.getAmount())) )
+        if not quiet:
+            print( "(new entry: £{})".format(formatPence(entry.getAmountPence())) )
+
+    def addEntries(self,ids,descriptions,rates,qtys):
+        '''
+        Adds a batch of entries, given as columns (sequences of equal length), and updates the sub total.
+        Nothing is printed to the terminal.
+        '''
+
+        self.subTotalPence += self.entries.extend(ids,descriptions,rates,qtys)
+        if self.journal is not None:
+            self._record('entries',ids=list(ids),descriptions=list(descriptions),rates=list(rates),qtys=list(qtys))
+
+    def removeEntry(self,index):
+        '''
+        Removes the entry 'index' from the entries attribute and updates the sub total.
+        '''
+
+        self.subTotalPence -= self.entries.remove(index)
+        self._record('remove',index=index)
 
     def addShipping(self,shippingCost):
         '''
-        Adds an amount to the shipping total (float)
+        Adds an amount to the shipping total (float). Raises ValueError if the amount is out of range.
         '''
 
+        pence = toPence(shippingCost)
         self.showShipping = True
-        self.shipping += shippingCost
+        self.shippingPence += pence
+        self._record('shipping',pence=pence)
 
     def addDiscount(self,discount):
         '''
-        Adds an amount to the discount total (float)
+        Adds an amount to the discount total (float). Raises ValueError if the amount is out of range.
         '''
 
+        pence = toPence(discount)
         self.showDiscount = True
-        self.discount += discount
+        self.discountPence += pence
+        self._record('discount',pence=pence)
 
     def getInvoiceCode(self,latex=True):
         '''
@@ -318,54 +728,131 @@ class Invoice(object):
 
 ##### FUNCTIONS #####
 
-def selectCustomer(customerAccounts,selection=None):
+class CommandStream(object):
+    '''
+    Where the answers to the prompts come from: the keyboard, or the lines of a script.
+    A script is replayed exactly as if it were typed, one line per prompt (so blank lines matter).
+    '''
+
+    def __init__(self,lines=None,echo=True):
+        '''
+        lines: the lines of a script, or None to read from the keyboard (iterable of strings)
+        echo: if True, each scripted answer is printed after its prompt, as if typed (bool)
+        '''
+
+        self.lines = iter(lines) if lines is not None else None
+        self.echo = echo
+        self.lineNumber = 0
+
+    def read(self,prompt):
+        '''
+        Returns the answer to prompt (string). Raises EOFError at the end of the script or input.
+        '''
+
+        if self.lines is None:
+            return input(prompt)
+        line = next(self.lines, None)
+        if line is None:
+            raise EOFError
+        self.lineNumber += 1
+        line = line.rstrip('\r\n')
+        if self.echo:
+            print( prompt + line )
+        return line
+
+commandStream = CommandStream() # the stream read by every prompt
+
+def setCommandStream(stream):
+    '''
+    Makes every prompt read its answers from stream (CommandStream object).
+    '''
+
+    global commandStream
+    commandStream = stream
+
+def readInput(prompt):
+    '''
+    Returns the answer to prompt from the current command stream (string)
+    '''
+
+    return commandStream.read(prompt)
+
+def selectCustomer(customerAccounts,selection=None,customerIndex=None,pageSize=20):
     '''
     Requires the user to select a customer from the set of customer accounts.
+    An exact account code is selected straight away. Anything else is searched
+    for in the account codes and names, and the user picks from the matches.
 
     customerAccounts: dictionary of CustomerAccount objects
+    selection: account code or search (string)
+    customerIndex: search index over customerAccounts; one is built if it is not given (CustomerIndex object)
+    pageSize: the number of matches to show at a time (int)
 
     Returns a CustomerAccount object selected by the user.
     '''
 
     if selection is None: # if no selection has been provided already
-        selection = input("\nPlease select a customer account: ").lower()
+        selection = readInput("\nPlease select a customer account: ")
 
     while True:
-        if selection == "-ls": # method to list account names
-            print( "All customer accounts:" )
-            customers = list(customerAccounts.keys()) # get a list of customer account names
-            customers.sort() # sort the list alphabetically
-            for customer in customers:
-                print( customerAccounts[customer].getAccountName() ) # print account names
-            return selectCustomer(customerAccounts,selection=None)
-        else:
-            try:
-                customer = customerAccounts[selection.lower()]
-                return customer
-            except:
+        if selection.lower() in customerAccounts:
+            return customerAccounts[selection.lower()]
+
+        if customerIndex is None:
+            customerIndex = CustomerIndex(customerAccounts)
+
+        page = 0
+        while True:
+            if selection == "-ls": # method to list account names
+                matches, total = customerIndex.browse(page,pageSize)
+                heading = "All customer accounts"
+            else:
+                matches, total = customerIndex.search(selection,page,pageSize)
+                heading = "Accounts matching '{}'".format(selection)
+
+            if total == 0:
                 print( "There is no account by that name. Please try again. (Type -ls to get a list of available accounts)" )
-                selection = input(">> ")
+                selection = readInput(">> ")
+                break
+
+            print( "{} ({}-{} of {}):".format(heading, page*pageSize+1, page*pageSize+len(matches), total) )
+            for number, customer in enumerate(matches, 1):
+                print( "{:>3}: {} ({})".format(number, customer.getAccountName(), customer.getName()) )
+            print( "Enter a number to select an account, 'n'/'p' for the next/previous page, or search again." )
+
+            choice = readInput(">> ")
+            if choice.isdigit() and 1 <= int(choice) <= len(matches):
+                return matches[int(choice)-1]
+            elif choice == 'n' and (page+1)*pageSize < total:
+                page += 1
+            elif choice == 'p' and page > 0:
+                page -= 1
+            elif choice not in ('n','p'):
+                selection = choice
+                break
 
 def tryInput(prompt):
     '''
     Requests raw input from the user. Raises NoInputError if no input is entered.
     '''
 
-    userInput = input(prompt)
+    userInput = readInput(prompt)
     if userInput == "":
         raise NoInputError
     return userInput
 
 def numInput(prompt):
     '''
-    Requests a number as input from the user. Raises NoInputError if no input is entered or input is not a number.
+    Requests a number as input from the user. Raises NoInputError if no input is entered or input is not a finite number.
     '''
 
-    userInput = input(prompt)
+    userInput = readInput(prompt)
     try:
         userInput = float(userInput)
     except ValueError:
         raise NoInputError
+    if not math.isfinite(userInput): # 'nan' and 'inf' are floats too
+        raise NoInputError
     assert type(userInput) == float
     return userInput
 
@@ -420,6 +907,26 @@ def printUnderline(text,char="-",width=0):
     text = text.center(width)
     print('',text,char*len(text),sep='\n')
 
+_TEX_ESCAPES = str.maketrans({
+    '\\': r'\textbackslash{}',
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+    })
+
+def escapeTeX(text):
+    '''
+    Escapes the characters in text that have a special meaning in TeX (string)
+    '''
+
+    return text.translate(_TEX_ESCAPES)
+
 def twoDP(num):
     '''
     Takes a number as an input (num: float or int) and returns a string of the number rounded to 2 decimal places
@@ -427,6 +934,110 @@ def twoDP(num):
 
     return '{:.2f}'.format(round(num,2))
 
+##### MONEY #####
+# Amounts of money are kept as whole pence (int), so sums are exact. Amounts are
+# rounded to the nearest penny (halves away from zero) when they are created.
+# An amount must be finite and at most maxPounds, so it fits the 64-bit amount
+# column of an EntryTable; anything else raises ValueError.
+
+maxPounds = 10**13 # largest amount of money accepted, in pounds
+
+_PENCE_PER_POUND = Decimal(100)
+_ONE_PENNY = Decimal(1)
+_MAX_PENCE = Decimal(maxPounds) * _PENCE_PER_POUND
+
+def _roundPence(pence):
+    '''
+    Rounds an amount in pence (Decimal) to whole pence (int). Raises ValueError if it is not finite or is bigger than maxPounds.
+    '''
+
+    if not pence.is_finite() or abs(pence) > _MAX_PENCE:
+        raise ValueError("the amount is out of range (at most £{:,})".format(maxPounds))
+    return int(pence.quantize(_ONE_PENNY, rounding=ROUND_HALF_UP))
+
+def toPence(value):
+    '''
+    Converts an amount in pounds (float, int or string) to whole pence (int). Raises ValueError for a bad amount.
+    '''
+
+    try:
+        pounds = Decimal(repr(value) if isinstance(value, float) else str(value))
+    except InvalidOperation:
+        raise ValueError("'{}' is not an amount of money".format(value))
+    return _roundPence(pounds * _PENCE_PER_POUND)
+
+def linePence(rate,qty):
+    '''
+    Returns rate * qty in whole pence (int). rate is in pounds and may be a fraction of a penny (float).
+    Raises ValueError if the rate or quantity is not finite, or the amount is out of range.
+    '''
+
+    if not (math.isfinite(rate) and math.isfinite(qty)): # inf * 0 would be an invalid operation
+        raise ValueError("the rate and quantity must be finite numbers")
+    return _roundPence(Decimal(repr(rate)) * Decimal(repr(qty)) * _PENCE_PER_POUND)
+
+# Columns of rates and quantities are multiplied out in integers: each value is
+# scaled by 10^6, which is exact for a float written with at most 6 decimal
+# places (and under 2^32), so the product is the same as linePence's without
+# making a Decimal for every row.
+_SCALE = 10**6
+_SCALED_LIMIT = 2**32 * _SCALE
+_LINE_DIVISOR = _SCALE * _SCALE // 100 # scaled rate * scaled quantity -> pence
+
+def _scaledColumn(column):
+    '''
+    Returns the column multiplied by 10^6 (list of int), or None if a value is not finite, too big,
+    or has more than 6 decimal places.
+    '''
+
+    try:
+        scaled = [round(value * _SCALE) for value in column]
+    except (OverflowError, ValueError): # inf or nan
+        return None
+    if scaled and (max(scaled) >= _SCALED_LIMIT or min(scaled) <= -_SCALED_LIMIT):
+        return None
+    if [number / _SCALE for number in scaled] != list(column): # more decimal places than the scale keeps
+        return None
+    return scaled
+
+def linePenceColumn(rates,qtys):
+    '''
+    Returns rate * qty in whole pence for columns of rates and quantities (list of int), rounded as linePence does.
+    Raises ValueError if a rate or quantity is not finite, or an amount is out of range.
+    '''
+
+    scaledRates = _scaledColumn(rates)
+    scaledQtys = _scaledColumn(qtys) if scaledRates is not None else None
+    if scaledQtys is None: # values that cannot be scaled exactly: row by row in Decimal, which also reports bad values
+        return list(map(linePence, rates, qtys))
+    products = list(map(int.__mul__, scaledRates, scaledQtys))
+    if not products:
+        return []
+    halfPenny = _LINE_DIVISOR // 2
+    if min(products) >= 0:
+        amounts = [(product + halfPenny) // _LINE_DIVISOR for product in products]
+    else: # halves away from zero
+        amounts = [(product + halfPenny) // _LINE_DIVISOR if product >= 0 else -((halfPenny - product) // _LINE_DIVISOR) for product in products]
+    if max(map(abs, amounts)) > maxPounds * 100:
+        return list(map(linePence, rates, qtys)) # raises ValueError for the amount that is out of range
+    return amounts
+
+def formatPence(pence):
+    '''
+    Formats an amount in pence as pounds with 2 decimal places, e.g. 1234 -> '12.34' (string)
+    '''
+
+    sign = '-' if pence < 0 else ''
+    pounds, pence = divmod(abs(pence), 100)
+    return '{}{}.{:02d}'.format(sign, pounds, pence)
+
+def formatPenceColumn(column):
+    '''
+    Formats a column of amounts in pence as pounds with 2 decimal places (list of strings)
+    '''
+
+    return ['{}.{:02d}'.format(*divmod(pence, 100)) if pence >= 0 else formatPence(pence) for pence in column]
+
 def inDevelopment(featureName="This feature",error=False):
     import logging
     if error:
@@ -0,0 +1,216 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Output sinks for Invoice Generator
+(invoiceOutput.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Where finished PDFs go. A file only ever appears at its final path complete:
+it is renamed into place from the scratch directory when that is on the same
+filesystem (no copy at all), and otherwise copied to a hidden temporary file
+next to the target and renamed, so a synced folder such as Dropbox never sees
+a partly written PDF.
+
+DirectorySink - saves each PDF in a directory, under its invoice filename.
+FileSink      - writes the PDF to an open file, e.g. sys.stdout.buffer.
+ArchiveSink   - appends each PDF to one ZIP or tar archive (a file, or a stream
+                such as stdout), so a batch produces a single file without
+                staging copies of the PDFs.
+
+Any of them can be passed to renderInvoice in place of an output path.
+'''
+
+# Import modules
+import os, shutil, tempfile
+import io
+import time
+import threading
+import zipfile, tarfile
+
+# Mode for files written here: what open() would give them, not the 0600 of a temporary file.
+# The umask can only be read by setting it, so it is read once, before any threads start
+_umask = os.umask(0)
+os.umask(_umask)
+fileMode = 0o666 & ~_umask
+
+##### Define methods for placing files atomically #####
+def placeFile(sourcePath,outputPath,move=False):
+    '''
+    Puts the file at sourcePath at outputPath, all at once.
+    If move is True the source may be renamed into place, which is instant on the same filesystem.
+    '''
+
+    if move:
+        try:
+            os.replace(sourcePath,outputPath)
+            return
+        except OSError: # different filesystem: copy instead
+            pass
+    directory = os.path.dirname(os.path.abspath(outputPath))
+    tempFile = tempfile.NamedTemporaryFile(dir=directory, prefix='.', suffix='.tmp', delete=False) # hidden, so sync clients skip it
+    try:
+        with tempFile, open(sourcePath,'rb') as sourceFile:
+            shutil.copyfileobj(sourceFile,tempFile,1024*1024)
+        os.chmod(tempFile.name,fileMode)
+        os.replace(tempFile.name,outputPath)
+    except BaseException:
+        os.remove(tempFile.name)
+        raise
+
+def writeFile(outputPath,data):
+    '''
+    Writes data (bytes) to outputPath, all at once.
+    '''
+
+    directory = os.path.dirname(os.path.abspath(outputPath))
+    tempFile = tempfile.NamedTemporaryFile(dir=directory, prefix='.', suffix='.tmp', delete=False)
+    try:
+        with tempFile:
+            tempFile.write(data)
+        os.chmod(tempFile.name,fileMode)
+        os.replace(tempFile.name,outputPath)
+    except BaseException:
+        os.remove(tempFile.name)
+        raise
+
+
+##### Define the sinks #####
+class OutputSink(object):
+    '''
+    Base class for the places a PDF can be delivered to.
+    '''
+
+    def put(self,name,pdfPath,move=False):
+        '''
+        Delivers the PDF at pdfPath as name. If move is True the file is not needed afterwards and may be moved.
+        Returns where the PDF went (string)
+        '''
+
+        raise NotImplementedError
+
+    def putBytes(self,name,data):
+        '''
+        Delivers a PDF (bytes) as name. Returns where the PDF went (string)
+        '''
+
+        raise NotImplementedError
+
+    def close(self):
+        '''
+        Finishes the output.
+        '''
+
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*excInfo):
+        self.close()
+
+
+class DirectorySink(OutputSink):
+    '''
+    Saves each PDF in a directory.
+    '''
+
+    def __init__(self,directory):
+        '''
+        directory: the directory to save the PDFs in (string)
+        '''
+
+        self.directory = directory
+
+    def put(self,name,pdfPath,move=False):
+        outputPath = os.path.join(self.directory,name)
+        placeFile(pdfPath,outputPath,move)
+        return outputPath
+
+    def putBytes(self,name,data):
+        outputPath = os.path.join(self.directory,name)
+        writeFile(outputPath,data)
+        return outputPath
+
+
+class FileSink(OutputSink):
+    '''
+    Writes each PDF to an open binary file, one after another.
+    '''
+
+    def __init__(self,fileObject):
+        '''
+        fileObject: the file to write to, e.g. sys.stdout.buffer (binary file object)
+        '''
+
+        self.file = fileObject
+        self.lock = threading.Lock()
+
+    def put(self,name,pdfPath,move=False):
+        with open(pdfPath,'rb') as pdfFile, self.lock:
+            shutil.copyfileobj(pdfFile,self.file,1024*1024)
+            self.file.flush()
+        return name
+
+    def putBytes(self,name,data):
+        with self.lock:
+            self.file.write(data)
+            self.file.flush()
+        return name
+
+
+class ArchiveSink(OutputSink):
+    '''
+    Appends each PDF to a ZIP or tar archive as it arrives.
+    '''
+
+    def __init__(self,target,format=None):
+        '''
+        target: path of the archive, or a binary file object to stream it to (string or file object)
+        format: 'zip', 'tar' or 'tar.gz'; by default it is taken from the file extension, or 'zip' for streams (string)
+        '''
+
+        if format is None:
+            name = target if isinstance(target,str) else ''
+            if name.endswith(('.tar.gz', '.tgz')):
+                format = 'tar.gz'
+            elif name.endswith('.tar'):
+                format = 'tar'
+            else:
+                format = 'zip'
+        self.format = format
+        self.lock = threading.Lock()
+        if format == 'zip':
+            self.archive = zipfile.ZipFile(target,'w',zipfile.ZIP_STORED) # PDFs are compressed already
+        elif format in ('tar', 'tar.gz'):
+            mode = 'w|gz' if format == 'tar.gz' else 'w|' # stream mode: entries are written as they are added
+            if isinstance(target,str):
+                self.archive = tarfile.open(target,mode)
+            else:
+                self.archive = tarfile.open(fileobj=target,mode=mode)
+        else:
+            raise ValueError("Unknown archive format '{}' (expected 'zip', 'tar' or 'tar.gz')".format(format))
+
+    def put(self,name,pdfPath,move=False):
+        with self.lock:
+            if self.format == 'zip':
+                self.archive.write(pdfPath,name)
+            else:
+                self.archive.add(pdfPath,arcname=name)
+        return name
+
+    def putBytes(self,name,data):
+        with self.lock:
+            if self.format == 'zip':
+                self.archive.writestr(zipfile.ZipInfo(name,time.localtime()[:6]),data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = time.time()
+                self.archive.addfile(info,io.BytesIO(data))
+        return name
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
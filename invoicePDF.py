@@ -0,0 +1,620 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Native PDF engine for Invoice Generator
+(invoicePDF.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Draws an invoice straight to PDF, using only the standard library, with the
+same layout as invoiceTemplate.tex: the header, the bill-to block, the table of
+entries (split over pages, with the column headings repeated on each page), the
+payment details and the totals.
+
+It is much faster than running pdflatex and does not need a TeX installation,
+so it suits bulk runs. It uses the standard PDF fonts (Helvetica), so the
+output looks a little different to the LaTeX version.
+'''
+
+# Import modules
+import datetime
+import re
+import zlib
+from invoiceObjects import formatPence, formatPenceColumn
+
+# Page layout (PDF points; A4 paper)
+pageWidth, pageHeight = 595.28, 841.89
+marginLeft, marginRight, marginTop, marginBottom = 50., 50., 50., 60.
+grey = (0.5, 0.5, 0.5)
+
+# Glyph widths (per 1000 units of font size) for characters 32-126, from the Helvetica AFM files
+_HELVETICA_WIDTHS = [278,278,355,556,556,889,667,191,333,333,389,584,278,333,278,278,
+    556,556,556,556,556,556,556,556,556,556,278,278,584,584,584,556,
+    1015,667,667,722,722,667,611,778,722,278,500,667,556,833,722,778,
+    667,778,722,667,611,722,667,944,667,667,611,278,278,278,469,556,
+    333,556,556,500,556,556,278,556,556,222,222,500,222,833,556,556,
+    556,556,333,500,278,556,500,722,500,500,500,334,260,334,584]
+_HELVETICA_BOLD_WIDTHS = [278,333,474,556,556,889,722,238,333,333,389,584,278,333,278,278,
+    556,556,556,556,556,556,556,556,556,556,333,333,584,584,584,611,
+    975,722,722,722,722,667,611,778,722,278,556,722,611,833,722,778,
+    667,778,722,667,611,722,667,944,667,667,611,333,278,333,584,556,
+    333,556,611,556,611,556,333,611,611,278,278,556,278,889,611,611,
+    611,611,389,556,333,611,556,778,556,556,500,389,280,389,584]
+
+# Fonts: resource name, base font, glyph widths
+_FONTS = {
+    'regular': ('F1', 'Helvetica', _HELVETICA_WIDTHS),
+    'bold': ('F2', 'Helvetica-Bold', _HELVETICA_BOLD_WIDTHS),
+    'italic': ('F3', 'Helvetica-Oblique', _HELVETICA_WIDTHS),
+    }
+
+
+##### Define methods for measuring and laying out text #####
+def textWidth(text,font='regular',size=10):
+    '''
+    Returns the width of text in points when set in font at size (float)
+    '''
+
+    widths = _FONTS[font][2]
+    total = 0
+    for character in text:
+        code = ord(character)
+        total += widths[code-32] if 32 <= code <= 126 else 556
+    return total * size / 1000.
+
+def wrapText(text,width,font='regular',size=10):
+    '''
+    Splits text into lines no wider than width (list of strings). Words that are too long are broken.
+    '''
+
+    lines = []
+    line = ''
+    for word in text.split():
+        candidate = word if not line else line + ' ' + word
+        if textWidth(candidate,font,size) <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        while textWidth(word,font,size) > width: # break a word that is wider than the column
+            cut = len(word) - 1
+            while cut > 1 and textWidth(word[:cut],font,size) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    lines.append(line)
+    return lines
+
+def plainText(text):
+    '''
+    Converts the TeX markup used in the customer and config data to plain text (string)
+    Returns a list of lines, split at TeX line breaks (list of strings)
+    '''
+
+    text = text.replace('---', '—').replace('--', '–').replace('~', ' ').replace(r'\pounds', '£')
+    return [line.strip() for line in text.split(r'\\')]
+
+
+##### Define the PDF writer #####
+def _pdfString(text):
+    '''
+    Returns text as a PDF string literal in WinAnsiEncoding (bytes)
+    '''
+
+    data = text.encode('cp1252', errors='replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class PDFPage(object):
+    '''
+    A page being drawn: collects the content stream operators.
+    '''
+
+    def __init__(self):
+        '''
+        Initialization function, creates an empty page.
+        '''
+
+        self.operations = []
+
+    def text(self,x,y,text,font='regular',size=10,colour=None,align='left'):
+        '''
+        Draws text with its baseline at y. align is 'left', 'right' (x is the right edge) or 'center'.
+        '''
+
+        if align == 'right':
+            x -= textWidth(text,font,size)
+        elif align == 'center':
+            x -= textWidth(text,font,size) / 2
+        fill = b'%.3f %.3f %.3f rg ' % (colour or (0, 0, 0))
+        self.operations.append(fill + b'BT /%s %.1f Tf %.2f %.2f Td %s Tj ET' % (_FONTS[font][0].encode(), size, x, y, _pdfString(text)))
+
+    def line(self,x1,y1,x2,y2,width=0.5):
+        '''
+        Draws a straight line.
+        '''
+
+        self.operations.append(b'%.2f w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2))
+
+    def getContent(self):
+        '''
+        Returns the content stream of the page (bytes)
+        '''
+
+        return b'\n'.join(self.operations)
+
+
+class PDFDocument(object):
+    '''
+    A minimal PDF 1.4 document using the standard fonts.
+    '''
+
+    def __init__(self):
+        '''
+        Initialization function, creates a document with no pages.
+        '''
+
+        self.pages = []
+
+    def newPage(self):
+        '''
+        Adds a page to the document and returns it (PDFPage object)
+        '''
+
+        page = PDFPage()
+        self.pages.append(page)
+        return page
+
+    def toBytes(self):
+        '''
+        Returns the finished PDF file (bytes)
+        '''
+
+        objects = [] # object bodies; object number n is objects[n-1]
+        def addObject(body):
+            objects.append(body)
+            return len(objects)
+
+        catalog = addObject(None) # filled in once the page tree is known
+        pageTree = addObject(None)
+        fontRefs = []
+        for font in ('regular', 'bold', 'italic'):
+            name, baseFont, widths = _FONTS[font]
+            number = addObject(b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % baseFont.encode())
+            fontRefs.append(b'/%s %d 0 R' % (name.encode(), number))
+        resources = b'<< /Font << ' + b' '.join(fontRefs) + b' >> >>'
+
+        pageRefs = []
+        for page in self.pages:
+            content = zlib.compress(page.getContent())
+            contentNumber = addObject(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content) + content + b'\nendstream')
+            pageNumber = addObject(b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Resources %s /Contents %d 0 R >>' % (pageTree, pageWidth, pageHeight, resources, contentNumber))
+            pageRefs.append(b'%d 0 R' % pageNumber)
+        objects[catalog-1] = b'<< /Type /Catalog /Pages %d 0 R >>' % pageTree
+        objects[pageTree-1] = b'<< /Type /Pages /Kids [' + b' '.join(pageRefs) + b'] /Count %d >>' % len(pageRefs)
+
+        return _writePDF(objects,catalog)
+
+
+def _writePDF(objects,catalog):
+    '''
+    Returns a PDF file (bytes) made of objects, with a cross-reference table.
+
+    objects: object bodies; object number n is objects[n-1] (list of bytes)
+    catalog: the number of the document catalog object (int)
+    '''
+
+    output = [b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n']
+    offset = len(output[0])
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        data = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        offsets.append(offset)
+        output.append(data)
+        offset += len(data)
+    output.append(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    output.extend(b'%010d 00000 n \n' % objectOffset for objectOffset in offsets)
+    output.append(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog, offset))
+    return b''.join(output)
+
+
+##### Define methods for splitting a PDF #####
+_WHITESPACE = b' \t\r\n\f\0'
+_DELIMITERS = _WHITESPACE + b'()<>[]{}/%'
+_REFERENCE = re.compile(rb'(\d+)\s+(\d+)\s+R(?![^\s()<>\[\]{}/%])')
+_INHERITED = (b'/Resources', b'/MediaBox', b'/CropBox', b'/Rotate') # page attributes that can be set on the page tree
+
+def _skipWhitespace(data,position):
+    '''
+    Returns the position of the next character that is not whitespace or part of a comment (int)
+    '''
+
+    while position < len(data):
+        if data[position] in _WHITESPACE:
+            position += 1
+        elif data[position] == ord('%'):
+            while position < len(data) and data[position] not in b'\r\n':
+                position += 1
+        else:
+            break
+    return position
+
+def _valueEnd(data,position):
+    '''
+    Returns the position just after the PDF value (dictionary, array, string, name, number, reference or keyword) starting at position (int)
+    '''
+
+    if data.startswith(b'<<', position):
+        position += 2
+        while True:
+            position = _skipWhitespace(data,position)
+            if data.startswith(b'>>', position):
+                return position + 2
+            position = _valueEnd(data,position)
+    if data[position] == ord('['):
+        position += 1
+        while True:
+            position = _skipWhitespace(data,position)
+            if data[position] == ord(']'):
+                return position + 1
+            position = _valueEnd(data,position)
+    if data[position] == ord('<'): # hex string
+        return data.index(b'>', position) + 1
+    if data[position] == ord('('): # literal string: brackets nest, backslash escapes
+        depth = 0
+        while True:
+            character = data[position]
+            if character == ord('\\'):
+                position += 1
+            elif character == ord('('):
+                depth += 1
+            elif character == ord(')'):
+                depth -= 1
+                if depth == 0:
+                    return position + 1
+            position += 1
+    reference = _REFERENCE.match(data, position)
+    if reference is not None:
+        return reference.end()
+    end = position + 1
+    while end < len(data) and data[end] not in _DELIMITERS:
+        end += 1
+    return end
+
+def _dictEntries(data):
+    '''
+    Returns the keys and values of a PDF dictionary, in order (list of (bytes, bytes) tuples)
+    '''
+
+    entries = []
+    position = _skipWhitespace(data,0) + 2 # after '<<'
+    while True:
+        position = _skipWhitespace(data,position)
+        if data.startswith(b'>>', position):
+            return entries
+        keyEnd = _valueEnd(data,position)
+        valueStart = _skipWhitespace(data,keyEnd)
+        valueEnd = _valueEnd(data,valueStart)
+        entries.append((data[position:keyEnd], data[valueStart:valueEnd]))
+        position = valueEnd
+
+def _dictGet(data,key):
+    '''
+    Returns the value of key in a PDF dictionary, or None (bytes)
+    '''
+
+    for entryKey, value in _dictEntries(data):
+        if entryKey == key:
+            return value
+    return None
+
+def _referenceNumber(value):
+    '''
+    Returns the object number of an indirect reference such as b'12 0 R' (int)
+    '''
+
+    return int(value.split()[0])
+
+
+class PDFReader(object):
+    '''
+    Reads the objects and pages of an existing PDF. Only PDFs with a classic
+    cross-reference table and no object streams are supported, which is what
+    pdfTeX writes with \pdfobjcompresslevel=0.
+    '''
+
+    def __init__(self,data):
+        '''
+        data: the PDF file (bytes)
+        '''
+
+        self.data = data
+        self.offsets = {} # object number -> byte offset
+        self.trailer = None
+        self._readCrossReferences()
+
+    def _readCrossReferences(self):
+        '''
+        Reads the cross-reference tables, newest first.
+        '''
+
+        startxref = self.data.rfind(b'startxref')
+        if startxref == -1:
+            raise ValueError("This is not a PDF file (no startxref).")
+        position = int(self.data[startxref+9:].split()[0])
+        while position is not None:
+            if not self.data.startswith(b'xref', position):
+                raise ValueError("Cross-reference streams are not supported; compile with \\pdfobjcompresslevel=0.")
+            position += 4
+            while True:
+                position = _skipWhitespace(self.data,position)
+                if self.data.startswith(b'trailer', position):
+                    break
+                first, count = self.data[position:position+40].split()[:2]
+                position = self.data.index(count, position) + len(count)
+                for number in range(int(first), int(first) + int(count)):
+                    position = _skipWhitespace(self.data,position)
+                    offset, generation, kind = self.data[position:position+18].split()
+                    position += 18
+                    if kind == b'n' and number not in self.offsets:
+                        self.offsets[number] = int(offset)
+            trailerStart = _skipWhitespace(self.data,position+7)
+            trailer = self.data[trailerStart:_valueEnd(self.data,trailerStart)]
+            if self.trailer is None:
+                self.trailer = trailer
+            previous = _dictGet(trailer,b'/Prev')
+            position = int(previous) if previous is not None else None
+
+    def getObject(self,number):
+        '''
+        Returns the value of an object (usually a dictionary), and its stream data or None (tuple of bytes)
+        '''
+
+        position = self.offsets[number]
+        header = re.compile(rb'\d+\s+\d+\s+obj').match(self.data, position)
+        if header is None:
+            raise ValueError("Object {} is not where the cross-reference table says it is.".format(number))
+        valueStart = _skipWhitespace(self.data,header.end())
+        valueEnd = _valueEnd(self.data,valueStart)
+        value = self.data[valueStart:valueEnd]
+        position = _skipWhitespace(self.data,valueEnd)
+        if not self.data.startswith(b'stream', position):
+            return value, None
+
+        position += 6
+        position += 2 if self.data.startswith(b'\r\n', position) else 1 # end of line after 'stream'
+        length = _dictGet(value,b'/Length')
+        if length.endswith(b'R'):
+            length = self.getObject(_referenceNumber(length))[0]
+        return value, self.data[position:position+int(length)]
+
+    def getPages(self):
+        '''
+        Returns the pages in order, as (object number, inherited attributes) tuples (list).
+        The inherited attributes are the ones set on the page tree rather than the page itself (dict of bytes).
+        '''
+
+        catalog = self.getObject(_referenceNumber(_dictGet(self.trailer,b'/Root')))[0]
+        pages = []
+        def walk(number,inherited):
+            node = self.getObject(number)[0]
+            if _dictGet(node,b'/Type') == b'/Pages':
+                inherited = dict(inherited)
+                for key in _INHERITED:
+                    value = _dictGet(node,key)
+                    if value is not None:
+                        inherited[key] = value
+                for kid in _REFERENCE.finditer(_dictGet(node,b'/Kids')):
+                    walk(int(kid.group(1)),inherited)
+            else:
+                pages.append((number, inherited))
+        walk(_referenceNumber(_dictGet(catalog,b'/Pages')),{})
+        return pages
+
+    def extractPages(self,pages,allPages=None):
+        '''
+        Returns a new PDF file (bytes) containing only the given pages (as returned by getPages)
+        and the objects they use. References to other pages of the document become null.
+        '''
+
+        if allPages is None:
+            allPages = self.getPages()
+        inheritedByPage = dict(pages)
+        excluded = set(number for number, inherited in allPages if number not in inheritedByPage)
+
+        objects = [None, None] # objects 1 and 2 are the new catalog and page tree
+        newNumbers = {}
+        queue = []
+        def renumber(match):
+            number = int(match.group(1))
+            if number in excluded or number not in self.offsets:
+                return b'null'
+            if number not in newNumbers:
+                objects.append(None)
+                newNumbers[number] = len(objects)
+                queue.append(number)
+            return b'%d 0 R' % newNumbers[number]
+
+        pageRefs = [_REFERENCE.sub(renumber, b'%d 0 R' % number) for number, inherited in pages]
+        while queue:
+            number = queue.pop()
+            value, stream = self.getObject(number)
+            if number in inheritedByPage: # give the page its new parent and the attributes it inherited
+                entries = [(key, entryValue) for key, entryValue in _dictEntries(value) if key != b'/Parent']
+                keys = set(key for key, entryValue in entries)
+                entries.extend((key, inheritedValue) for key, inheritedValue in inheritedByPage[number].items() if key not in keys)
+                value = b'<< ' + b' '.join(key + b' ' + entryValue for key, entryValue in entries) + b' >>'
+            value = _REFERENCE.sub(renumber, value)
+            if number in inheritedByPage:
+                value = value[:-2] + b'/Parent 2 0 R >>'
+            if stream is not None:
+                value += b'\nstream\n' + stream + b'\nendstream'
+            objects[newNumbers[number]-1] = value
+
+        objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+        objects[1] = b'<< /Type /Pages /Kids [' + b' '.join(pageRefs) + b'] /Count %d >>' % len(pageRefs)
+        return _writePDF(objects,1)
+
+
+def splitPDF(data,pageCounts):
+    '''
+    Splits a PDF into consecutive parts.
+
+    data: the PDF file (bytes); it must have a classic cross-reference table (see PDFReader)
+    pageCounts: the number of pages in each part (list of int)
+
+    Returns the parts (list of bytes). Raises ValueError if the page counts do not add up to the number of pages.
+    '''
+
+    reader = PDFReader(data)
+    pages = reader.getPages()
+    if sum(pageCounts) != len(pages):
+        raise ValueError("The parts have {} pages between them, but the PDF has {}.".format(sum(pageCounts), len(pages)))
+
+    parts = []
+    start = 0
+    for count in pageCounts:
+        parts.append(reader.extractPages(pages[start:start+count],pages))
+        start += count
+    return parts
+
+
+##### Define method for drawing an invoice #####
+def renderPDF(invoice,configData,date=None):
+    '''
+    Draws an invoice with the same layout as invoiceTemplate.tex.
+
+    invoice: the invoice to be drawn (Invoice object)
+    configData: the config data, as returned by loadConfig (dict)
+    date: the date to print on the invoice, defaults to today (datetime.date)
+
+    Returns the PDF (bytes)
+    '''
+
+    date = date or datetime.date.today()
+    document = PDFDocument()
+    page = document.newPage()
+    textWidthAvailable = pageWidth - marginLeft - marginRight
+    right = pageWidth - marginRight
+    leading = 13.
+
+    ## Header
+    y = pageHeight - marginTop - 24
+    page.text(marginLeft, y, "INVOICE", font='bold', size=24)
+    accountName, number = invoice.getInvoiceCode(latex=False).rsplit('_', 1)
+    y -= 20
+    page.text(marginLeft, y, "#{}–{}".format(accountName.upper(), number), size=11)
+    y -= 2*leading
+    page.text(marginLeft, y, "{:%B} {}, {}".format(date, date.day, date.year), size=11) # as LaTeX's \today
+    y -= 2*leading
+    page.text(marginLeft, y, "Bill to:", size=11, colour=grey)
+    customer = invoice.getCustomer()
+    for line in [customer.getName()] + plainText(customer.getAddress()):
+        y -= leading
+        page.text(marginLeft, y, line, size=11)
+
+    senderY = pageHeight - marginTop - 14
+    page.text(right, senderY, plainText(configData['userName'])[0], size=14, align='right')
+    for line in plainText(configData['userAddress']) + [''] + plainText(configData['userPhoneNumber']) + plainText(configData['userEmail']):
+        senderY -= leading
+        page.text(right, senderY, line, size=11, align='right')
+    y = min(y, senderY) - 2*leading
+
+    ## Table of entries
+    columnWidths = [0.15*textWidthAvailable, 0.36*textWidthAvailable]
+    numberWidth = (textWidthAvailable - sum(columnWidths)) / 3
+    columnWidths += [numberWidth]*3
+    columnEdges = [marginLeft]
+    for width in columnWidths:
+        columnEdges.append(columnEdges[-1] + width)
+    padding = 5.
+    headings = ["ID", "Description", "Rate (£)", "Qty", "Amount (£)"]
+    footerSpace = 20. # room for "Continued on next page"
+
+    def drawHeadings(page,y):
+        page.line(marginLeft, y, right, y)
+        y -= leading + 2
+        for column, heading in enumerate(headings):
+            if column < 2:
+                page.text(columnEdges[column] + padding, y, heading, font='bold', size=10)
+            elif column == 3:
+                page.text((columnEdges[3] + columnEdges[4]) / 2, y, heading, font='bold', size=10, align='center')
+            else:
+                page.text(columnEdges[column+1] - padding, y, heading, font='bold', size=10, align='right')
+        y -= 6
+        page.line(marginLeft, y, right, y)
+        return y
+
+    def drawColumnLines(page,top,bottom):
+        for edge in columnEdges:
+            page.line(edge, top, edge, bottom)
+
+    tableTop = y
+    y = drawHeadings(page, y)
+    entries = invoice.getEntries()
+    rates = ['{:.2f}'.format(rate) for rate in entries.rates]
+    amounts = formatPenceColumn(entries.amounts)
+    for index in range(len(entries)):
+        idLines = wrapText(entries.ids[index], columnWidths[0] - 2*padding, size=9)
+        descriptionLines = wrapText(entries.descriptions[index], columnWidths[1] - 2*padding)
+        rowHeight = leading * max(len(idLines), len(descriptionLines)) + 6
+        if y - rowHeight < marginBottom + footerSpace: # no room on this page: continue on the next
+            drawColumnLines(page, tableTop, y)
+            page.line(marginLeft, y, right, y)
+            page.text(right, y - 14, "Continued on next page", font='italic', size=10, align='right')
+            page = document.newPage()
+            y = pageHeight - marginTop
+            page.text(pageWidth/2, y - 12, "Continued from previous page", font='italic', size=10, align='center')
+            y -= 20
+            tableTop = y
+            y = drawHeadings(page, y)
+        baseline = y - leading
+        for line in idLines:
+            page.text(columnEdges[0] + padding, baseline, line, size=9)
+            baseline -= leading
+        baseline = y - leading
+        for line in descriptionLines:
+            page.text(columnEdges[1] + padding, baseline, line)
+            baseline -= leading
+        page.text(columnEdges[3] - padding, y - leading, rates[index], align='right')
+        page.text((columnEdges[3] + columnEdges[4]) / 2, y - leading, '{}'.format(entries.qtys[index]), align='center')
+        page.text(columnEdges[5] - padding, y - leading, amounts[index], align='right')
+        y -= rowHeight
+    drawColumnLines(page, tableTop, y)
+    page.line(marginLeft, y, right, y)
+
+    ## Payment details and totals, at the bottom of the last page
+    totals = [("Sub total:", formatPence(invoice.getSubTotalPence()), 'regular')]
+    if invoice.showDiscount:
+        totals.append(("Discount:", formatPence(invoice.discountPence), 'regular'))
+    if invoice.showShipping:
+        totals.append(("Shipping:", formatPence(invoice.shippingPence), 'regular'))
+    totals.append(("Amount Due:", formatPence(invoice.getTotalPence()), 'bold'))
+    blockHeight = max(5, len(totals) + 1) * leading + 20
+    if y - blockHeight < marginBottom:
+        page = document.newPage()
+    y = marginBottom + blockHeight
+
+    page.text(marginLeft, y, "Payment is due within 30 days of receipt of this invoice.", size=11)
+    page.text(marginLeft, y - 2*leading, "Payment details:", size=11, colour=grey)
+    page.text(marginLeft, y - 3*leading, "Account #: {}".format(plainText(configData['accountNumber'])[0]), size=11)
+    page.text(marginLeft, y - 4*leading, "Sort code: {}".format(plainText(configData['sortCodeFormatted'])[0]), size=11)
+
+    labelX, valueX = right - 90, right
+    totalsY = y
+    for index, (label, value, font) in enumerate(totals):
+        if index == 1 or index == len(totals) - 1: # rules above the adjustments and the amount due
+            page.line(labelX - 70, totalsY + leading - 3, right, totalsY + leading - 3)
+            if index == len(totals) - 1:
+                page.line(labelX - 70, totalsY + leading - 5, right, totalsY + leading - 5)
+        page.text(labelX, totalsY, label, font=font, size=11, align='right')
+        page.text(valueX, totalsY, "£" + value, font=font, size=11, align='right')
+        totalsY -= leading + 2
+
+    ## Page numbers
+    for number, numberedPage in enumerate(document.pages, 1):
+        numberedPage.text(pageWidth/2, marginBottom/2, str(number), size=10, align='center')
+
+    return document.toBytes()
@@ -0,0 +1,933 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Invoice Renderer for Invoice Generator
+(invoiceRenderer.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Library functions for turning an Invoice object into a PDF using LaTeX.
+
+Every render uses its own private scratch directory and runs pdflatex there
+with an explicit working directory. Nothing here reads the module globals of
+invoiceGenerator or changes the current directory, so renders can run at the
+same time from threads, processes or a long-running service.
+
+renderInvoices compiles several invoices in one pdflatex run and splits the
+PDF afterwards, so the cost of starting pdflatex is shared between them.
+
+pdflatex is run again only while the .aux file is still changing or the log
+asks for a rerun (longtable needs a second pass to line up its columns across
+pages), so a short invoice takes one pass. pdflatex is run by a LaTeXSupervisor,
+which never waits for terminal input, enforces time and memory limits, turns
+the log into a LaTeXError when it fails and tries transient failures again.
+
+Finished PDFs are renamed into place from the scratch directory, or handed to
+an output sink (see invoiceOutput), so a PDF is never copied more than once.
+'''
+
+# Import modules
+import json
+import os, shutil, tempfile
+import subprocess
+import hashlib
+import io, itertools
+import re
+import time
+import errno, signal, resource
+import collections
+import threading
+import logging
+from invoiceObjects import NoInputError, formatPence
+import invoicePDF
+from invoiceMetrics import nullTimer
+from invoiceOutput import OutputSink, placeFile, writeFile
+
+templatePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'invoiceTemplate.tex') # default LaTeX template
+formatDir = os.path.join(os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'invoiceGenerator', 'formats') # default location of precompiled formats
+maxLaTeXPasses = 4 # most pdflatex passes for one render
+longtableChunkSize = 20 # rows longtable typesets at a time (the LaTeX default \LTchunksize)
+preambleMarker = '%%% END OF STATIC PREAMBLE' # line in the template that ends the precompiled preamble
+dumpCommand = r'''
+\expandafter\ifx\csname @@dump\endcsname\relax \expandafter\dump \else \csname @@dump\expandafter\endcsname\fi
+''' # LaTeX may keep the \dump primitive as \@@dump
+
+
+##### Define methods for building the TeX fragments #####
+def loadConfig(path):
+    '''
+    Reads the config JSON file and returns the config data (dict)
+    '''
+
+    with open(path,'r') as configFile:
+        return json.load(configFile)
+
+def configTeX(configData):
+    '''
+    Returns the TeX macros for the user's details and payment information (string)
+
+    configData: the config data, as saved by configUtil (dict)
+    '''
+
+    return r"\newcommand\myName{{{userName}}}\newcommand\myAddress{{{userAddress}}}\newcommand\myPhoneNumber{{{userPhoneNumber}}}\newcommand\myEmail{{{userEmail}}}\newcommand\accountNumber{{{accountNumber}}}\newcommand\sortCode{{{sortCodeFormatted}}}".format(**configData)
+
+def customerAddressTeX(customer):
+    '''
+    Returns the customer's name and address formatted for TeX (string)
+
+    customer: CustomerAccount object
+    '''
+
+    return customer.getName() + r"\\" + customer.getAddress()
+
+class _HashingWriter(object):
+    '''
+    Wraps a text file, keeping a sha256 hash of everything written to it.
+    '''
+
+    def __init__(self,stream):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+
+    def write(self,text):
+        self.hash.update(text.encode('utf-8'))
+        self.stream.write(text)
+
+    def writelines(self,lines):
+        for line in lines:
+            self.write(line)
+
+def writeInvoiceInfo(invoice,stream,batchSize=1000):
+    '''
+    Writes the TeX macros for the invoice totals and table to stream.
+    The table rows are streamed a batch at a time, so the whole table is never held in memory.
+
+    invoice: Invoice object
+    stream: text file to write to
+    batchSize: the number of rows to join before each write (int)
+    '''
+
+    stream.write(r"\newcommand\subtotal{{{}}}\newcommand\discount{{{}}}\newcommand\shipping{{{}}}\newcommand\grandtotal{{{}}}".format(formatPence(invoice.getSubTotalPence()),invoice.getDiscountLine(),invoice.getShippingLine(),formatPence(invoice.getTotalPence())))
+
+    stream.write(r"\newcommand\invoiceInfo{")
+    rows = invoice.getEntries().formatRows() # TeX-escaped rows, one per entry
+    while True:
+        batch = ''.join(itertools.islice(rows, batchSize))
+        if not batch:
+            break
+        stream.write(batch)
+    numOfEntries = len(invoice.getEntries())
+    if numOfEntries < 8: # add padding: make sure there are at least 8 entries, so the invoice table isn't too short (because that looks weird)
+        stream.write(r"&~\n~&&&\\" * (8 - numOfEntries))
+    stream.write("}")
+
+def invoiceInfoTeX(invoice):
+    '''
+    Returns the TeX macros for the invoice table and totals (string)
+
+    invoice: Invoice object
+    '''
+
+    invoiceInfo = io.StringIO()
+    writeInvoiceInfo(invoice,invoiceInfo)
+    return invoiceInfo.getvalue()
+
+class FragmentCache(object):
+    '''
+    Memoizes the parts of a render that are the same from one invoice to the next:
+    the parsed config file and the template (both kept until the file's
+    modification time or size changes), the config macros, and the address
+    fragment of the most recently used customers.
+
+    The cache is safe to share between threads. Each worker process has its own.
+    '''
+
+    configKeys = ('userName','userAddress','userPhoneNumber','userEmail','accountNumber','sortCodeFormatted') # the config values used by configTeX
+
+    def __init__(self,maxCustomers=1024):
+        '''
+        maxCustomers: the number of customer address fragments to keep (int)
+        '''
+
+        self.maxCustomers = maxCustomers
+        self.files = {} # path -> ((mtime, size), contents)
+        self.configFragments = collections.OrderedDict() # config values -> TeX
+        self.addressFragments = collections.OrderedDict() # account code -> ((name, address), TeX)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self,path,read):
+        '''
+        Returns read(path), reusing the last result while the file is unchanged.
+        '''
+
+        fileStat = os.stat(path)
+        statKey = (fileStat.st_mtime_ns, fileStat.st_size)
+        with self.lock:
+            cached = self.files.get(path)
+            if cached is not None and cached[0] == statKey:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        contents = read(path)
+        with self.lock:
+            self.files[path] = (statKey, contents)
+        return contents
+
+    def loadConfig(self,path):
+        '''
+        Returns the config data (dict), parsing the file only when it has changed. N.B. the dict is shared, so do not modify it.
+        '''
+
+        return self._file(path,loadConfig)
+
+    def templateData(self,path):
+        '''
+        Returns the contents of the template (bytes), reading the file only when it has changed.
+        '''
+
+        def read(path):
+            with open(path,'rb') as templateFile:
+                return templateFile.read()
+        return self._file(path,read)
+
+    def configTeX(self,configData):
+        '''
+        Returns the TeX macros for the user's details (string), as configTeX.
+        '''
+
+        key = tuple(configData.get(configKey) for configKey in self.configKeys)
+        with self.lock:
+            if key in self.configFragments:
+                self.hits += 1
+                return self.configFragments[key]
+            self.misses += 1
+        tex = configTeX(configData)
+        with self.lock:
+            self.configFragments[key] = tex
+            while len(self.configFragments) > 8: # only a handful of configs are ever in use
+                self.configFragments.popitem(last=False)
+        return tex
+
+    def customerAddressTeX(self,customer):
+        '''
+        Returns the customer's name and address formatted for TeX (string), as customerAddressTeX.
+        '''
+
+        details = (customer.getName(), customer.getAddress())
+        with self.lock:
+            cached = self.addressFragments.get(customer.getAccountName())
+            if cached is not None and cached[0] == details:
+                self.addressFragments.move_to_end(customer.getAccountName())
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        tex = customerAddressTeX(customer)
+        with self.lock:
+            self.addressFragments[customer.getAccountName()] = (details, tex)
+            while len(self.addressFragments) > self.maxCustomers:
+                self.addressFragments.popitem(last=False)
+        return tex
+
+    def stats(self):
+        '''
+        Returns the hit/miss counters (dict)
+        '''
+
+        return {'hits': self.hits, 'misses': self.misses, 'customers': len(self.addressFragments)}
+
+fragmentCache = FragmentCache() # shared by the renders in this process
+
+def buildFragments(invoice,configData,fragmentCache=None):
+    '''
+    Returns the small TEMP*.tex files included by the template, keyed by filename (dict of strings).
+    The invoice table (TEMPinvoiceInfo.tex) is streamed separately by writeInvoiceInfo.
+    If a FragmentCache is given, the config and address fragments are taken from it.
+    '''
+
+    if fragmentCache is None:
+        return {
+            'TEMPinvoiceNumber.tex': invoice.getInvoiceCode(latex=True),
+            'TEMPcustomerAddress.tex': customerAddressTeX(invoice.getCustomer()),
+            'TEMPconfig.tex': configTeX(configData),
+            }
+    return {
+        'TEMPinvoiceNumber.tex': invoice.getInvoiceCode(latex=True),
+        'TEMPcustomerAddress.tex': fragmentCache.customerAddressTeX(invoice.getCustomer()),
+        'TEMPconfig.tex': fragmentCache.configTeX(configData),
+        }
+
+def writeFragments(fragments,workDir,invoice=None):
+    '''
+    Writes the TEMP*.tex files (as returned by buildFragments) into workDir. If an invoice is
+    given, its table is streamed to TEMPinvoiceInfo.tex as well.
+
+    Returns the sha256 hex digest of TEMPinvoiceInfo.tex, or None if no invoice is given (string)
+    '''
+
+    for filename in fragments:
+        with open(os.path.join(workDir,filename),'w') as latexFile:
+            latexFile.write(fragments[filename])
+        logging.debug("{} written".format(filename))
+
+    if invoice is None:
+        return None
+    with open(os.path.join(workDir,'TEMPinvoiceInfo.tex'),'w',buffering=1024*1024) as latexFile:
+        writer = _HashingWriter(latexFile)
+        writeInvoiceInfo(invoice,writer)
+    logging.debug("TEMPinvoiceInfo.tex written")
+    return writer.hash.hexdigest()
+
+
+##### Define methods for precompiling the template preamble #####
+_installationFingerprints = {} # cache of TeX installation fingerprints, keyed by pdflatex binary
+
+def splitTemplate(templateText):
+    '''
+    Splits the template at the preamble marker line.
+    Returns the static preamble and the rest of the document (tuple of strings).
+    Raises ValueError if the template has no marker line.
+    '''
+
+    index = templateText.find(preambleMarker)
+    if index == -1:
+        raise ValueError("The template has no '{}' line, so it cannot be precompiled.".format(preambleMarker))
+    endOfLine = templateText.find('\n', index) + 1
+    return templateText[:index], templateText[endOfLine:]
+
+def installationFingerprint(pdflatex='pdflatex'):
+    '''
+    Returns a string identifying the TeX installation (string): the pdflatex binary, its
+    version, and the base LaTeX format it loads. This changes when TeX is updated.
+    '''
+
+    binary = shutil.which(pdflatex) or pdflatex
+    binary = os.path.realpath(binary)
+    try:
+        binaryStat = os.stat(binary)
+        statKey = (binary, binaryStat.st_mtime_ns, binaryStat.st_size)
+    except OSError:
+        statKey = (binary, None, None)
+
+    if statKey not in _installationFingerprints:
+        parts = [repr(statKey)]
+        for command in ([pdflatex,'--version'], ['kpsewhich','-engine=pdftex','pdflatex.fmt']):
+            try:
+                output = subprocess.run(command,stdin=subprocess.DEVNULL,stdout=subprocess.PIPE,stderr=subprocess.DEVNULL,timeout=30).stdout.decode(errors='replace').strip()
+            except (OSError, subprocess.TimeoutExpired):
+                output = ''
+            parts.append(output)
+            if output and os.path.isfile(output): # base format: include its modification time
+                parts.append(str(os.stat(output).st_mtime_ns))
+        _installationFingerprints[statKey] = '\n'.join(parts)
+
+    return _installationFingerprints[statKey]
+
+class LaTeXFormat(object):
+    '''
+    A precompiled LaTeX format containing the static preamble of the invoice template.
+
+    Loading the format is much faster than having pdflatex parse the preamble and
+    packages on every run. The format is rebuilt automatically whenever the
+    template preamble or the TeX installation changes.
+    '''
+
+    def __init__(self,templatePath=templatePath,formatDir=formatDir,pdflatex='pdflatex',supervisor=None):
+        '''
+        templatePath: path to the LaTeX template (string)
+        formatDir: directory to keep the compiled formats in (string)
+        pdflatex: the pdflatex command to run (string)
+        supervisor: the LaTeXSupervisor whose time and memory limits the build runs under (defaults to latexSupervisor)
+        '''
+
+        self.templatePath = templatePath
+        self.formatDir = formatDir
+        self.pdflatex = pdflatex
+        self.supervisor = supervisor
+
+    def getParts(self):
+        '''
+        Returns the static preamble and document body of the template (tuple of strings)
+        '''
+
+        with open(self.templatePath,'r') as templateFile:
+            return splitTemplate(templateFile.read())
+
+    def getName(self,preamble):
+        '''
+        Returns the name of the format for a preamble (string). The name is a hash of
+        the preamble and the TeX installation, so a change to either gives a new format.
+        '''
+
+        key = hashlib.sha256()
+        key.update(preamble.encode('utf-8'))
+        key.update(installationFingerprint(self.pdflatex).encode('utf-8'))
+        return 'invoice-' + key.hexdigest()[:16]
+
+    def build(self,preamble,name):
+        '''
+        Compiles the preamble into formatDir/<name>.fmt, under the supervisor's time and memory limits.
+        Raises LaTeXError (or LaTeXTimeout) if pdflatex fails, and logs the end of its log.
+        '''
+
+        supervisor = self.supervisor or latexSupervisor
+        os.makedirs(self.formatDir, exist_ok=True)
+        buildDir = tempfile.mkdtemp(prefix='format-', dir=self.formatDir)
+        try:
+            with open(os.path.join(buildDir,'invoicePreamble.tex'),'w') as preambleFile:
+                preambleFile.write(preamble + dumpCommand)
+            logging.debug("Building LaTeX format "+name)
+            command = [self.pdflatex,'-ini','-interaction=nonstopmode','-jobname='+name,'&pdflatex','invoicePreamble.tex']
+            deadline = None if supervisor.timeout is None else time.monotonic() + supervisor.timeout
+            builtFormat = os.path.join(buildDir,name+'.fmt')
+            try:
+                returnCode = supervisor.runPass(command,buildDir,None,deadline)
+                if returnCode != 0 or not os.path.exists(builtFormat):
+                    raise LaTeXError("pdflatex could not build the format {} (exit status {})".format(name, returnCode),parseLaTeXLog(readLog(buildDir,name)))
+            except LaTeXError:
+                logging.error("Building the LaTeX format {} failed. The end of its log:\n{}".format(name, '\n'.join(readLog(buildDir,name).splitlines()[-20:])))
+                raise
+            os.replace(builtFormat,os.path.join(self.formatDir,name+'.fmt')) # atomic, so other renders never see a partial format
+        finally:
+            shutil.rmtree(buildDir, ignore_errors=True)
+
+    def ensure(self):
+        '''
+        Makes sure an up to date format exists, building it if necessary.
+        Returns the format name and the document body to compile with it (tuple of strings).
+        '''
+
+        preamble, body = self.getParts()
+        name = self.getName(preamble)
+        if not os.path.exists(os.path.join(self.formatDir,name+'.fmt')):
+            self.build(preamble,name)
+        return name, body
+
+
+##### Define methods for running pdflatex #####
+longtableWarning = re.compile(rb'Package longtable Warning: (?:Column|Table) widths have changed.*\n(?:\(longtable\).*\n)*')
+rerunWarning = re.compile(rb'Rerun to get|Rerun LaTeX|Label\(s\) may have changed|Please rerun LaTeX')
+
+def auxHash(workDir):
+    '''
+    Returns the hash of TEMPinvoice.aux in workDir, or None if there is no .aux file (string)
+    '''
+
+    try:
+        with open(os.path.join(workDir,'TEMPinvoice.aux'),'rb') as auxFile:
+            return hashlib.sha256(auxFile.read()).hexdigest()
+    except OSError:
+        return None
+
+def needsRerun(workDir,auxBefore,singleChunk=False):
+    '''
+    Checks the .aux and .log files in workDir after a pdflatex pass.
+    Returns whether another pass is needed (bool) and the hash of the .aux file now (tuple)
+
+    auxBefore: the hash of the .aux file the pass read, or None if there was none
+    singleChunk: True if every table fits in one longtable chunk. Its columns are then right after one pass,
+        so longtable's warning that the widths have changed (which it always gives on a first pass) is ignored.
+    '''
+
+    auxAfter = auxHash(workDir)
+    try:
+        with open(os.path.join(workDir,'TEMPinvoice.log'),'rb') as logFile:
+            log = logFile.read()
+    except OSError:
+        log = b''
+    if singleChunk:
+        log = longtableWarning.sub(b'',log)
+    changed = auxBefore is not None and auxAfter != auxBefore # a first pass has nothing to compare with: only its warnings count
+    return changed or rerunWarning.search(log) is not None or longtableWarning.search(log) is not None, auxAfter
+
+class LaTeXError(RuntimeError):
+    '''
+    Raised when pdflatex fails to make the PDF. errors holds the errors found in the log, as dicts
+    with 'message', 'line' (the line of the .tex file, or None) and 'context' keys (list).
+    '''
+
+    def __init__(self,message,errors=(),transient=False):
+        super().__init__(message)
+        self.errors = list(errors)
+        self.transient = transient # worth trying again, e.g. pdflatex was killed from outside
+
+    def __reduce__(self): # so the errors survive being sent back from a worker process
+        return (type(self), (str(self), self.errors, self.transient))
+
+    def summary(self):
+        '''
+        Returns the error and the errors from the log, one per line (string)
+        '''
+
+        lines = [str(self)]
+        for error in self.errors:
+            lines.append("  {}{}{}".format(error['message'], " (line {})".format(error['line']) if error['line'] else "", ": " + error['context'] if error['context'] else ""))
+        return '\n'.join(lines)
+
+class LaTeXTimeout(LaTeXError):
+    '''
+    Raised when pdflatex takes longer than the time limit. The process is killed.
+    '''
+
+    pass
+
+logLine = re.compile(r'^l\.(\d+) ?(.*)$')
+
+def parseLaTeXLog(log):
+    '''
+    Finds the errors in a pdflatex log (string): the lines starting with '!', each with the
+    line number and text of the .tex file where it happened, from the 'l.<number>' line that follows.
+    Returns a list of dicts with 'message', 'line' and 'context' keys (list)
+    '''
+
+    errors = []
+    lines = log.splitlines()
+    for index, line in enumerate(lines):
+        if not line.startswith('! '):
+            continue
+        error = {'message': line[2:].strip(), 'line': None, 'context': ''}
+        for following in lines[index+1:index+12]:
+            if following.startswith('! '):
+                break
+            match = logLine.match(following)
+            if match:
+                error['line'], error['context'] = int(match.group(1)), match.group(2).strip()
+                break
+        errors.append(error)
+    return errors
+
+def readLog(workDir,jobName='TEMPinvoice'):
+    '''
+    Returns the text of the log of jobName in workDir, or '' if there is none (string)
+    '''
+
+    try:
+        with open(os.path.join(workDir,jobName+'.log'),'r',errors='replace') as logFile:
+            return logFile.read()
+    except OSError:
+        return ''
+
+def checkPass(workDir,returnCode):
+    '''
+    Checks the result of a pdflatex pass. Raises LaTeXError if it failed, marked as transient if
+    pdflatex was killed by a signal or stopped without saying why, or as permanent if the log has errors.
+    '''
+
+    if returnCode == 0 and os.path.exists(os.path.join(workDir,'TEMPinvoice.pdf')):
+        return
+    errors = parseLaTeXLog(readLog(workDir))
+    if returnCode is not None and returnCode < 0:
+        raise LaTeXError("pdflatex was killed by signal {}".format(-returnCode),errors,transient=True)
+    if errors:
+        raise LaTeXError("pdflatex stopped with {} error(s): {}".format(len(errors), errors[0]['message']),errors)
+    if returnCode == 0:
+        raise LaTeXError("pdflatex did not make a PDF",errors)
+    raise LaTeXError("pdflatex exited with status {} and no errors in the log".format(returnCode),errors,transient=True)
+
+class LaTeXSupervisor(object):
+    '''
+    Runs pdflatex jobs unattended. Each pass runs with no terminal input (so an error stops
+    pdflatex instead of waiting for an answer) and its output is read as it is written. The passes of a
+    job share a wall-clock time limit, and a job over the limit has its whole process group killed.
+    Each pass has a memory limit. The log of a failed pass is parsed into a LaTeXError, and transient
+    failures are tried again, from the first pass, after a short wait.
+    '''
+
+    def __init__(self,timeout=120.,memoryLimit=2*1024**3,retries=2,backoff=0.5,maxPasses=maxLaTeXPasses):
+        '''
+        timeout: the time limit for all the passes of one job in seconds, or None for no limit (float)
+        memoryLimit: the most address space a pdflatex process may use in bytes, or None for no limit (int).
+            Only applied where the operating system supports it.
+        retries: the number of times to try a job again after a transient failure (int)
+        backoff: the wait before the first retry in seconds, doubled for each retry after (float)
+        maxPasses: the most pdflatex passes for one job (int)
+        '''
+
+        self.timeout = timeout
+        self.memoryLimit = memoryLimit
+        self.retries = retries
+        self.backoff = backoff
+        self.maxPasses = maxPasses
+        self.lock = threading.Lock()
+        self.counts = collections.Counter() # jobs, passes, retries, timeouts, failures
+
+    def _count(self,name,amount=1):
+        with self.lock:
+            self.counts[name] += amount
+
+    def limitMemory(self,pid):
+        '''
+        Applies the memory limit to a running process.
+        '''
+
+        if self.memoryLimit is not None and hasattr(resource, 'prlimit'):
+            try:
+                resource.prlimit(pid, resource.RLIMIT_AS, (self.memoryLimit, self.memoryLimit))
+            except (OSError, ValueError): # the process has already finished, or the limit is not allowed
+                pass
+
+    def startFailed(self,error):
+        '''
+        Handles an OSError from starting pdflatex: raises a transient LaTeXError if the system is short of
+        processes or memory, and otherwise raises the error again.
+        '''
+
+        if error.errno in (errno.EAGAIN, errno.ENOMEM, errno.ETXTBSY):
+            raise LaTeXError("pdflatex could not be started: {}".format(error),transient=True)
+        raise error
+
+    def runPass(self,command,workDir,env,deadline):
+        '''
+        Runs one pdflatex pass, killing it at the deadline (a time.monotonic() value, or None).
+        Returns its return code (int). Raises LaTeXTimeout if it is killed.
+        '''
+
+        try:
+            process = subprocess.Popen(command,cwd=workDir,env=env,stdin=subprocess.DEVNULL,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,start_new_session=True) # own process group, so helpers it starts can be killed with it
+        except OSError as error:
+            self.startFailed(error)
+        self.limitMemory(process.pid)
+        try:
+            process.communicate(timeout=None if deadline is None else max(deadline - time.monotonic(), 0.)) # reads the output, so pdflatex never blocks on a full pipe
+        except subprocess.TimeoutExpired:
+            self._count('timeouts')
+            raise LaTeXTimeout("pdflatex took longer than {:g}s and was killed".format(self.timeout),parseLaTeXLog(readLog(workDir)))
+        finally:
+            if process.returncode is None: # timed out or interrupted: do not leave pdflatex running
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                process.communicate()
+        return process.returncode
+
+    def policy(self,workDir,singleChunk=False):
+        '''
+        The pass and retry policy for one job, shared by run and the asyncio renderer, which differ only in how
+        they run a pass and wait. A generator: it yields ('pass', deadline) when a pdflatex pass should be run
+        (send it the return code, or throw in the LaTeXError that stopped the pass), and ('sleep', seconds)
+        before a retry (send None). It checks each pass, decides whether another is needed (see needsRerun),
+        and finishes with the number of passes as its return value, or raises LaTeXError.
+        '''
+
+        self._count('jobs')
+        for attempt in range(self.retries + 1):
+            for name in ('TEMPinvoice.aux', 'TEMPinvoice.log', 'TEMPinvoice.pdf'): # start again from nothing
+                if attempt > 0 and os.path.exists(os.path.join(workDir,name)):
+                    os.remove(os.path.join(workDir,name))
+            deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            try:
+                auxBefore = auxHash(workDir)
+                for passes in range(1, self.maxPasses+1):
+                    self._count('passes')
+                    returnCode = yield ('pass', deadline)
+                    checkPass(workDir,returnCode)
+                    rerun, auxBefore = needsRerun(workDir,auxBefore,singleChunk)
+                    if not rerun:
+                        break
+                else:
+                    logging.warning("LaTeX output had not settled after {} passes.".format(self.maxPasses))
+                logging.debug("LaTeX ran {} time(s).".format(passes))
+                return passes
+            except LaTeXError as error:
+                if not error.transient or attempt == self.retries:
+                    self._count('failures')
+                    raise
+                self._count('retries')
+                logging.warning("{}. Trying again...".format(error))
+            yield ('sleep', self.backoff * 2**attempt)
+
+    def run(self,command,workDir,env=None,singleChunk=False):
+        '''
+        Runs pdflatex in workDir until the .aux file stops changing and there are no rerun warnings (see needsRerun).
+        Returns the number of passes (int). Raises LaTeXError (or LaTeXTimeout) if it fails.
+        '''
+
+        policy = self.policy(workDir,singleChunk)
+        try:
+            action, value = next(policy)
+            while True:
+                if action == 'sleep':
+                    time.sleep(value)
+                    action, value = policy.send(None)
+                    continue
+                try:
+                    returnCode = self.runPass(command,workDir,env,value)
+                except LaTeXError as error:
+                    action, value = policy.throw(error)
+                else:
+                    action, value = policy.send(returnCode)
+        except StopIteration as finished:
+            return finished.value
+
+    def stats(self):
+        '''
+        Returns the numbers of jobs, passes, retries, timeouts and failures (dict)
+        '''
+
+        with self.lock:
+            return {name: self.counts[name] for name in ('jobs', 'passes', 'retries', 'timeouts', 'failures')}
+
+latexSupervisor = LaTeXSupervisor() # shared by the renders in this process
+
+
+##### Define method for rendering an invoice #####
+def deliverPDF(pdfPath,outputPath,name=None,move=False):
+    '''
+    Delivers the PDF at pdfPath. Returns where it went, or its contents (bytes) if outputPath is None.
+
+    outputPath: a path to save it at (string), or a sink to hand it to (OutputSink object), or None
+    name: the filename to give it in a sink (string)
+    move: True if pdfPath is a scratch file that is not needed afterwards, so it can be renamed into place rather than copied
+    '''
+
+    if outputPath is None:
+        with open(pdfPath,'rb') as pdfFile:
+            return pdfFile.read()
+    if isinstance(outputPath,OutputSink):
+        result = outputPath.put(name,pdfPath,move)
+    else:
+        placeFile(pdfPath,outputPath,move)
+        result = outputPath
+    logging.debug('PDF saved to '+result)
+    return result
+
+def deliverPDFData(pdfData,outputPath,name=None):
+    '''
+    Delivers a PDF (bytes), as for deliverPDF.
+    '''
+
+    if outputPath is None:
+        return pdfData
+    if isinstance(outputPath,OutputSink):
+        result = outputPath.putBytes(name,pdfData)
+    else:
+        writeFile(outputPath,pdfData)
+        result = outputPath
+    logging.debug('PDF saved to '+result)
+    return result
+
+def renderNative(invoice,configData,outputPath=None,timer=nullTimer):
+    '''
+    Draws an invoice with invoicePDF. Returns where the PDF went, or its contents (bytes) if no outputPath is given.
+    '''
+
+    with timer.stage('native'):
+        pdfData = invoicePDF.renderPDF(invoice,configData)
+    timer.addBytes(len(pdfData)) # counted whether the PDF is saved, handed to a sink or returned
+    if outputPath is None:
+        return pdfData
+    with timer.stage('deliver'):
+        return deliverPDFData(pdfData,outputPath,invoice.getFilename()+'.pdf')
+
+def prepareRender(invoice,configData,workDir,templatePath=templatePath,pdflatex='pdflatex',latexFormat=None,cache=None,fragmentCache=fragmentCache,timer=nullTimer):
+    '''
+    Writes everything pdflatex needs into workDir (arguments as for renderInvoice).
+
+    Returns the pdflatex command (list of strings), its environment (dict, or None to inherit it),
+    the render cache key (string, or None), and the path of the cached PDF if there is one (string, or None).
+    If there is a cached PDF, the command is None and pdflatex does not need to be run.
+    '''
+
+    with timer.stage('fragments'):
+        fragments = buildFragments(invoice,configData,fragmentCache)
+    with timer.stage('write'):
+        invoiceInfoHash = writeFragments(fragments,workDir,invoice)
+    if timer is not nullTimer:
+        timer.addBytes(sum(entry.stat().st_size for entry in os.scandir(workDir) if entry.is_file()))
+
+    cacheKey = None
+    if cache is not None:
+        with timer.stage('cache'):
+            cacheTemplatePath = latexFormat.templatePath if latexFormat else templatePath
+            if fragmentCache is not None:
+                templateData = fragmentCache.templateData(cacheTemplatePath)
+            else:
+                with open(cacheTemplatePath,'rb') as templateFile:
+                    templateData = templateFile.read()
+            cacheKey = cache.makeKey(dict(fragments, **{'TEMPinvoiceInfo.tex':'sha256:'+invoiceInfoHash}),templateData)
+            cachedPath = cache.get(cacheKey)
+        if cachedPath is not None:
+            return None, None, cacheKey, cachedPath
+
+    with timer.stage('write'):
+        if latexFormat is None:
+            shutil.copyfile(templatePath,os.path.join(workDir,"TEMPinvoice.tex"))
+            command, env = [pdflatex,'-interaction=nonstopmode','-halt-on-error','TEMPinvoice'], None
+        else:
+            formatName, body = latexFormat.ensure()
+            with open(os.path.join(workDir,"TEMPinvoice.tex"),'w') as latexFile:
+                latexFile.write(body)
+            command = [latexFormat.pdflatex,'-interaction=nonstopmode','-halt-on-error','-fmt='+formatName,'TEMPinvoice']
+            env = dict(os.environ, TEXFORMATS=latexFormat.formatDir+os.pathsep) # trailing separator keeps the default search path
+    if timer is not nullTimer:
+        timer.addBytes(os.path.getsize(os.path.join(workDir,"TEMPinvoice.tex")))
+    logging.debug("TEMPinvoice created in "+workDir)
+    return command, env, cacheKey, None
+
+def finishRender(workDir,outputPath=None,cache=None,cacheKey=None,timer=nullTimer,name=None):
+    '''
+    Stores the PDF that pdflatex made in workDir in the render cache, then delivers it
+    (renaming it into place, as the scratch copy is not needed afterwards).
+    Returns where the PDF went, or its contents (bytes) if no outputPath is given.
+    '''
+
+    pdfPath = os.path.join(workDir,'TEMPinvoice.pdf')
+    if cache is not None:
+        with timer.stage('cache'):
+            cache.put(cacheKey,pdfPath)
+    if timer is not nullTimer: # counted whether the PDF is saved, handed to a sink or returned
+        timer.addBytes(os.path.getsize(pdfPath))
+    with timer.stage('deliver'):
+        return deliverPDF(pdfPath,outputPath,name,move=True)
+
+def renderInvoice(invoice,configData,outputPath=None,templatePath=templatePath,pdflatex='pdflatex',latexFormat=None,cache=None,engine='latex',fragmentCache=fragmentCache,timer=nullTimer,supervisor=latexSupervisor):
+    '''
+    Renders an invoice to PDF.
+
+    invoice: the invoice to be generated (Invoice object)
+    configData: the config data, as returned by loadConfig (dict)
+    outputPath: where to save the PDF: a path (string), or a sink such as an ArchiveSink (OutputSink object),
+        which is given the PDF as the invoice's filename. If None, the PDF is returned as bytes.
+    templatePath: path to the LaTeX template (string)
+    pdflatex: the pdflatex command to run (string)
+    latexFormat: precompiled format to use for the preamble (LaTeXFormat object). If given,
+        the format's own template and pdflatex command are used.
+    cache: cache of rendered PDFs (RenderCache object). If the same fragments and template
+        were rendered before, the cached PDF is used and pdflatex is not run.
+    engine: 'latex' to compile the template with pdflatex, or 'native' to draw the PDF
+        directly with invoicePDF (much faster, no TeX needed; the template, format and cache are not used)
+    fragmentCache: cache of the config and customer fragments and the template (FragmentCache object).
+        Defaults to the one shared by this process; None rebuilds everything for every render.
+    timer: times the stages of the render (RenderTimer object, from Metrics.start). By default nothing is timed.
+    supervisor: runs pdflatex, with its time and memory limits and retries (LaTeXSupervisor object).
+        Defaults to the one shared by this process.
+
+    Returns where the PDF went (outputPath, or what the sink returned), or the contents of the PDF (bytes) if no outputPath is given.
+    Raises NoInputError if the invoice has no entries, and LaTeXError if pdflatex fails.
+    '''
+
+    if len(invoice.getEntries()) == 0:
+        raise NoInputError
+
+    if engine == 'native':
+        return renderNative(invoice,configData,outputPath,timer)
+    elif engine != 'latex':
+        raise ValueError("Unknown engine '{}' (expected 'latex' or 'native')".format(engine))
+
+    workDir = tempfile.mkdtemp(prefix='invoice-') # private scratch directory for this render
+    try:
+        command, env, cacheKey, cachedPath = prepareRender(invoice,configData,workDir,templatePath,pdflatex,latexFormat,cache,fragmentCache,timer)
+        if cachedPath is not None:
+            if timer is not nullTimer:
+                timer.addBytes(os.path.getsize(cachedPath))
+            with timer.stage('deliver'):
+                return deliverPDF(cachedPath,outputPath,invoice.getFilename()+'.pdf') # copied: the cache keeps its file
+
+        logging.debug("Running LaTeX...")
+        with timer.stage('latex',children=True):
+            passes = supervisor.run(command,workDir,env,singleChunk=len(invoice.getEntries()) <= longtableChunkSize)
+        timer.setPasses(passes)
+
+        return finishRender(workDir,outputPath,cache,cacheKey,timer,invoice.getFilename()+'.pdf')
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True) # delete temporary files
+
+
+##### Define method for rendering several invoices at once #####
+combinedHeader = r'''
+\pdfobjcompresslevel=0 % classic cross-reference table, so the PDF can be split into invoices
+\makeatletter\newcommand\invoicePart[1]{\def\input@path{{#1/}}}\makeatother % look for the TEMP*.tex files in the invoice's own directory
+\newwrite\invoicePages \immediate\openout\invoicePages=TEMPinvoice.pages
+\begin{document}
+''' # starts a document holding several invoices
+combinedPartEnd = r'''
+\clearpage\immediate\write\invoicePages{\number\numexpr\value{page}-1\relax}\endgroup
+\setcounter{page}{1}\setcounter{table}{0}\setcounter{footnote}{0}
+''' # ends one invoice in a combined document, recording its number of pages
+
+def splitDocument(body):
+    '''
+    Splits the part of the template after the preamble at \\begin{document} and \\end{document}.
+    Returns the definitions before the document and the document itself (tuple of strings).
+    '''
+
+    begin = body.find(r'\begin{document}')
+    end = body.rfind(r'\end{document}')
+    if begin == -1 or end == -1:
+        raise ValueError("The template has no document environment.")
+    return body[:begin], body[begin+len(r'\begin{document}'):end]
+
+def renderInvoices(invoices,configData,outputPaths,templatePath=templatePath,pdflatex='pdflatex',latexFormat=None,fragmentCache=fragmentCache,supervisor=latexSupervisor):
+    '''
+    Renders several invoices with a single pdflatex run, then splits the PDF into one file per invoice.
+
+    Each invoice gets a copy of the template's document body, inside a group so
+    its macros do not leak into the next invoice, and the page counter is reset
+    between invoices. The number of pages of each invoice is written to a file
+    as the document is compiled, and used to split the PDF.
+
+    invoices: the invoices to be generated (list of Invoice objects)
+    configData: the config data, as returned by loadConfig (dict)
+    outputPaths: where to save each invoice's PDF (list of strings), or one sink for all of them (OutputSink object)
+    templatePath, pdflatex, latexFormat, fragmentCache, supervisor: as for renderInvoice
+
+    Returns where each PDF went (list of strings).
+    Raises NoInputError if an invoice has no entries, LaTeXError if pdflatex fails (for any of the invoices),
+    and RuntimeError if pdflatex does not finish the document.
+    '''
+
+    for invoice in invoices:
+        if len(invoice.getEntries()) == 0:
+            raise NoInputError
+
+    if latexFormat is None:
+        with open(templatePath,'r') as templateFile:
+            preamble, body = splitTemplate(templateFile.read())
+    else:
+        formatName, body = latexFormat.ensure()
+        preamble = ''
+    definitions, document = splitDocument(body)
+
+    workDir = tempfile.mkdtemp(prefix='invoices-') # private scratch directory for this render
+    try:
+        with open(os.path.join(workDir,"TEMPinvoice.tex"),'w') as latexFile:
+            latexFile.write(preamble)
+            latexFile.write(combinedHeader)
+            for index, invoice in enumerate(invoices):
+                partDir = 'invoice{}'.format(index)
+                os.mkdir(os.path.join(workDir,partDir))
+                writeFragments(buildFragments(invoice,configData,fragmentCache),os.path.join(workDir,partDir),invoice)
+                latexFile.write(r'\begingroup\invoicePart{' + partDir + '}\n')
+                latexFile.write(definitions)
+                latexFile.write(document)
+                latexFile.write(combinedPartEnd)
+            latexFile.write('\\immediate\\closeout\\invoicePages\n\\end{document}\n')
+        logging.debug("TEMPinvoice created in {} with {} invoices".format(workDir, len(invoices)))
+
+        if latexFormat is None:
+            command, env = [pdflatex,'-interaction=nonstopmode','-halt-on-error','TEMPinvoice'], None
+        else:
+            command = [latexFormat.pdflatex,'-interaction=nonstopmode','-halt-on-error','-fmt='+formatName,'TEMPinvoice']
+            env = dict(os.environ, TEXFORMATS=latexFormat.formatDir+os.pathsep) # trailing separator keeps the default search path
+
+        logging.debug("Running LaTeX...")
+        supervisor.run(command,workDir,env,singleChunk=all(len(invoice.getEntries()) <= longtableChunkSize for invoice in invoices))
+
+        try:
+            with open(os.path.join(workDir,'TEMPinvoice.pages'),'r') as pagesFile:
+                pageCounts = [int(line) for line in pagesFile if line.strip()]
+            with open(os.path.join(workDir,'TEMPinvoice.pdf'),'rb') as pdfFile:
+                pdfData = pdfFile.read()
+        except OSError:
+            pageCounts = []
+        if len(pageCounts) != len(invoices):
+            raise RuntimeError("pdflatex did not finish the combined document ({} of {} invoices)".format(len(pageCounts), len(invoices)))
+
+        if isinstance(outputPaths,OutputSink):
+            outputPaths = [outputPaths] * len(invoices)
+        return [deliverPDFData(invoiceData,outputPath,invoice.getFilename()+'.pdf') for invoice, outputPath, invoiceData in zip(invoices, outputPaths, invoicePDF.splitPDF(pdfData,pageCounts))]
+    finally:
+        shutil.rmtree(workDir, ignore_errors=True) # delete temporary files
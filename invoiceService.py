@@ -0,0 +1,395 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Render service for Invoice Generator
+(invoiceService.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+A long-running service that renders invoices sent to it, so billing jobs do not
+pay the start-up cost of a new generator process for every document.
+
+Requests are queued in a bounded queue and handled by a pool of warm worker
+processes. When the queue is full, new requests wait (up to a timeout) before
+being turned away, so a fast client cannot build an unbounded backlog.
+
+The protocol is JSON lines, over a Unix socket or stdin/stdout. Each request
+is one JSON object on one line; each response is one line with the same "id".
+
+    {"id": 1, "op": "render", "invoice": {...}, "config": {...}, "output": "/path/to.pdf"}
+    {"id": 2, "op": "health"}
+    {"id": 3, "op": "stats"}
+
+The "invoice" object has "customer" ({"accountName", "name", "address",
+"number"}), "entries", and optional "shipping" and "discount", as in a batch
+manifest. "config" is optional if the service was started with a config file.
+"engine" is optional: "latex" (the default) or "native".
+Without an "output" path, the PDF is returned base64-encoded in "pdf".
+
+Usage: python3 invoiceService.py --socket /tmp/invoices.sock --workers 4
+       python3 invoiceService.py --stdio
+'''
+
+# Import modules
+import json
+import os, sys, time
+import stat
+import base64
+import argparse
+import queue, threading
+import socketserver
+import concurrent.futures
+import logging
+from invoiceObjects import *
+from invoiceRenderer import loadConfig, renderInvoice, LaTeXFormat, FragmentCache
+from invoiceCache import RenderCache
+from invoiceBatch import buildInvoice
+
+
+##### Define methods run in the worker processes #####
+def _warmWorker():
+    '''
+    Runs once in each worker when the service starts, so the first real job does not pay for process start-up.
+    '''
+
+    return os.getpid()
+
+def _renderPayload(invoiceData,configData,outputPath,latexFormat,cache,engine):
+    '''
+    Builds and renders an invoice from a request payload in a worker process.
+    Returns the filename, either the output path or the PDF, and the render cache counters for this render (dict, or None) (tuple)
+    '''
+
+    customerData = invoiceData['customer']
+    customerAccounts = {customerData['accountName'].lower(): CustomerAccount(customerData['accountName'],customerData['name'],customerData['address'],int(customerData.get('number',0)))}
+    spec = dict(invoiceData, account=customerData['accountName'])
+    invoice = buildInvoice(customerAccounts,spec)
+
+    before = cache.counters() if cache is not None else None # the copy sent to this worker starts with the service's counts
+    result = renderInvoice(invoice,configData,outputPath=outputPath,latexFormat=latexFormat,cache=cache,engine=engine)
+    counters = None if cache is None else {name: count - before[name] for name, count in cache.counters().items()}
+    return invoice.getFilename(), result, counters
+
+
+##### Define the service #####
+class ServiceBusyError(Exception):
+    '''
+    Exception for when the request queue stays full for longer than the submit timeout.
+    '''
+
+    pass
+
+
+class RenderService(object):
+    '''
+    A queue of render requests handled by a pool of warm worker processes.
+    '''
+
+    def __init__(self,configData=None,workers=None,queueSize=100,submitTimeout=30.,precompile=True,cache=None):
+        '''
+        configData: default config data for requests that do not include any (dict)
+        workers: number of worker processes, defaults to the number of CPUs (int)
+        queueSize: maximum number of requests waiting for a worker (int)
+        submitTimeout: seconds to wait for space in a full queue before turning a request away (float)
+        precompile: if True, the template preamble is precompiled into a LaTeX format (bool)
+        cache: cache of rendered PDFs, shared by the workers (RenderCache object)
+        '''
+
+        self.configData = configData
+        self.workers = workers or os.cpu_count()
+        self.queue = queue.Queue(maxsize=queueSize)
+        self.submitTimeout = submitTimeout
+        self.precompile = precompile
+        self.cache = cache
+        self.latexFormat = None
+        self.pool = None
+        self.dispatchers = []
+        self.lock = threading.Lock()
+        self.startTime = None
+        self.inFlight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.renderTime = 0.
+
+    def start(self):
+        '''
+        Starts the worker processes and the dispatcher threads.
+        '''
+
+        if self.precompile:
+            self.latexFormat = LaTeXFormat()
+            try:
+                self.latexFormat.ensure()
+            except (OSError, ValueError, RuntimeError) as error:
+                logging.warning("Could not build the precompiled preamble ({}). Compiling the full template instead.".format(error))
+                self.latexFormat = None
+
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=self.workers)
+        warmJobs = [self.pool.submit(_warmWorker) for worker in range(self.workers)]
+        concurrent.futures.wait(warmJobs)
+
+        for worker in range(self.workers): # one dispatcher per worker, so at most `workers` jobs are in the pool
+            dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+            dispatcher.start()
+            self.dispatchers.append(dispatcher)
+
+        self.startTime = time.time()
+        logging.info("Render service started with {} workers".format(self.workers))
+
+    def stop(self):
+        '''
+        Finishes the queued requests and stops the workers.
+        '''
+
+        for dispatcher in self.dispatchers:
+            self.queue.put(None)
+        for dispatcher in self.dispatchers:
+            dispatcher.join()
+        self.dispatchers = []
+        self.pool.shutdown()
+
+    def submit(self,request,respond):
+        '''
+        Queues a render request. respond is called with the response (dict) when it is done.
+        Raises ServiceBusyError if the queue stays full for longer than submitTimeout.
+        '''
+
+        try:
+            self.queue.put((request, respond), timeout=self.submitTimeout)
+        except queue.Full:
+            with self.lock:
+                self.rejected += 1
+            raise ServiceBusyError("The render queue is full ({} requests waiting)".format(self.queue.maxsize))
+
+    def _dispatch(self):
+        '''
+        Takes requests from the queue and runs them on the pool, one at a time.
+        '''
+
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            request, respond = job
+
+            with self.lock:
+                self.inFlight += 1
+            start = time.perf_counter()
+            response = {'id':request.get('id')}
+            try:
+                configData = request.get('config') or self.configData
+                future = self.pool.submit(_renderPayload, request['invoice'], configData, request.get('output'), self.latexFormat, self.cache, request.get('engine', 'latex'))
+                filename, result, counters = future.result()
+                if counters is not None:
+                    with self.lock:
+                        self.cache.addCounters(counters)
+                response['ok'] = True
+                response['filename'] = filename
+                if request.get('output'):
+                    response['output'] = result
+                else:
+                    response['pdf'] = base64.b64encode(result).decode('ascii')
+                succeeded = True
+            except Exception as error:
+                response['ok'] = False
+                response['error'] = "{}: {}".format(type(error).__name__, error)
+                succeeded = False
+            elapsed = time.perf_counter() - start
+
+            with self.lock:
+                self.inFlight -= 1
+                self.renderTime += elapsed
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            respond(response)
+
+    def checkRequest(self,request):
+        '''
+        Checks that a render request has everything a worker needs, so a bad request is answered straight away.
+        Raises ValueError describing the first problem found.
+        '''
+
+        invoiceData = request.get('invoice')
+        if not isinstance(invoiceData,dict):
+            raise ValueError("The request has no 'invoice' object")
+        customerData = invoiceData.get('customer')
+        if not isinstance(customerData,dict):
+            raise ValueError("The invoice has no 'customer' object")
+        missing = [key for key in ('accountName','name','address') if key not in customerData]
+        if missing:
+            raise ValueError("The customer is missing {}".format(', '.join("'{}'".format(key) for key in missing)))
+        if not isinstance(invoiceData.get('entries'),list):
+            raise ValueError("The invoice has no 'entries' list")
+
+        configData = request.get('config') or self.configData
+        if configData is None:
+            raise ValueError("The request has no config and the service has no default config")
+        if not isinstance(configData,dict):
+            raise ValueError("The config must be an object")
+        missing = [key for key in FragmentCache.configKeys if key not in configData]
+        if missing:
+            raise ValueError("The config is missing {}".format(', '.join("'{}'".format(key) for key in missing)))
+
+    def stats(self):
+        '''
+        Returns the queue depth and job counts (dict)
+        '''
+
+        with self.lock:
+            finished = self.completed + self.failed
+            return {
+                'queued': self.queue.qsize(),
+                'queueSize': self.queue.maxsize,
+                'inFlight': self.inFlight,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'workers': self.workers,
+                'meanRenderSeconds': self.renderTime / finished if finished else 0.,
+                'uptimeSeconds': time.time() - self.startTime if self.startTime else 0.,
+                'cache': self.cache.counters() if self.cache is not None else None,
+                }
+
+    def health(self):
+        '''
+        Returns the health of the service (dict): 'ok', or 'busy' when the queue is full.
+        '''
+
+        alive = all(dispatcher.is_alive() for dispatcher in self.dispatchers) and len(self.dispatchers) > 0
+        if not alive:
+            status = 'down'
+        elif self.queue.full():
+            status = 'busy'
+        else:
+            status = 'ok'
+        return {'status':status, 'queued':self.queue.qsize(), 'inFlight':self.inFlight}
+
+    def handleLine(self,line,respond):
+        '''
+        Handles one line of the protocol. respond is called with the response (dict).
+        '''
+
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            respond({'id':None, 'ok':False, 'error':"Invalid JSON: {}".format(error)})
+            return
+        if not isinstance(request,dict):
+            respond({'id':None, 'ok':False, 'error':"A request must be a JSON object"})
+            return
+
+        op = request.get('op', 'render')
+        if op == 'health':
+            respond(dict(self.health(), id=request.get('id'), ok=True))
+        elif op == 'stats':
+            respond(dict(self.stats(), id=request.get('id'), ok=True))
+        elif op == 'render':
+            try:
+                self.checkRequest(request)
+                self.submit(request, respond)
+            except (ValueError, ServiceBusyError) as error:
+                respond({'id':request.get('id'), 'ok':False, 'error':str(error)})
+        else:
+            respond({'id':request.get('id'), 'ok':False, 'error':"Unknown op '{}'".format(op)})
+
+
+##### Define the transports #####
+def _lineWriter(stream):
+    '''
+    Returns a thread-safe function that writes a response (dict) as one JSON line to stream.
+    '''
+
+    lock = threading.Lock()
+    def respond(response):
+        data = (json.dumps(response) + '\n').encode('utf-8')
+        with lock:
+            stream.write(data)
+            stream.flush()
+    return respond
+
+def serveStdio(service):
+    '''
+    Reads requests from stdin and writes responses to stdout until stdin is closed.
+    '''
+
+    respond = _lineWriter(sys.stdout.buffer)
+    for line in sys.stdin:
+        if line.strip():
+            service.handleLine(line, respond)
+
+def removeStaleSocket(path):
+    '''
+    Removes a socket left at path by an earlier run. Raises FileExistsError if something other than a socket is there.
+    '''
+
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError("{} exists and is not a socket".format(path))
+    os.remove(path)
+
+def serveUnixSocket(service,path):
+    '''
+    Serves requests on a Unix socket at path until interrupted.
+    Raises FileExistsError if there is already a file at path that is not a socket.
+    '''
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            respond = _lineWriter(self.wfile)
+            for line in self.rfile:
+                if line.strip():
+                    service.handleLine(line.decode('utf-8'), respond)
+
+    removeStaleSocket(path)
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(path)
+
+
+##### Main Thread #####
+
+if __name__ == "__main__":
+
+    import invoiceSettings
+
+    parser = argparse.ArgumentParser(description="Run a render service for invoices.")
+    transport = parser.add_mutually_exclusive_group(required=True)
+    transport.add_argument('--socket', help="path of the Unix socket to listen on")
+    transport.add_argument('--stdio', action='store_true', help="read requests from stdin and write responses to stdout")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--queue-size', type=int, default=100, help="maximum number of requests waiting for a worker")
+    parser.add_argument('--config', default=invoiceSettings.pathToConfig, help="default config.json for requests without a config")
+    parser.add_argument('--no-format', dest='precompile', action='store_false', help="compile the full template for every invoice instead of using a precompiled preamble")
+    parser.add_argument('--no-cache', dest='useCache', action='store_false', help="always run pdflatex, even for invoices that have been rendered before")
+    args = parser.parse_args()
+
+    if args.socket:
+        try:
+            removeStaleSocket(args.socket) # before starting the workers
+        except FileExistsError as error:
+            sys.exit("Cannot listen on {}".format(error))
+
+    configData = loadConfig(args.config) if os.path.exists(args.config) else None
+    cache = RenderCache() if args.useCache else None
+    service = RenderService(configData=configData, workers=args.workers, queueSize=args.queue_size, precompile=args.precompile, cache=cache)
+    service.start()
+    try:
+        if args.stdio:
+            serveStdio(service)
+        else:
+            serveUnixSocket(service, args.socket)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
@@ -0,0 +1,31 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Settings for Invoice Generator
+(invoiceSettings.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Where Invoice Generator keeps its files. The interactive script, the batch
+mode and the render service all take their defaults from here, so importing
+this module has no side effects.
+'''
+
+# Import modules
+import os
+
+
+# Options
+pathToSave = os.path.expanduser('~/Dropbox/Invoices/')# set destination directory of generated invoices
+pathToCSV = os.path.expanduser('~/Desktop/invoiceData.csv')
+pathToUsageCSV = os.path.expanduser('~/Desktop/usageData.csv') # raw usage rows, grouped into one line per ID, description and rate
+usageSort = 'amount' # order of the grouped usage lines: None (as they appear), 'id', 'amount' or 'qty'
+usageTopN = None # if set, only this many usage lines are kept and the rest are added up into one "other" line
+pathToBillingCSV = os.path.expanduser('~/Desktop/billingData.csv') # rows for many customers, with the account code in the first column
+pathToRejects = os.path.expanduser('~/Desktop/billingRejects.csv') # rows of pathToBillingCSV for unknown account codes, or that cannot be imported, are written here
+pathToCustomers = os.path.expanduser('~/Dropbox/Invoices/customers.db') # SQLite database ('.json' files are also supported)
+pathToCustomersJSON = os.path.expanduser('~/Dropbox/Invoices/customers.json') # customer data from older versions, moved into pathToCustomers on first run
+pathToConfig = os.path.expanduser('~/Dropbox/Invoices/config.json')
+pathToDrafts = os.path.expanduser('~/Dropbox/Invoices/drafts.jsonl') # journal of invoices, so they can be reopened and edited
+pathToMetrics = os.environ.get('INVOICE_METRICS') # if set, the stage times of each invoice are appended to this JSON-lines file
@@ -0,0 +1,142 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for the customer stores and invoice number allocation
+(tests/test_customerStore.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import multiprocessing
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import CustomerAccount, Invoice
+from customerStore import InvoiceNumberAllocator, openCustomerStore
+
+
+def _allocateMany(path,count,results):
+    '''
+    Takes `count` invoice numbers for ACME one at a time, in a separate process, and puts them on results.
+    '''
+
+    store = openCustomerStore(path)
+    allocator = InvoiceNumberAllocator(store)
+    results.put([allocator.next('ACME') for index in range(count)])
+    store.close()
+
+
+class StoreTests(object):
+    '''
+    Tests run against both stores. Subclasses set suffix.
+    '''
+
+    suffix = None
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testCustomerStore-')
+        self.path = os.path.join(self.directory, 'customers'+self.suffix)
+        store = openCustomerStore(self.path)
+        store.saveAccount(CustomerAccount('ACME','Acme Ltd',r'1 Road\\ Town',1))
+        store.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def testNumbersAreUniqueAcrossProcesses(self):
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=_allocateMany, args=(self.path, 20, results)) for index in range(4)]
+        for process in processes:
+            process.start()
+        numbers = [number for process in processes for number in results.get(timeout=60)]
+        for process in processes:
+            process.join()
+
+        self.assertEqual(sorted(numbers), list(range(2, 82)))
+
+    def testReservedNumbersAreVoidedOnClose(self):
+        store = openCustomerStore(self.path)
+        allocator = InvoiceNumberAllocator(store)
+        allocator.reserve('ACME', 3)
+        self.assertEqual(allocator.next('ACME'), 2)
+        allocator.close()
+
+        self.assertEqual(store.getVoided('ACME'), [3, 4])
+        self.assertEqual(InvoiceNumberAllocator(store).next('ACME'), 5)
+        store.close()
+
+    def testDiscardingAReopenedDraftVoidsItsOwnNumber(self):
+        store = openCustomerStore(self.path)
+        customerAccounts = store.load()
+        InvoiceNumberAllocator(store).attach(customerAccounts)
+        older = Invoice(customerAccounts, 'acme', quiet=True)
+        newer = Invoice(customerAccounts, 'acme', quiet=True)
+
+        customerAccounts['acme'].resetNumber(older.getNumber())
+
+        self.assertEqual(store.getVoided('ACME'), [older.getNumber()])
+        self.assertNotIn(newer.getNumber(), store.getVoided('ACME'))
+        store.close()
+
+    def testSavingDoesNotMoveNumbersBack(self):
+        store = openCustomerStore(self.path)
+        customerAccounts = store.load()
+        other = openCustomerStore(self.path)
+        other.allocateNumbers('ACME', 5)
+        other.close()
+
+        store.saveAll(customerAccounts)
+        store.close()
+
+        self.assertEqual(openCustomerStore(self.path).load()['acme'].getNumber(), 6)
+
+    def testSavingKeepsAccountsAddedElsewhere(self):
+        store = openCustomerStore(self.path)
+        customerAccounts = store.load()
+        other = openCustomerStore(self.path)
+        other.saveAccount(CustomerAccount('NEWCO','New Co','2 Street',0))
+        other.close()
+
+        store.saveAll(customerAccounts)
+        store.close()
+
+        self.assertIn('newco', openCustomerStore(self.path).load())
+
+    def testSavingOneAccountLeavesTheOthers(self):
+        store = openCustomerStore(self.path)
+        store.saveAccount(CustomerAccount('NEWCO','New Co','2 Street',0))
+        store.saveAccount(CustomerAccount('ACME','Acme Limited','1 Road',1))
+        store.close()
+
+        customerAccounts = openCustomerStore(self.path).load()
+        self.assertEqual(sorted(customerAccounts), ['acme', 'newco'])
+        self.assertEqual(customerAccounts['acme'].getName(), 'Acme Limited')
+
+
+class JSONCustomerStoreTests(StoreTests,unittest.TestCase):
+    suffix = '.json'
+
+
+class SQLiteCustomerStoreTests(StoreTests,unittest.TestCase):
+    suffix = '.db'
+
+
+class AccountWithoutAllocatorTests(unittest.TestCase):
+
+    def testResetOnlyMovesBackTheLatestNumber(self):
+        account = CustomerAccount('ACME','Acme Ltd','1 Road',3)
+
+        account.resetNumber(2)
+        self.assertEqual(account.getNumber(), 3)
+
+        account.resetNumber(3)
+        self.assertEqual(account.getNumber(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for asyncio rendering, with fake pdflatex commands
+(tests/test_invoiceAsync.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import time
+import asyncio
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import CustomerAccount, Invoice
+from invoiceRenderer import LaTeXSupervisor
+import invoiceAsync
+from invoiceAsync import AsyncRenderer
+from test_invoiceRenderer import fakeLaTeX
+
+configData = {'userName':'Test User', 'userAddress':r'1 Street\\ Town', 'userPhoneNumber':'01234 567890', 'userEmail':'test@example.com',
+              'accountNumber':'12345678', 'sortCode':'123456', 'sortCodeFormatted':'12--34--56'}
+
+def makeInvoice(number):
+    '''
+    Returns an invoice with one entry (Invoice object)
+    '''
+
+    invoice = Invoice({'acme': CustomerAccount('ACME','Acme Ltd','1 Road',number-1)}, 'acme', quiet=True)
+    invoice.addEntries(['A1'], ['Widgets'], [2.5], [4.0])
+    return invoice
+
+def processExists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+class AsyncRendererTests(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testAsync-')
+        self.pidFile = os.path.join(self.directory, 'pids')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def fake(self,seconds):
+        '''
+        Returns a fake pdflatex that records its process id, waits, and makes a PDF (string)
+        '''
+
+        return fakeLaTeX(self.directory, 'open({!r},"a").write("%d\\n" % os.getpid())\n'
+                                         'time.sleep({})\n'
+                                         'open(jobName+".pdf","wb").write(b"%PDF-1.4 fake")\n'.format(self.pidFile, seconds))
+
+    def pids(self):
+        with open(self.pidFile) as pidFile:
+            return [int(line) for line in pidFile]
+
+    async def testConcurrencyIsLimited(self):
+        renderer = AsyncRenderer(configData, maxConcurrent=2, pdflatex=self.fake(0.3), supervisor=LaTeXSupervisor())
+        mostInFlight = 0
+        async def watch():
+            nonlocal mostInFlight
+            while True:
+                mostInFlight = max(mostInFlight, renderer.inFlight)
+                await asyncio.sleep(0.01)
+        watcher = asyncio.ensure_future(watch())
+
+        results = await renderer.renderMany([makeInvoice(number) for number in range(1, 6)])
+        watcher.cancel()
+
+        self.assertEqual(results, [b'%PDF-1.4 fake'] * 5)
+        self.assertEqual(mostInFlight, 2)
+        self.assertEqual((renderer.stats()['rendered'], renderer.stats()['latexPasses']), (5, 5))
+
+    async def testTimeoutKillsPdflatex(self):
+        renderer = AsyncRenderer(configData, timeout=0.5, pdflatex=self.fake(30), supervisor=LaTeXSupervisor())
+
+        start = time.monotonic()
+        with self.assertRaises(asyncio.TimeoutError):
+            await renderer.render(makeInvoice(1))
+
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(renderer.stats()['timedOut'], 1)
+        self.assertFalse(any(processExists(pid) for pid in self.pids()))
+
+    async def testCancellingKillsPdflatex(self):
+        renderer = AsyncRenderer(configData, pdflatex=self.fake(30), supervisor=LaTeXSupervisor())
+        task = asyncio.ensure_future(renderer.render(makeInvoice(1)))
+        while not os.path.exists(self.pidFile):
+            await asyncio.sleep(0.05)
+
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        self.assertEqual(renderer.stats()['cancelled'], 1)
+        self.assertFalse(any(processExists(pid) for pid in self.pids()))
+
+    async def testCancellingWaitsForFileWriting(self):
+        prepareRender = invoiceAsync.prepareRender
+        writing = threading.Event()
+        finished = []
+        def slowPrepare(invoice,configData,workDir,*args):
+            writing.set()
+            time.sleep(0.3)
+            result = prepareRender(invoice,configData,workDir,*args) # fails if workDir has been removed
+            finished.append(workDir)
+            return result
+        invoiceAsync.prepareRender = slowPrepare
+        try:
+            renderer = AsyncRenderer(configData, pdflatex=self.fake(0), supervisor=LaTeXSupervisor())
+            task = asyncio.ensure_future(renderer.render(makeInvoice(1)))
+            while not writing.is_set():
+                await asyncio.sleep(0.01)
+
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        finally:
+            invoiceAsync.prepareRender = prepareRender
+
+        self.assertEqual(len(finished), 1) # the thread finished writing before the cancellation went through
+        self.assertFalse(os.path.exists(finished[0])) # and then the scratch directory was removed
+        self.assertFalse(os.path.exists(self.pidFile)) # pdflatex never started
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for building invoices in batch mode
+(tests/test_invoiceBatch.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys
+import subprocess
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import CustomerAccount, NoInputError
+from invoiceBatch import buildInvoice
+
+
+class BuildInvoiceTests(unittest.TestCase):
+
+    def setUp(self):
+        self.customerAccounts = {'acme': CustomerAccount('ACME','Acme Ltd','1 Road',4)}
+        self.entries = [{'id': 'A1', 'description': 'Widgets', 'rate': 2.5, 'qty': 4}]
+
+    def testGoodSpecification(self):
+        invoice = buildInvoice(self.customerAccounts, {'account': 'ACME', 'entries': self.entries, 'shipping': 5, 'discount': '1.50'})
+
+        self.assertEqual(invoice.getNumber(), 5)
+        self.assertEqual((invoice.subTotalPence, invoice.shippingPence, invoice.discountPence), (1000, 500, 150))
+
+    def testBadSpecificationsUseNoNumber(self):
+        specs = [{'account': 'acme', 'entries': self.entries, 'shipping': 1e300},
+                 {'account': 'acme', 'entries': self.entries, 'discount': 'nan'},
+                 {'account': 'acme', 'entries': [{'id': 'A1', 'description': 'Widgets', 'rate': 'inf', 'qty': 1}]},
+                 {'account': 'acme', 'entries': [{'id': '', 'description': 'Widgets', 'rate': 1, 'qty': 1}]},
+                 {'account': 'acme', 'entries': []},
+                 {'account': 'nobody', 'entries': self.entries}]
+        for spec in specs:
+            with self.assertRaises((ValueError, KeyError, NoInputError)):
+                buildInvoice(self.customerAccounts, spec)
+
+        self.assertEqual(self.customerAccounts['acme'].getNumber(), 4)
+
+    def testBatchDoesNotLoadTheInteractiveScript(self):
+        code = "import sys, invoiceBatch; print('invoiceGenerator' in sys.modules)"
+        directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+        output = subprocess.run([sys.executable, '-c', code], cwd=directory, capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.strip(), 'False')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for the render cache
+(tests/test_invoiceCache.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import invoiceCache
+from invoiceCache import RenderCache
+
+
+class CountingCache(RenderCache):
+    '''
+    A RenderCache that counts the times it scans the directory to evict entries.
+    '''
+
+    scans = 0
+
+    def evict(self):
+        self.scans += 1
+        super().evict()
+
+
+class RenderCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testCache-')
+        self.cache = CountingCache(os.path.join(self.directory, 'renders'), maxBytes=250)
+        self.clock = 1000000000 # modification times set by age, so the order does not depend on the file system's clock
+
+    def tearDown(self):
+        invoiceCache._cacheSizes.pop(os.path.abspath(self.cache.directory), None)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def put(self,key,size):
+        '''
+        Caches a PDF of size bytes under key, as the most recently used entry.
+        '''
+
+        pdfPath = os.path.join(self.directory, 'source.pdf')
+        with open(pdfPath,'wb') as pdfFile:
+            pdfFile.write(b'%' * size)
+        self.cache.put(key, pdfPath)
+        self.clock += 10
+        os.utime(self.cache.getPath(key), (self.clock, self.clock))
+
+    def runningTotal(self):
+        return invoiceCache._cacheSizes.get(os.path.abspath(self.cache.directory))
+
+    def cachedKeys(self):
+        return sorted(os.path.basename(path)[:-4] for mtime, size, path in self.cache.entries())
+
+    def testLeastRecentlyUsedIsEvicted(self):
+        self.put('a', 100)
+        self.put('b', 100)
+        self.assertIsNotNone(self.cache.get('a')) # a is now newer than b
+
+        self.put('c', 100)
+
+        self.assertEqual(self.cachedKeys(), ['a', 'c'])
+        self.assertEqual(self.runningTotal(), 200)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.counters(), {'hits': 1, 'misses': 1, 'stores': 3, 'evictions': 1})
+
+    def testOldestGoFirstUntilWithinTheLimit(self):
+        self.put('a', 100)
+        self.put('b', 100)
+        self.put('c', 200)
+
+        self.assertEqual(self.cachedKeys(), ['c'])
+        self.assertEqual(self.runningTotal(), 200)
+
+    def testRunningTotalAvoidsScans(self):
+        self.put('a', 50)
+        self.assertEqual(self.cache.scans, 1) # the first put finds the size of the directory
+        self.put('b', 50)
+        self.put('a', 80) # replacing an entry counts only the difference
+
+        self.assertEqual(self.cache.scans, 1)
+        self.assertEqual(self.runningTotal(), 130)
+        self.assertEqual(self.cache.stats()['bytes'], 130)
+
+    def testInvalidate(self):
+        self.put('a', 100)
+        self.put('b', 100)
+
+        self.cache.invalidate('a')
+        self.assertEqual(self.cachedKeys(), ['b'])
+        self.assertIsNone(self.runningTotal()) # rescanned at the next put
+        self.put('c', 100)
+        self.assertEqual(self.runningTotal(), 200)
+
+        self.cache.invalidate()
+        self.assertEqual(self.cachedKeys(), [])
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def testCountersFromWorkersAddUp(self):
+        self.cache.get('missing')
+        self.cache.addCounters({'hits': 2, 'misses': 1, 'stores': 1, 'evictions': 0})
+
+        self.assertEqual(self.cache.counters(), {'hits': 2, 'misses': 2, 'stores': 1, 'evictions': 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
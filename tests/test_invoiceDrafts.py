@@ -0,0 +1,134 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for the invoice drafts journal
+(tests/test_invoiceDrafts.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import CustomerAccount, Invoice
+from invoiceDrafts import DraftJournal
+
+
+class DraftJournalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testDrafts-')
+        self.path = os.path.join(self.directory, 'drafts.jsonl')
+        self.customerAccounts = {'acme': CustomerAccount('ACME','Acme Ltd','1 Road',0)}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def newInvoice(self,journal):
+        '''
+        Returns a tracked invoice with some changes of every kind (Invoice object)
+        '''
+
+        invoice = Invoice(self.customerAccounts, 'acme', quiet=True)
+        journal.track(invoice)
+        invoice.addEntries(['A1', 'B2', 'C3'], ['First', 'Second', 'Third'], [1.5, 2.0, 0.25], [2.0, 1.0, 4.0])
+        invoice.removeEntry(1)
+        invoice.addShipping(4.5)
+        invoice.addDiscount(1.25)
+        invoice.addDiscount(0.75)
+        return invoice
+
+    def assertSameContent(self,invoice,restored):
+        entries, restoredEntries = invoice.getEntries(), restored.getEntries()
+        self.assertEqual(restored.getInvoiceCode(latex=False), invoice.getInvoiceCode(latex=False))
+        self.assertEqual(list(restoredEntries.ids), list(entries.ids))
+        self.assertEqual(list(restoredEntries.rates), list(entries.rates))
+        self.assertEqual(list(restoredEntries.qtys), list(entries.qtys))
+        self.assertEqual((restored.shippingPence, restored.discountPence), (invoice.shippingPence, invoice.discountPence))
+        self.assertEqual(restored.subTotalPence, invoice.subTotalPence)
+
+    def testReplayRebuildsTheInvoice(self):
+        invoice = self.newInvoice(DraftJournal(self.path))
+
+        restored = DraftJournal(self.path).restore(invoice.getInvoiceCode(latex=False), self.customerAccounts)
+
+        self.assertSameContent(invoice, restored)
+        self.assertEqual(list(restored.getEntries().ids), ['A1', 'C3'])
+        self.assertEqual((restored.shippingPence, restored.discountPence), (450, 200))
+
+    def testCompactKeepsEveryDraft(self):
+        journal = DraftJournal(self.path)
+        invoice = self.newInvoice(journal)
+        discarded = self.newInvoice(journal)
+        journal.discard(discarded)
+        before = os.path.getsize(self.path)
+
+        journal.compact()
+
+        self.assertLess(os.path.getsize(self.path), before)
+        reloaded = DraftJournal(self.path)
+        self.assertEqual([draft['code'] for draft in reloaded.getDrafts()], [invoice.getInvoiceCode(latex=False)])
+        self.assertSameContent(invoice, reloaded.restore(invoice.getInvoiceCode(latex=False), self.customerAccounts))
+
+    def testChangesAfterCompactAreKept(self):
+        journal = DraftJournal(self.path)
+        invoice = self.newInvoice(journal)
+        journal.compact()
+
+        invoice.addShipping(1)
+
+        restored = DraftJournal(self.path).restore(invoice.getInvoiceCode(latex=False), self.customerAccounts)
+        self.assertEqual(restored.shippingPence, 550)
+
+    def testDiscardedDraftsAreNotReplayed(self):
+        journal = DraftJournal(self.path)
+        invoice = self.newInvoice(journal)
+        journal.discard(invoice)
+        invoice.addShipping(1) # no longer journaled
+
+        self.assertEqual(DraftJournal(self.path).getDrafts(), [])
+
+    def testOnlyChangedInvoicesNeedRendering(self):
+        journal = DraftJournal(self.path)
+        invoice = self.newInvoice(journal)
+        outputPath = os.path.join(self.directory, 'invoice.pdf')
+        open(outputPath,'wb').close()
+        self.assertTrue(journal.needsRender(invoice))
+
+        journal.markRendered(invoice, outputPath)
+        self.assertFalse(DraftJournal(self.path).needsRender(invoice))
+
+        invoice.addDiscount(1)
+        self.assertTrue(journal.needsRender(invoice))
+
+    def testChangedRenderInputsNeedRendering(self):
+        journal = DraftJournal(self.path)
+        invoice = self.newInvoice(journal)
+        outputPath = os.path.join(self.directory, 'invoice.pdf')
+        open(outputPath,'wb').close()
+        journal.markRendered(invoice, outputPath, 'config and template 1')
+
+        self.assertFalse(DraftJournal(self.path).needsRender(invoice, renderInputs='config and template 1'))
+        self.assertTrue(DraftJournal(self.path).needsRender(invoice, renderInputs='config and template 2'))
+
+    def testMissingPDFNeedsRendering(self):
+        journal = DraftJournal(self.path)
+        invoice = self.newInvoice(journal)
+        journal.markRendered(invoice, os.path.join(self.directory, 'missing.pdf'))
+
+        self.assertTrue(journal.needsRender(invoice))
+
+    def testRestoringForAMissingCustomerFails(self):
+        invoice = self.newInvoice(DraftJournal(self.path))
+
+        with self.assertRaises(KeyError):
+            DraftJournal(self.path).restore(invoice.getInvoiceCode(latex=False), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
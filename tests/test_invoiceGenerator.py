@@ -0,0 +1,114 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for the menus of the interactive script, driven by --script
+(tests/test_invoiceGenerator.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import json
+import subprocess
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import CommandStream
+from customerStore import openCustomerStore
+from invoiceDrafts import DraftJournal
+from test_invoiceRenderer import fakeLaTeX
+
+generatorPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'invoiceGenerator.py')
+configData = {'userName':'Test User', 'userAddress':r'1 Street\\ Town', 'userPhoneNumber':'01234 567890', 'userEmail':'test@example.com',
+              'accountNumber':'12345678', 'sortCode':'123456', 'sortCodeFormatted':'12--34--56'}
+
+
+class CommandStreamTests(unittest.TestCase):
+
+    def testScriptedAnswers(self):
+        stream = CommandStream(['1\n', '\n', 'ACME\r\n'], echo=False)
+
+        self.assertEqual([stream.read('>> ') for index in range(3)], ['1', '', 'ACME'])
+        self.assertEqual(stream.lineNumber, 3)
+        with self.assertRaises(EOFError):
+            stream.read('>> ')
+
+
+class ScriptedSessionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testGenerator-')
+        self.home = os.path.join(self.directory, 'home')
+        self.invoices = os.path.join(self.home, 'Dropbox', 'Invoices')
+        os.makedirs(self.invoices)
+        with open(os.path.join(self.invoices, 'config.json'),'w') as configFile:
+            json.dump(configData, configFile)
+        binDir = os.path.join(self.directory, 'bin')
+        os.mkdir(binDir)
+        fakeLaTeX(binDir, 'if "-ini" in args:\n'
+                          '    open(jobName+".fmt","w").write("format")\n'
+                          'else:\n'
+                          '    open(jobName+".pdf","wb").write(b"%PDF-1.4 fake")\n')
+        self.env = dict(os.environ, HOME=self.home, XDG_CACHE_HOME=os.path.join(self.directory, 'cache'), PATH=binDir+os.pathsep+os.environ['PATH'])
+        self.env.pop('INVOICE_METRICS', None)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def runScript(self,lines):
+        '''
+        Runs the interactive script with lines as its answers. Returns what it printed (string)
+        '''
+
+        scriptPath = os.path.join(self.directory, 'script.txt')
+        with open(scriptPath,'w') as scriptFile:
+            scriptFile.write('\n'.join(lines) + '\n')
+        finished = subprocess.run([sys.executable, generatorPath, '--script', scriptPath], env=self.env, capture_output=True, text=True, timeout=120)
+        self.assertEqual(finished.returncode, 0, finished.stderr)
+        return finished.stdout
+
+    def testSession(self):
+        output = self.runScript(['2', 'Acme Ltd', '1 Road', 'Town', '', 'ACME',   # new customer, with a two-line address
+                                 '1', 'ACME', '1', 'A1', 'Widgets', '2.5', '4', 'exit', # ACME_001: one entry, saved as a draft
+                                 '1', 'ACME', '1', 'B1', 'Bolts', '1', '3', '5',        # ACME_002: one entry, generated
+                                 '3', 'ACME_001', 'del',                                # reopen ACME_001 and discard it
+                                 'exit'])
+
+        self.assertIn("Successfully created new customer account: ACME", output)
+        self.assertIn("Invoice generated successfully! (invoice_ACME_002.pdf for £3.00)", output)
+        self.assertIn("Invoice discarded.", output)
+        pdfPath = os.path.join(self.invoices, 'invoice_ACME_002.pdf')
+        self.assertTrue(os.path.exists(pdfPath))
+        self.assertEqual([draft['code'] for draft in DraftJournal(os.path.join(self.invoices, 'drafts.jsonl')).getDrafts()], ['ACME_002'])
+        store = openCustomerStore(os.path.join(self.invoices, 'customers.db'))
+        self.assertEqual(store.getVoided('ACME'), [1]) # the discarded draft's own number
+        self.assertEqual(store.get('ACME').getAddress(), r'1 Road\\ Town')
+        store.close()
+
+        os.remove(pdfPath)
+        output = self.runScript(['5', 'exit'])
+
+        self.assertIn("1 invoice(s) regenerated.", output)
+        self.assertTrue(os.path.exists(pdfPath))
+        self.assertIn("0 invoice(s) regenerated.", self.runScript(['5', 'exit']))
+
+        with open(os.path.join(self.invoices, 'config.json'),'w') as configFile:
+            json.dump(dict(configData, userPhoneNumber='09876 543210'), configFile)
+        self.assertIn("1 invoice(s) regenerated.", self.runScript(['5', 'exit'])) # the config is on every PDF
+
+    def testEndOfScriptKeepsTheDraft(self):
+        output = self.runScript(['2', 'Acme Ltd', '1 Road', '', 'ACME',
+                                 '1', 'acm', '1', '1', 'A1', 'Widgets', '2.5', '4']) # ends in the invoice menu; 'acm' is searched for
+
+        self.assertIn("Invoice saved as a draft.", output)
+        self.assertIn("Goodbye!", output)
+        drafts = DraftJournal(os.path.join(self.invoices, 'drafts.jsonl')).getDrafts()
+        self.assertEqual([(draft['code'], draft['ids']) for draft in drafts], [('ACME_001', ['A1'])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for checking the rows of imported CSV files
+(tests/test_invoiceImport.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import csv
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import CustomerAccount, Invoice
+from invoiceImport import importEntries, importByCustomer, UsageAggregate, fileRanges, aggregateRange, aggregateUsage
+
+
+class ImportTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testImport-')
+        self.customerAccounts = {'acme': CustomerAccount('ACME','Acme Ltd','1 Road',0),
+                                 'bolt': CustomerAccount('BOLT','Bolt & Co','2 Street',7)}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def writeCSV(self,header,rows):
+        '''
+        Writes a CSV file in the test directory. Returns its path (string)
+        '''
+
+        path = os.path.join(self.directory, 'rows.csv')
+        with open(path,'w',newline='') as csvFile:
+            csv.writer(csvFile).writerows([header] + rows)
+        return path
+
+    def testNonFiniteAndHugeValuesAreRowErrors(self):
+        path = self.writeCSV(['ID', 'Description', 'Rate', 'Quantity'],
+                             [['A1', 'Good', '1.50', '2'], ['A2', 'NaN rate', 'nan', '1'], ['A3', 'Infinite quantity', '1', 'inf'],
+                              ['A4', 'Huge rate', '1e300', '1'], ['A5', 'Huge amount', '1e7', '1e7'], ['A6', 'Good', '0.25', '4']])
+        invoice = Invoice(self.customerAccounts, 'acme', quiet=True)
+
+        report = importEntries(path, invoice)
+
+        self.assertEqual((report.rowsRead, report.rowsImported, report.errorCount), (6, 2, 4))
+        self.assertEqual([rowNumber for rowNumber, message in report.errors], [3, 4, 5, 6])
+        self.assertEqual(list(invoice.getEntries().ids), ['A1', 'A6'])
+        self.assertEqual(invoice.subTotalPence, 400)
+
+    def testBadRowsGoToTheRejectFile(self):
+        path = self.writeCSV(['Account', 'ID', 'Description', 'Rate', 'Quantity'],
+                             [['ACME', 'A1', 'Good', '1', '1'], ['NOBODY', 'N1', 'Unknown account', '1', '1'], ['ACME', 'A2', 'Bad', 'nan', '1']])
+        rejectPath = os.path.join(self.directory, 'rejects.csv')
+
+        invoices, report = importByCustomer(path, self.customerAccounts, rejectPath=rejectPath)
+
+        self.assertEqual((report.rowsImported, report.rowsRejected, report.errorCount), (1, 1, 1))
+        with open(rejectPath, newline='') as rejectFile:
+            rejected = list(csv.reader(rejectFile))
+        self.assertEqual(rejected[0], ['Account', 'ID', 'Description', 'Rate', 'Quantity'])
+        self.assertEqual(sorted(row[1] for row in rejected[1:]), ['A2', 'N1'])
+
+    def testCustomerWithOnlyBadRowsGetsNoNumber(self):
+        path = self.writeCSV(['Account', 'ID', 'Description', 'Rate', 'Quantity'],
+                             [['BOLT', 'B1', 'Bad', 'inf', '1'], ['ACME', 'A1', 'Good', '1', '1'], ['BOLT', 'B2', 'Bad', '1', 'x']])
+
+        invoices, report = importByCustomer(path, self.customerAccounts)
+
+        self.assertEqual([invoice.getCustomer().getAccountName() for invoice in invoices], ['ACME'])
+        self.assertEqual(self.customerAccounts['bolt'].getNumber(), 7)
+        self.assertEqual(self.customerAccounts['acme'].getNumber(), 1)
+
+
+class UsageTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testUsage-')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def writeUsage(self,rows):
+        '''
+        Writes a usage CSV file, with a header row, in the test directory. Returns its path (string)
+        '''
+
+        path = os.path.join(self.directory, 'usage.csv')
+        with open(path,'w',newline='') as csvFile:
+            csv.writer(csvFile).writerows([['ID', 'Description', 'Rate', 'Quantity']] + rows)
+        return path
+
+    def usageRows(self,count):
+        '''
+        Returns count usage rows in five groups, with a bad row every 37 rows (list of lists)
+        '''
+
+        return [['U{}'.format(index % 5), 'Usage {}'.format(index % 5), '0.{}'.format(index % 5 + 1), 'bad' if index % 37 == 0 else '2']
+                for index in range(count)]
+
+    def testRangesMergeToTheSingleProcessResult(self):
+        path = self.writeUsage(self.usageRows(400))
+        single, singleReport = aggregateUsage(path)
+
+        ranges = fileRanges(path, 4)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual((ranges[0][0], ranges[-1][1]), (0, os.path.getsize(path)))
+        merged = UsageAggregate()
+        for start, end in ranges:
+            groups, report, lineCount = aggregateRange(path, start, end)
+            self.assertIsNotNone(lineCount)
+            merged.merge(groups)
+        self.assertEqual(list(merged.groups.items()), list(single.groups.items()))
+
+        parallel, parallelReport = aggregateUsage(path, workers=4)
+        self.assertEqual(list(parallel.groups.items()), list(single.groups.items())) # same groups, in the order first seen
+        self.assertEqual((parallelReport.rowsRead, parallelReport.rowsImported, parallelReport.errorCount), (400, 389, 11))
+        self.assertEqual(parallelReport.errors, singleReport.errors) # row numbers count from the top of the file, not the range
+        self.assertEqual(parallelReport.errors[1], (39, "quantity 'bad' is not a number"))
+
+    def testQuotedLineBreaksAreGroupedOnOneProcess(self):
+        rows = self.usageRows(200)
+        for row in rows[::3]:
+            row[1] += '\nsecond line'
+        path = self.writeUsage(rows)
+        single, singleReport = aggregateUsage(path)
+
+        self.assertIn(None, [aggregateRange(path, start, end)[2] for start, end in fileRanges(path, 4)])
+        parallel, parallelReport = aggregateUsage(path, workers=4)
+
+        self.assertEqual(list(parallel.groups.items()), list(single.groups.items()))
+        self.assertEqual(len(parallel), 10)
+        self.assertEqual((parallelReport.rowsRead, parallelReport.errors), (200, singleReport.errors))
+
+    def testTopNCollapsesTheRestIntoOneLine(self):
+        aggregate = UsageAggregate()
+        aggregate.add(['A', 'B', 'C', 'D', 'A'], ['a', 'b', 'c', 'd', 'a'], [1., 10., 0.5, 0.25, 1.], [1., 1., 3., 2., 2.])
+
+        ids, descriptions, rates, qtys = aggregate.columns(sortBy='id', topN=2)
+
+        self.assertEqual(ids, ['A', 'B', 'OTHER'])
+        self.assertEqual(descriptions, ['a', 'b', 'Other usage (2 lines)'])
+        self.assertEqual(rates, [1., 10., 2.])  # £1.50 + £0.50
+        self.assertEqual(qtys, [3., 1., 1.])
+        self.assertEqual(aggregate.columns(topN=4), aggregate.columns()) # no more lines than topN: nothing collapsed
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for the render metrics
+(tests/test_invoiceMetrics.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import json
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceMetrics import Histogram, Metrics, RenderTimer, JSONLinesSink, PrometheusSink, nullTimer
+
+
+def makeRecord(name,wall,passes=1,error=None):
+    '''
+    Returns a render record with one 'latex' stage taking wall seconds (dict)
+    '''
+
+    return {'invoice': name, 'entries': 3, 'bytesWritten': 100, 'latexPasses': passes, 'wall': wall, 'cpu': wall / 2,
+            'stages': {'latex': {'wall': wall, 'cpu': wall / 2}}, 'time': 0., 'error': error}
+
+
+class HistogramTests(unittest.TestCase):
+
+    def testBucketsIncludeTheirUpperBound(self):
+        histogram = Histogram((0.1, 1.))
+        for value in (0.05, 0.1, 0.5, 1., 7.):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 2, 1])
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1., 4), ('+Inf', 5)])
+        self.assertEqual((histogram.count, histogram.max), (5, 7.))
+        self.assertAlmostEqual(histogram.sum, 8.65)
+
+
+class MetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testMetrics-')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def testTimerRecordsStages(self):
+        metrics = Metrics()
+        timer = RenderTimer(metrics, 'invoice_ACME_001', 3)
+        with timer.stage('write'):
+            pass
+        with timer.stage('write'):
+            pass
+        timer.addBytes(10)
+        timer.addBytes(5)
+        timer.setPasses(2)
+
+        record = timer.finish()
+
+        self.assertEqual(set(record['stages']), {'write'})
+        self.assertEqual((record['bytesWritten'], record['latexPasses'], record['error']), (15, 2, None))
+        self.assertEqual((metrics.renders, metrics.bytesWritten, metrics.latexPasses[2]), (1, 15, 1))
+        self.assertEqual(metrics.histograms['total'].count, 1)
+
+    def testNullTimerRecordsNothing(self):
+        with nullTimer.stage('latex', children=True):
+            nullTimer.addBytes(10)
+        self.assertIsNone(nullTimer.finish())
+
+    def testJSONLinesSink(self):
+        path = os.path.join(self.directory, 'renders.jsonl')
+        metrics = Metrics([JSONLinesSink(path)])
+        metrics.record(makeRecord('first', 0.2))
+        metrics.record(makeRecord('second', 0.4, error="LaTeXError('failed')"))
+        metrics.close()
+
+        with open(path) as jsonFile:
+            records = [json.loads(line) for line in jsonFile]
+        self.assertEqual([record['invoice'] for record in records], ['first', 'second'])
+        self.assertEqual(metrics.failures, 1)
+
+    def testPrometheusSink(self):
+        path = os.path.join(self.directory, 'invoices.prom')
+        metrics = Metrics([PrometheusSink(path, interval=3600)], buckets=(0.1, 1.))
+        metrics.record(makeRecord('first', 0.05))
+        with open(path) as promFile:
+            first = promFile.read() # written at the first record, then not again within the interval
+        metrics.record(makeRecord('second', 0.5, passes=3))
+        with open(path) as promFile:
+            self.assertEqual(promFile.read(), first)
+
+        metrics.close()
+
+        with open(path) as promFile:
+            lines = promFile.read().splitlines()
+        self.assertIn('invoice_stage_seconds_bucket{stage="latex",le="0.1"} 1', lines)
+        self.assertIn('invoice_stage_seconds_bucket{stage="latex",le="+Inf"} 2', lines)
+        self.assertIn('invoice_stage_seconds_count{stage="total"} 2', lines)
+        self.assertIn('invoice_latex_passes_total{passes="3"} 1', lines)
+        self.assertIn('invoice_renders_total 2', lines)
+        self.assertIn('invoice_bytes_written_total 200', lines)
+        self.assertEqual([name for name in os.listdir(self.directory)], ['invoices.prom']) # no temporary files left
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for money amounts, the entry table and the customer search index
+(tests/test_invoiceObjects.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceObjects import CustomerAccount, CustomerIndex, EntryTable, InvoiceEntry, Invoice, toPence, linePence, linePenceColumn, maxPounds
+
+
+class MoneyTests(unittest.TestCase):
+
+    def testAmountsAreRoundedToPence(self):
+        self.assertEqual(toPence(1.005), 101)
+        self.assertEqual(toPence('12.34'), 1234)
+        self.assertEqual(linePence(0.125, 3), 38)
+
+    def testBadAmountsRaiseValueError(self):
+        for value in (float('nan'), float('inf'), 'abc', maxPounds * 10):
+            with self.assertRaises(ValueError):
+                toPence(value)
+        for rate, qty in ((float('nan'), 1), (float('inf'), 0), (1e300, 1e300)):
+            with self.assertRaises(ValueError):
+                linePence(rate, qty)
+
+    def testColumnsRoundLikeSingleLines(self):
+        rates = [1.005, 0.125, 2.675, -0.005, 0.0, 1e-6, 4294.967295, 0.1 + 0.2, 12.3456789]
+        qtys = [1.0, 3.0, 1.0, 1.0, 5.0, 0.5, 1000.0, 3.0, 7.0]
+        generator = random.Random(1)
+        rates += [round(generator.uniform(-50, 5000), generator.choice([0, 2, 4])) for index in range(1000)]
+        qtys += [round(generator.uniform(0, 200), generator.choice([0, 1, 3])) for index in range(1000)]
+
+        self.assertEqual(linePenceColumn(rates, qtys), [linePence(rate, qty) for rate, qty in zip(rates, qtys)])
+        self.assertEqual(linePenceColumn(rates[9:], qtys[9:]), [linePence(rate, qty) for rate, qty in zip(rates[9:], qtys[9:])]) # all scaled exactly
+
+    def testBadColumnsRaiseValueError(self):
+        for rates, qtys in (([1.0, float('nan')], [1.0, 1.0]), ([1.0], [float('inf')]), ([4e9], [4e9])):
+            with self.assertRaises(ValueError):
+                linePenceColumn(rates, qtys)
+
+    def testBadShippingLeavesTheInvoiceUnchanged(self):
+        invoice = Invoice({'acme': CustomerAccount('ACME','Acme Ltd','1 Road',0)}, 'acme', quiet=True)
+
+        with self.assertRaises(ValueError):
+            invoice.addShipping(float('nan'))
+
+        self.assertEqual((invoice.shippingPence, invoice.showShipping), (0, False))
+
+
+class EntryTableTests(unittest.TestCase):
+
+    def setUp(self):
+        self.table = EntryTable()
+        self.total = self.table.extend(['A1', 'B2', 'A1'], ['Widgets & bolts', 'Hire 50%', 'Widgets & bolts'], [2.5, 0.125, 1.005], [4.0, 3.0, 1.0])
+
+    def testExtend(self):
+        self.assertEqual(self.total, 1000 + 38 + 101)
+        self.assertEqual(list(self.table.amounts), [1000, 38, 101])
+        self.assertIs(self.table.descriptions[0], self.table.descriptions[2]) # repeated strings are shared
+        self.assertEqual(self.table.append(InvoiceEntry('C3', 'Fee', 10.0, 1.0)), 1000)
+        self.assertEqual([entry.getID() for entry in self.table], ['A1', 'B2', 'A1', 'C3'])
+
+    def testBadBatchAddsNothing(self):
+        with self.assertRaises(ValueError):
+            self.table.extend(['C3', 'D4'], ['Fee', 'Fee'], [1.0, float('nan')], [1.0, 1.0])
+
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual((len(self.table.ids), len(self.table.rates)), (3, 3))
+
+    def testRemove(self):
+        self.assertEqual(self.table.remove(1), 38)
+
+        self.assertEqual(len(self.table), 2)
+        self.assertEqual([(entry.getID(), entry.getRate(), entry.getQty()) for entry in self.table], [('A1', 2.5, 4.0), ('A1', 1.005, 1.0)])
+        self.assertEqual(self.table[-1].getAmountPence(), 101)
+
+    def testFormatRows(self):
+        self.table.extend(['R1'], ['Refund'], [-1.5], [1.0])
+
+        self.assertEqual(list(self.table.formatRows()), [r"A1 & Widgets \& bolts & 2.50 & 4.0 & 10.00 \\",
+                                                         r"B2 & Hire 50\% & 0.12 & 3.0 & 0.38 \\",
+                                                         r"A1 & Widgets \& bolts & 1.00 & 1.0 & 1.01 \\",
+                                                         r"R1 & Refund & -1.50 & 1.0 & -1.50 \\"])
+
+
+class CustomerIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.customerAccounts = {'acme': CustomerAccount('ACME','Acme Widgets Ltd','1 Road',0),
+                                 'bolt': CustomerAccount('BOLT','Bolt & Co','2 Street',0)}
+        self.index = CustomerIndex(self.customerAccounts)
+
+    def testReaddingAnAccountDoesNotDuplicateIt(self):
+        self.customerAccounts['acme'] = CustomerAccount('ACME','Zenith Holdings','1 Road',0)
+        self.index.add(self.customerAccounts['acme'])
+
+        accounts, total = self.index.browse()
+        self.assertEqual(total, 2)
+        self.assertEqual(self.index.rank('zenith'), ['acme'])
+        self.assertEqual(self.index.rank('widgets'), [])
+
+    def testAddedAccountsCanBeFound(self):
+        self.customerAccounts['crane'] = CustomerAccount('CRANE','Crane Hire','3 Lane',0)
+        self.index.add(self.customerAccounts['crane'])
+
+        self.assertEqual(self.index.rank('hire'), ['crane'])
+        self.assertEqual(self.index.browse()[1], 3)
+
+    def testRemovedAccountsAreNotFound(self):
+        self.index.remove('bolt')
+
+        self.assertEqual(self.index.rank('bolt'), [])
+        self.assertEqual(self.index.browse()[1], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
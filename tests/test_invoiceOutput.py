@@ -0,0 +1,100 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for the output sinks
+(tests/test_invoiceOutput.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import io
+import stat
+import zipfile, tarfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceOutput import DirectorySink, FileSink, ArchiveSink, fileMode
+
+
+class SinkTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testOutput-')
+        self.pdfPath = os.path.join(self.directory, 'TEMPinvoice.pdf')
+        with open(self.pdfPath,'wb') as pdfFile:
+            pdfFile.write(b'%PDF-1.4 first')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def assertPlaced(self,path,data):
+        with open(path,'rb') as placedFile:
+            self.assertEqual(placedFile.read(), data)
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), fileMode)
+
+    def testDirectorySink(self):
+        outputDir = os.path.join(self.directory, 'out')
+        os.mkdir(outputDir)
+        sink = DirectorySink(outputDir)
+
+        self.assertEqual(sink.put('invoice_ACME_001.pdf', self.pdfPath), os.path.join(outputDir, 'invoice_ACME_001.pdf'))
+        sink.putBytes('invoice_ACME_002.pdf', b'%PDF-1.4 second')
+        sink.put('invoice_ACME_003.pdf', self.pdfPath, move=True)
+
+        self.assertPlaced(os.path.join(outputDir, 'invoice_ACME_001.pdf'), b'%PDF-1.4 first')
+        self.assertPlaced(os.path.join(outputDir, 'invoice_ACME_002.pdf'), b'%PDF-1.4 second')
+        self.assertPlaced(os.path.join(outputDir, 'invoice_ACME_003.pdf'), b'%PDF-1.4 first')
+        self.assertFalse(os.path.exists(self.pdfPath)) # moved, not copied
+        self.assertEqual(sorted(os.listdir(outputDir)), ['invoice_ACME_001.pdf', 'invoice_ACME_002.pdf', 'invoice_ACME_003.pdf']) # no temporary files left
+
+    def testDirectorySinkReplacesFile(self):
+        outputPath = os.path.join(self.directory, 'invoice_ACME_001.pdf')
+        with open(outputPath,'wb') as oldFile:
+            oldFile.write(b'old')
+        os.chmod(outputPath, 0o600)
+
+        DirectorySink(self.directory).putBytes('invoice_ACME_001.pdf', b'new')
+
+        self.assertPlaced(outputPath, b'new')
+
+    def testFileSink(self):
+        stream = io.BytesIO()
+        with FileSink(stream) as sink:
+            self.assertEqual(sink.put('invoice_ACME_001.pdf', self.pdfPath), 'invoice_ACME_001.pdf')
+            sink.putBytes('invoice_ACME_002.pdf', b'%PDF-1.4 second')
+
+        self.assertEqual(stream.getvalue(), b'%PDF-1.4 first%PDF-1.4 second')
+
+    def testZipSink(self):
+        archivePath = os.path.join(self.directory, 'invoices.zip')
+        with ArchiveSink(archivePath) as sink:
+            sink.put('invoice_ACME_001.pdf', self.pdfPath)
+            sink.putBytes('invoice_ACME_002.pdf', b'%PDF-1.4 second')
+
+        with zipfile.ZipFile(archivePath) as archive:
+            self.assertEqual(archive.namelist(), ['invoice_ACME_001.pdf', 'invoice_ACME_002.pdf'])
+            self.assertEqual(archive.read('invoice_ACME_002.pdf'), b'%PDF-1.4 second')
+
+    def testTarStream(self):
+        stream = io.BytesIO()
+        with ArchiveSink(stream, 'tar.gz') as sink:
+            sink.put('invoice_ACME_001.pdf', self.pdfPath)
+            sink.putBytes('invoice_ACME_002.pdf', b'%PDF-1.4 second')
+
+        stream.seek(0)
+        with tarfile.open(fileobj=stream, mode='r:gz') as archive:
+            self.assertEqual(archive.getnames(), ['invoice_ACME_001.pdf', 'invoice_ACME_002.pdf'])
+            self.assertEqual(archive.extractfile('invoice_ACME_001.pdf').read(), b'%PDF-1.4 first')
+
+    def testUnknownFormat(self):
+        with self.assertRaises(ValueError):
+            ArchiveSink(io.BytesIO(), '7z')
+
+
+if __name__ == "__main__":
+    unittest.main()
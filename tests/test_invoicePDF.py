@@ -0,0 +1,66 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for splitting PDFs
+(tests/test_invoicePDF.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys
+import zlib
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoicePDF import PDFDocument, PDFReader, splitPDF
+
+
+def makePDF(numOfPages):
+    '''
+    Returns a PDF (bytes) whose pages say 'Page 1', 'Page 2'...
+    '''
+
+    document = PDFDocument()
+    for index in range(numOfPages):
+        document.newPage().text(72, 720, 'Page {}'.format(index+1))
+    return document.toBytes()
+
+def pageTexts(data):
+    '''
+    Returns the 'Page n' labels on each page of a PDF, in order (list of strings)
+    '''
+
+    reader = PDFReader(data)
+    texts = []
+    for number, inherited in reader.getPages():
+        page = reader.getObject(number)[0]
+        contents = zlib.decompress(reader.getObject(int(page.split(b'/Contents ')[1].split()[0]))[1])
+        texts.append(contents.split(b'(')[1].split(b')')[0].decode())
+    return texts
+
+
+class SplitPDFTests(unittest.TestCase):
+
+    def testPartsHoldConsecutivePages(self):
+        parts = splitPDF(makePDF(6), [1, 3, 2])
+
+        self.assertEqual([pageTexts(part) for part in parts], [['Page 1'], ['Page 2', 'Page 3', 'Page 4'], ['Page 5', 'Page 6']])
+
+    def testPartsAreValidPDFs(self):
+        for part in splitPDF(makePDF(3), [2, 1]):
+            self.assertTrue(part.startswith(b'%PDF'))
+            self.assertTrue(part.rstrip().endswith(b'%%EOF'))
+
+    def testPageCountsMustAddUp(self):
+        with self.assertRaises(ValueError):
+            splitPDF(makePDF(3), [1, 1])
+        with self.assertRaises(ValueError):
+            splitPDF(makePDF(3), [2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for running pdflatex, with fake pdflatex commands
+(tests/test_invoiceRenderer.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import time
+import logging
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceRenderer import LaTeXFormat, LaTeXSupervisor, LaTeXError, LaTeXTimeout, templatePath, parseLaTeXLog, checkPass, needsRerun, auxHash
+
+
+def fakeLaTeX(directory,body,log='',name='pdflatex'):
+    '''
+    Writes a fake pdflatex to directory: a Python script that answers --version and otherwise runs body,
+    with jobName (the -jobname, or the name of the .tex file), args and log (the text given) set. Returns its path (string)
+    '''
+
+    path = os.path.join(directory,name)
+    with open(path,'w') as scriptFile:
+        scriptFile.write('#!{}\n'.format(sys.executable))
+        scriptFile.write('import sys, os, time\n'
+                         'args = sys.argv[1:]\n'
+                         'if args == ["--version"]:\n'
+                         '    print("Fake pdfTeX 1.0"); sys.exit(0)\n'
+                         'jobName = [arg[9:] for arg in args if arg.startswith("-jobname=")] or [os.path.splitext(args[-1])[0]]\n'
+                         'jobName = jobName[0]\n'
+                         'log = {!r}\n'.format(log))
+        scriptFile.write(body)
+    os.chmod(path,0o755)
+    return path
+
+
+class LaTeXFormatTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testRenderer-')
+        self.formatDir = os.path.join(self.directory, 'formats')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def testBuildsTheFormat(self):
+        pdflatex = fakeLaTeX(self.directory, 'open(jobName+".fmt","w").write("format")\n')
+        latexFormat = LaTeXFormat(templatePath, self.formatDir, pdflatex)
+
+        name, body = latexFormat.ensure()
+
+        self.assertTrue(os.path.exists(os.path.join(self.formatDir, name+'.fmt')))
+        self.assertEqual([entry for entry in os.listdir(self.formatDir) if not entry.endswith('.fmt')], []) # no build directories left
+
+    def testFailedBuildRaisesWithTheLogErrors(self):
+        pdflatex = fakeLaTeX(self.directory, 'open(jobName+".log","w").write(log)\nsys.exit(1)\n',
+                             log="This is a log\n! LaTeX Error: File `missing.sty' not found.\n\nl.3 \\usepackage{missing}\n")
+        latexFormat = LaTeXFormat(templatePath, self.formatDir, pdflatex)
+
+        with self.assertLogs(level=logging.ERROR) as logs, self.assertRaises(LaTeXError) as raised:
+            latexFormat.ensure()
+
+        self.assertEqual(raised.exception.errors[0]['line'], 3)
+        self.assertIn('missing.sty', raised.exception.errors[0]['message'])
+        self.assertIn('missing.sty', '\n'.join(logs.output)) # the end of the log is logged
+
+    def testNoFormatFileIsAnError(self):
+        pdflatex = fakeLaTeX(self.directory, 'sys.exit(0)\n')
+
+        with self.assertRaises(LaTeXError), self.assertLogs(level=logging.ERROR):
+            LaTeXFormat(templatePath, self.formatDir, pdflatex).ensure()
+
+    def testHungBuildIsKilled(self):
+        pdflatex = fakeLaTeX(self.directory, 'time.sleep(60)\n')
+        latexFormat = LaTeXFormat(templatePath, self.formatDir, pdflatex, supervisor=LaTeXSupervisor(timeout=0.5))
+
+        start = time.monotonic()
+        with self.assertRaises(LaTeXTimeout), self.assertLogs(level=logging.ERROR):
+            latexFormat.ensure()
+
+        self.assertLess(time.monotonic() - start, 10)
+
+
+failingLog = """This is pdfTeX, Version 3.14 (fake)
+! Undefined control sequence.
+l.42 \\invoiceTotall
+                  {12.00}
+! Emergency stop.
+*** (job aborted, no legal \\end found)
+
+! LaTeX Error: File `missing.sty' not found.
+
+Type X to quit or <RETURN> to proceed,
+l.3 \\usepackage{missing}
+"""
+
+# Fake pdflatex passes: each counts its pass in TEMPpasses and makes a PDF
+passCounter = ('count = int(open("TEMPpasses").read()) + 1 if os.path.exists("TEMPpasses") else 1\n'
+               'open("TEMPpasses","w").write(str(count))\n'
+               'open(jobName+".pdf","w").write("pdf")\n')
+
+
+def processRunning(pid):
+    '''
+    Returns True if the process pid exists and has not finished (a zombie has finished) (bool)
+    '''
+
+    try:
+        with open('/proc/{}/stat'.format(pid)) as statFile:
+            return statFile.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+class SupervisorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testSupervisor-')
+        self.workDir = os.path.join(self.directory, 'work')
+        os.mkdir(self.workDir)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def writeWorkFile(self,name,text):
+        with open(os.path.join(self.workDir, name),'w') as workFile:
+            workFile.write(text)
+
+    def runFake(self,supervisor,body,log=''):
+        '''
+        Runs a fake pdflatex with body through supervisor. Returns the number of passes (int)
+        '''
+
+        pdflatex = fakeLaTeX(self.directory, body, log)
+        return supervisor.run([pdflatex, '-interaction=nonstopmode', 'TEMPinvoice.tex'], self.workDir)
+
+    def testParseLaTeXLog(self):
+        errors = parseLaTeXLog(failingLog)
+
+        self.assertEqual([error['message'] for error in errors], ['Undefined control sequence.', 'Emergency stop.', "LaTeX Error: File `missing.sty' not found."])
+        self.assertEqual((errors[0]['line'], errors[0]['context']), (42, '\\invoiceTotall'))
+        self.assertEqual((errors[1]['line'], errors[1]['context']), (None, '')) # the next error comes before any l. line
+        self.assertEqual(errors[2]['line'], 3)
+        self.assertEqual(parseLaTeXLog("This is pdfTeX\nOutput written on TEMPinvoice.pdf (1 page).\n"), [])
+
+    def testCheckPass(self):
+        with self.assertRaises(LaTeXError) as raised:
+            checkPass(self.workDir, -9)
+        self.assertTrue(raised.exception.transient)
+
+        self.writeWorkFile('TEMPinvoice.log', failingLog)
+        with self.assertRaises(LaTeXError) as raised:
+            checkPass(self.workDir, 1)
+        self.assertFalse(raised.exception.transient)
+        self.assertEqual(len(raised.exception.errors), 3)
+        self.assertIn("Undefined control sequence", str(raised.exception))
+
+        with self.assertRaises(LaTeXError): # return code 0, but no PDF
+            checkPass(self.workDir, 0)
+        self.writeWorkFile('TEMPinvoice.pdf', 'pdf')
+        checkPass(self.workDir, 0)
+
+    def testNeedsRerun(self):
+        self.writeWorkFile('TEMPinvoice.aux', 'first')
+        self.writeWorkFile('TEMPinvoice.log', 'Output written on TEMPinvoice.pdf\n')
+        self.assertEqual(needsRerun(self.workDir, None), (False, auxHash(self.workDir))) # a first pass has nothing to compare with
+        self.assertEqual(needsRerun(self.workDir, auxHash(self.workDir)), (False, auxHash(self.workDir)))
+
+        before = auxHash(self.workDir)
+        self.writeWorkFile('TEMPinvoice.aux', 'second')
+        self.assertTrue(needsRerun(self.workDir, before)[0])
+
+        self.writeWorkFile('TEMPinvoice.log', 'LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.\n')
+        self.assertTrue(needsRerun(self.workDir, None)[0])
+
+        self.writeWorkFile('TEMPinvoice.log', 'Package longtable Warning: Column widths have changed\n(longtable)                in table 1 on input line 40.\n')
+        self.assertTrue(needsRerun(self.workDir, None)[0])
+        self.assertFalse(needsRerun(self.workDir, None, singleChunk=True)[0]) # one chunk: its widths are right after one pass
+
+    def testRerunsUntilTheAuxFileSettles(self):
+        supervisor = LaTeXSupervisor()
+        body = passCounter + ('open(jobName+".aux","w").write(str(min(count, 2)))\n'
+                              'open(jobName+".log","w").write(log if count == 1 else "")\n')
+
+        passes = self.runFake(supervisor, body, log='LaTeX Warning: There were undefined references.\nRerun to get cross-references right.\n')
+
+        self.assertEqual(passes, 3) # a rerun warning, then the .aux file changes once
+        self.assertEqual(supervisor.stats(), {'jobs': 1, 'passes': 3, 'retries': 0, 'timeouts': 0, 'failures': 0})
+
+    def testPassLimit(self):
+        supervisor = LaTeXSupervisor(maxPasses=3)
+        body = passCounter + 'open(jobName+".log","w").write(log)\n'
+
+        with self.assertLogs(level=logging.WARNING):
+            passes = self.runFake(supervisor, body, log='Rerun LaTeX.\n')
+
+        self.assertEqual(passes, 3)
+        with open(os.path.join(self.workDir, 'TEMPpasses')) as passesFile:
+            self.assertEqual(passesFile.read(), '3')
+
+    def testFailedPassRaisesWithTheLogErrors(self):
+        supervisor = LaTeXSupervisor(backoff=0.)
+
+        with self.assertRaises(LaTeXError) as raised:
+            self.runFake(supervisor, passCounter + 'open(jobName+".log","w").write(log)\nsys.exit(1)\n', log=failingLog)
+
+        self.assertEqual(raised.exception.errors[0]['line'], 42)
+        self.assertEqual(supervisor.stats()['failures'], 1)
+        self.assertEqual(supervisor.stats()['passes'], 1) # errors in the log are not worth trying again
+
+    def testKilledPassIsTriedAgain(self):
+        supervisor = LaTeXSupervisor(backoff=0.)
+        body = passCounter + ('if count == 1:\n'
+                              '    os.kill(os.getpid(), 9)\n')
+
+        with self.assertLogs(level=logging.WARNING):
+            passes = self.runFake(supervisor, body)
+
+        self.assertEqual(passes, 1)
+        self.assertEqual(supervisor.stats()['retries'], 1)
+
+    def testTimeoutKillsThePassAndItsChildren(self):
+        supervisor = LaTeXSupervisor(timeout=0.5, backoff=0.)
+        body = ('import subprocess\n'
+                'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])\n'
+                'open("TEMPchild","w").write(str(child.pid))\n'
+                'open(jobName+".log","w").write(log)\n'
+                'time.sleep(60)\n')
+
+        start = time.monotonic()
+        with self.assertRaises(LaTeXTimeout) as raised:
+            self.runFake(supervisor, body, log=failingLog)
+
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(len(raised.exception.errors), 3) # the log so far
+        self.assertEqual(supervisor.stats()['timeouts'], 1)
+        with open(os.path.join(self.workDir, 'TEMPchild')) as childFile:
+            childPID = int(childFile.read())
+        for attempt in range(50): # the child is killed with pdflatex's process group
+            if not processRunning(childPID):
+                break
+            time.sleep(0.1)
+        self.assertFalse(processRunning(childPID))
+
+
+if __name__ == "__main__":
+    unittest.main()
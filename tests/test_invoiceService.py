@@ -0,0 +1,149 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+Tests for the render service
+(tests/test_invoiceService.py)
+
+Author: Samuel Searles-Bryant
+Date created: 2026-10-17
+
+Usage: python3 -m unittest discover tests
+'''
+
+# Import modules
+import os, sys, shutil, tempfile
+import json
+import base64
+import socket
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from invoiceService import RenderService, removeStaleSocket
+
+configData = {'userName':'Test User', 'userAddress':r'1 Street\\ Town', 'userPhoneNumber':'01234 567890', 'userEmail':'test@example.com',
+              'accountNumber':'12345678', 'sortCode':'123456', 'sortCodeFormatted':'12--34--56'}
+invoiceData = {'customer': {'accountName':'ACME', 'name':'Acme Ltd', 'address':'1 Road', 'number':4},
+               'entries': [{'id':'A1', 'description':'Widgets', 'rate':2.5, 'qty':4}], 'shipping': 5}
+
+
+class Responses(object):
+    '''
+    Collects the responses to handleLine, and lets a test wait for them.
+    '''
+
+    def __init__(self):
+        self.responses = []
+        self.arrived = threading.Condition()
+
+    def __call__(self,response):
+        with self.arrived:
+            self.responses.append(response)
+            self.arrived.notify_all()
+
+    def wait(self,count,timeout=60):
+        with self.arrived:
+            self.arrived.wait_for(lambda: len(self.responses) >= count, timeout)
+        return self.responses
+
+
+class RequestCheckTests(unittest.TestCase):
+    '''
+    Requests that are answered straight away, without any workers.
+    '''
+
+    def setUp(self):
+        self.service = RenderService(configData=configData, workers=1, precompile=False)
+
+    def handle(self,line):
+        responses = Responses()
+        self.service.handleLine(line, responses)
+        self.assertEqual(len(responses.responses), 1)
+        return responses.responses[0]
+
+    def assertRejected(self,request,message):
+        response = self.handle(json.dumps(request) if not isinstance(request,str) else request)
+        self.assertFalse(response['ok'])
+        self.assertIn(message, response['error'])
+        return response
+
+    def testBadLines(self):
+        self.assertRejected('{"id": 1, "op":', 'Invalid JSON')
+        self.assertRejected('[1, 2]', 'must be a JSON object')
+        self.assertEqual(self.assertRejected({'id': 7, 'op': 'print'}, "Unknown op 'print'")['id'], 7)
+
+    def testIncompleteRenderRequests(self):
+        self.assertRejected({'id': 1}, "no 'invoice' object")
+        self.assertRejected({'id': 2, 'invoice': {'entries': []}}, "no 'customer' object")
+        self.assertRejected({'id': 3, 'invoice': {'customer': {'accountName': 'ACME'}, 'entries': []}}, "'name', 'address'")
+        self.assertRejected({'id': 4, 'invoice': dict(invoiceData, entries='A1')}, "no 'entries' list")
+        self.assertRejected({'id': 5, 'invoice': invoiceData, 'config': ['not', 'an', 'object']}, 'must be an object')
+        self.assertRejected({'id': 6, 'invoice': invoiceData, 'config': {'userName': 'Test User'}}, "'userAddress'")
+
+    def testRequestWithoutAnyConfig(self):
+        self.service.configData = None
+
+        self.assertRejected({'id': 1, 'invoice': invoiceData}, 'no default config')
+
+    def testStats(self):
+        response = self.handle('{"id": 9, "op": "stats"}')
+
+        self.assertTrue(response['ok'])
+        self.assertEqual((response['id'], response['completed'], response['failed']), (9, 0, 0))
+
+
+class RenderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.service = RenderService(configData=configData, workers=1, precompile=False)
+        self.service.start()
+
+    def tearDown(self):
+        self.service.stop()
+
+    def testRendersAndReportsFailures(self):
+        responses = Responses()
+        self.service.handleLine(json.dumps({'id': 1, 'invoice': invoiceData, 'engine': 'native'}), responses)
+        self.service.handleLine(json.dumps({'id': 2, 'invoice': dict(invoiceData, entries=[{'id': 'A1', 'description': 'Widgets', 'rate': 'x', 'qty': 1}]), 'engine': 'native'}), responses)
+
+        byId = {response['id']: response for response in responses.wait(2)}
+
+        self.assertTrue(byId[1]['ok'])
+        self.assertTrue(base64.b64decode(byId[1]['pdf']).startswith(b'%PDF'))
+        self.assertFalse(byId[2]['ok'])
+        self.assertEqual(self.service.stats()['failed'], 1)
+        self.assertEqual(self.service.health()['status'], 'ok')
+
+
+class StaleSocketTests(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='testService-')
+        self.path = os.path.join(self.directory, 'service.sock')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def testOldSocketIsRemoved(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.close()
+
+        removeStaleSocket(self.path)
+
+        self.assertFalse(os.path.exists(self.path))
+        removeStaleSocket(self.path) # nothing there is fine too
+
+    def testOtherFilesAreKept(self):
+        with open(self.path,'w') as otherFile:
+            otherFile.write('not a socket')
+
+        with self.assertRaises(FileExistsError):
+            removeStaleSocket(self.path)
+
+        with open(self.path) as otherFile:
+            self.assertEqual(otherFile.read(), 'not a socket')
+
+
+if __name__ == "__main__":
+    unittest.main()